@@ -0,0 +1,55 @@
+"""
+Alembic ortami: app'in veritabani adresi ve modelleri kullanilir.
+
+Yeni tablolar seed.py'deki create_all ile olusur; revizyonlar mevcut
+tablolardaki degisiklikleri (kolon, indeks, kisit) ve gereken veri
+doldurmayi yapar. create_all ile sifirdan kurulan bir veritabaninda da
+calisabilmeleri icin DDL'ler IF NOT EXISTS ile yazilir.
+"""
+
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+import app.models  # noqa: F401  (tum tablolar metadata'ya kaydolsun)
+from app.config import get_settings
+from app.database import Base
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _database_url() -> str:
+    return config.get_main_option("sqlalchemy.url") or get_settings().database_url
+
+
+def _run_migrations(connection: Connection) -> None:
+    # Her revizyon kendi transaction'inda; backfill'i yarida kalan bir
+    # revizyon tekrar calistirilinca oncekiler yeniden yapilmaz
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    engine = create_async_engine(_database_url(), poolclass=NullPool)
+    async with engine.connect() as connection:
+        await connection.run_sync(_run_migrations)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    # Backfill adimlari veriyi okuyup Python'da hesaplar; SQL ciktisi uretilemez
+    raise SystemExit("Offline (--sql) mod desteklenmiyor; alembic upgrade veritabanina baglanarak calistirilir")
+asyncio.run(run_migrations_online())
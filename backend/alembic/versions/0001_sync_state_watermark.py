@@ -0,0 +1,44 @@
+"""crm_leads.inceleme_durumu, crm_sync_runs.updated, crm_sync_state
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+inceleme_durumu Yevveko'dan gelir. Mevcut lead'lerde doldurulmasi icin
+yevveko watermark'inin updated_at'i geri alinir: bir sonraki incremental
+sync tum talepleri "degisen" olarak tarar ve sadece kaynakla farkli olan
+(burada inceleme_durumu bos olan) satirlari yeniden yazar.
+"""
+
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE crm_leads ADD COLUMN IF NOT EXISTS inceleme_durumu VARCHAR(50)")
+
+    op.execute("ALTER TABLE IF EXISTS crm_sync_runs ADD COLUMN IF NOT EXISTS updated INTEGER DEFAULT 0")
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS crm_sync_state (
+            source VARCHAR(100) PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0,
+            last_updated_at TIMESTAMP WITHOUT TIME ZONE,
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("""
+        INSERT INTO crm_sync_state (source, last_id, last_updated_at)
+        SELECT 'yevveko', coalesce(max(yevveko_talep_id), 0), TIMESTAMP '1970-01-01'
+        FROM crm_leads
+        ON CONFLICT (source) DO UPDATE SET last_updated_at = excluded.last_updated_at
+    """)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE IF EXISTS crm_sync_runs DROP COLUMN IF EXISTS updated")
+    op.execute("ALTER TABLE crm_leads DROP COLUMN IF EXISTS inceleme_durumu")
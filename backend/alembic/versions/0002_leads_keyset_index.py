@@ -0,0 +1,21 @@
+"""crm_leads (created_at, id) indeksi: GET /leads keyset sayfalama
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS ix_crm_leads_created_at_id ON crm_leads (created_at, id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_crm_leads_created_at_id")
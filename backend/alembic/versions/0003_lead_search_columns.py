@@ -0,0 +1,50 @@
+"""crm_leads arama kolonlari: search_text (pg_trgm GIN) ve customer_phone_digits
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+customer_phone_digits uretilen (STORED) kolondur; eklenirken veritabani
+doldurur. search_text Turkce katlama (app.utils.search.build_search_text)
+gerektirdiginden mevcut satirlar burada lead_search.fill_search_text ile
+doldurulur.
+"""
+
+import logging
+
+from alembic import op
+
+from app.services.lead_search import fill_search_text
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("ALTER TABLE crm_leads ADD COLUMN IF NOT EXISTS search_text TEXT")
+    op.execute("""
+        ALTER TABLE crm_leads ADD COLUMN IF NOT EXISTS customer_phone_digits VARCHAR(10)
+        GENERATED ALWAYS AS (right(regexp_replace(customer_phone, '[^0-9]', '', 'g'), 10)) STORED
+    """)
+
+    total = fill_search_text(op.get_bind())
+    logger.info(f"search_text: {total} satir dolduruldu")
+
+    # Indeksler backfill'den sonra: doldurma sirasinda her UPDATE indeksi guncellemesin
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_crm_leads_search_text_trgm "
+        "ON crm_leads USING gin (search_text gin_trgm_ops)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_crm_leads_phone_digits ON crm_leads (customer_phone_digits)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_crm_leads_phone_digits")
+    op.execute("DROP INDEX IF EXISTS ix_crm_leads_search_text_trgm")
+    op.execute("ALTER TABLE crm_leads DROP COLUMN IF EXISTS customer_phone_digits")
+    op.execute("ALTER TABLE crm_leads DROP COLUMN IF EXISTS search_text")
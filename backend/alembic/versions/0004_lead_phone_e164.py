@@ -0,0 +1,72 @@
+"""crm_leads.customer_phone_e164 ve indeksi
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+Bos satirlar app.utils.phone.to_e164 ile doldurulur. Kolon daha once
+(eski to_e164 ile) doldurulmussa cep telefonu bicimine uymayan degerler
+once temizlenip yeniden hesaplanir.
+"""
+
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.phone import to_e164
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+BACKFILL_CHUNK_SIZE = 5000
+
+
+def _backfill_e164(conn) -> None:
+    select_chunk = sa.text("""
+        SELECT id, customer_phone FROM crm_leads
+        WHERE id > :last_id AND customer_phone IS NOT NULL AND customer_phone_e164 IS NULL
+        ORDER BY id LIMIT :limit
+    """)
+    update_chunk = sa.text("""
+        UPDATE crm_leads AS l SET customer_phone_e164 = v.e164
+        FROM unnest(CAST(:ids AS integer[]), CAST(:phones AS varchar[])) AS v(id, e164)
+        WHERE l.id = v.id
+    """)
+    total = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(select_chunk, {"last_id": last_id, "limit": BACKFILL_CHUNK_SIZE}).all()
+        if not rows:
+            break
+        # Taninmayan numaralar NULL kalir; imlec id ile ilerledigi icin tekrar okunmaz
+        values = [(r.id, e164) for r in rows if (e164 := to_e164(r.customer_phone))]
+        if values:
+            conn.execute(update_chunk, {
+                "ids": [v[0] for v in values],
+                "phones": [v[1] for v in values],
+            })
+        total += len(values)
+        last_id = rows[-1].id
+    logger.info(f"customer_phone_e164: {total} satir dolduruldu")
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE crm_leads ADD COLUMN IF NOT EXISTS customer_phone_e164 VARCHAR(20)")
+    op.execute(r"""
+        UPDATE crm_leads SET customer_phone_e164 = NULL
+        WHERE customer_phone_e164 !~ '^\+905[0-9]{9}$'
+    """)
+
+    _backfill_e164(op.get_bind())
+
+    op.execute("CREATE INDEX IF NOT EXISTS ix_crm_leads_phone_e164 ON crm_leads (customer_phone_e164)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_crm_leads_phone_e164")
+    op.execute("ALTER TABLE crm_leads DROP COLUMN IF EXISTS customer_phone_e164")
@@ -0,0 +1,25 @@
+"""crm_franchise_offices.capacity: otomatik dagitimda ofis kapasitesi
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+Mevcut ofisler varsayilan kapasiteyle (20) baslar.
+"""
+
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE crm_franchise_offices ADD COLUMN IF NOT EXISTS capacity INTEGER NOT NULL DEFAULT 20"
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE crm_franchise_offices DROP COLUMN IF EXISTS capacity")
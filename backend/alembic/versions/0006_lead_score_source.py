@@ -0,0 +1,38 @@
+"""crm_leads.skor_kaynagi: puani kimin verdigi (otomatik / ajan)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+Toplu puanlama skor_kaynagi = 'ajan' olan lead'leri ezmez. Bu kolondan
+once ilk aramada ajanin siniflandirdigi lead'ler arama kayitlarindan
+bulunup 'ajan' olarak isaretlenir; aksi halde ilk yeniden puanlama ajanin
+verdigi puani silerdi. Lead ekranindan elle duzeltilen puanlarin izi
+tutulmadigindan onlar isaretlenemez.
+"""
+
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE crm_leads ADD COLUMN IF NOT EXISTS skor_kaynagi VARCHAR(20)")
+    op.execute("""
+        UPDATE crm_leads AS l SET skor_kaynagi = 'ajan'
+        WHERE l.skor_kaynagi IS NULL
+          AND EXISTS (
+              SELECT 1 FROM crm_call_logs c
+              WHERE c.lead_id = l.id
+                AND c.call_type = 'ilk_arama'
+                AND c.result_code = 'baglanti_kuruldu'
+                AND (c.lead_sinif_cikti IS NOT NULL OR c.toplanti_uygunluk_skoru IS NOT NULL)
+          )
+    """)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE crm_leads DROP COLUMN IF EXISTS skor_kaynagi")
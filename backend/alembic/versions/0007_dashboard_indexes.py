@@ -0,0 +1,46 @@
+"""Merkez dashboard sorgusunun indeksleri
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_crm_leads_sla_open ON crm_leads (ilk_arama_deadline) "
+        "WHERE status = 'talep_geldi' AND ilk_arama_yapildi_at IS NULL"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_crm_leads_closed_won ON crm_leads (closed_at) "
+        "WHERE status = 'kapanis_basarili'"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_crm_appointments_scheduled_date ON crm_appointments (scheduled_date)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_crm_appointments_tamamlandi ON crm_appointments (id) "
+        "WHERE status = 'tamamlandi'"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_crm_meeting_reports_appointment_id "
+        "ON crm_meeting_reports (appointment_id)"
+    )
+
+
+def downgrade() -> None:
+    for name in (
+        "ix_crm_meeting_reports_appointment_id",
+        "ix_crm_appointments_tamamlandi",
+        "ix_crm_appointments_scheduled_date",
+        "ix_crm_leads_closed_won",
+        "ix_crm_leads_sla_open",
+    ):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
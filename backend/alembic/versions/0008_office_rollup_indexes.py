@@ -0,0 +1,36 @@
+"""Ofis gunluk rollup'larinin kaynak indeksleri
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_crm_meeting_reports_office_submitted "
+        "ON crm_meeting_reports (franchise_office_id, submitted_at)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_crm_revenue_events_office_created "
+        "ON crm_revenue_events (franchise_office_id, created_at)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_crm_satisfaction_calls_called_at ON crm_satisfaction_calls (called_at)"
+    )
+
+
+def downgrade() -> None:
+    for name in (
+        "ix_crm_satisfaction_calls_called_at",
+        "ix_crm_revenue_events_office_created",
+        "ix_crm_meeting_reports_office_submitted",
+    ):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,23 @@
+"""crm_leads / crm_appointments updated_at indeksleri: saatlik rollup'larin kirli saat taramasi
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS ix_crm_leads_updated_at ON crm_leads (updated_at)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_crm_appointments_updated_at ON crm_appointments (updated_at)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_crm_appointments_updated_at")
+    op.execute("DROP INDEX IF EXISTS ix_crm_leads_updated_at")
@@ -0,0 +1,53 @@
+"""crm_kpi_snapshots: (gun, entity) tekilligi NULLS NOT DISTINCT
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+
+Eski isimsiz kisit NULL entity_id'yi (merkez satiri) tekil saymadigindan
+ayni gune birden fazla merkez satiri yazilmis olabilir; en son yazilan
+(en buyuk id) tutulur, digerleri silinir. Upsert'in ON CONFLICT hedefi
+uq_crm_kpi_snapshots_entity_day kisitidir.
+"""
+
+from alembic import op
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE crm_kpi_snapshots "
+        "DROP CONSTRAINT IF EXISTS crm_kpi_snapshots_snapshot_date_entity_type_entity_id_key"
+    )
+    op.execute("""
+        DELETE FROM crm_kpi_snapshots AS s
+        USING crm_kpi_snapshots AS newer
+        WHERE newer.snapshot_date = s.snapshot_date
+          AND newer.entity_type = s.entity_type
+          AND newer.entity_id IS NOT DISTINCT FROM s.entity_id
+          AND newer.id > s.id
+    """)
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'uq_crm_kpi_snapshots_entity_day'
+            ) THEN
+                ALTER TABLE crm_kpi_snapshots ADD CONSTRAINT uq_crm_kpi_snapshots_entity_day
+                    UNIQUE NULLS NOT DISTINCT (snapshot_date, entity_type, entity_id);
+            END IF;
+        END
+        $$
+    """)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE crm_kpi_snapshots DROP CONSTRAINT IF EXISTS uq_crm_kpi_snapshots_entity_day")
+    op.execute(
+        "ALTER TABLE crm_kpi_snapshots ADD CONSTRAINT crm_kpi_snapshots_snapshot_date_entity_type_entity_id_key "
+        "UNIQUE (snapshot_date, entity_type, entity_id)"
+    )
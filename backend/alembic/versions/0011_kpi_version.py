@@ -0,0 +1,26 @@
+"""crm_kpi_snapshots.kpi_version: satiri hesaplayan KPI tanimlarinin surumu
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+
+Mevcut satirlar 0 ile isaretlenir; kpi_backfill bunlari eski surum sayar
+ve yeniden hesaplar.
+"""
+
+from alembic import op
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE crm_kpi_snapshots ADD COLUMN IF NOT EXISTS kpi_version INTEGER NOT NULL DEFAULT 0"
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE crm_kpi_snapshots DROP COLUMN IF EXISTS kpi_version")
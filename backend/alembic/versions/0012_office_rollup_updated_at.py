@@ -0,0 +1,33 @@
+"""Ofis rollup kaynaklarina updated_at: degisen gunlerin artimli tespiti
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+
+Mevcut satirlarin updated_at'i bu revizyonun zamanidir. Ofis rollup
+watermark'i da silinir; bir sonraki refresh_office_rollups tum gecmisi
+kirli sayip bastan doldurur (eski artimsiz calisma sadece son 7 gunu
+yaziyordu).
+"""
+
+from alembic import op
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+TABLES = ("crm_meeting_reports", "crm_satisfaction_calls", "crm_revenue_events")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT now()")
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_updated_at ON {table} (updated_at)")
+    op.execute("DELETE FROM crm_sync_state WHERE source = 'office_daily_rollup'")
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_updated_at")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS updated_at")
@@ -0,0 +1,21 @@
+"""crm_call_logs.started_at indeksi: saatlik arama rollup'inin saat bazinda yeniden hesaplanmasi
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS ix_crm_call_logs_started_at ON crm_call_logs (started_at)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_crm_call_logs_started_at")
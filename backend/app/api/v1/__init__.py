@@ -10,6 +10,8 @@ from app.api.v1.franchise import router as franchise_router
 from app.api.v1.dashboard import router as dashboard_router
 from app.api.v1.notifications import router as notifications_router
 from app.api.v1.sync import router as sync_router
+from app.api.v1.duplicates import router as duplicates_router
+from app.api.v1.analytics import router as analytics_router
 
 api_router = APIRouter()
 
@@ -23,3 +25,5 @@ api_router.include_router(franchise_router, prefix="/franchise", tags=["Franchis
 api_router.include_router(dashboard_router, prefix="/dashboard", tags=["Dashboard"])
 api_router.include_router(notifications_router, prefix="/notifications", tags=["Notifications"])
 api_router.include_router(sync_router, prefix="/sync", tags=["Sync"])
+api_router.include_router(duplicates_router, prefix="/duplicates", tags=["Duplicates"])
+api_router.include_router(analytics_router, prefix="/analytics", tags=["Analytics"])
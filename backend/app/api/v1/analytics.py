@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.api.deps import get_current_user
+from app.models.user import CRMUser
+from app.schemas.analytics import TimeseriesResponse
+from app.services.timeseries import (
+    GRANULARITY_STEP,
+    MAX_POINTS,
+    METRICS,
+    metric_dimensions,
+    read_timeseries,
+)
+from app.utils.permissions import Permission, has_permission
+
+router = APIRouter()
+
+
+@router.get("/timeseries", response_model=TimeseriesResponse)
+async def timeseries(
+    metric: str = Query(..., description=", ".join(METRICS)),
+    start: datetime = Query(...),
+    end: datetime = Query(...),
+    granularity: Literal["hour", "day", "week", "month"] = "day",
+    group_by: Optional[str] = None,
+    ilce: Optional[str] = None,
+    source: Optional[str] = None,
+    status: Optional[str] = None,
+    call_type: Optional[str] = None,
+    result_code: Optional[str] = None,
+    office_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: CRMUser = Depends(get_current_user),
+):
+    """Saatlik rollup'lardan zaman serisi; ham tablolar taranmaz."""
+    if metric not in METRICS:
+        raise HTTPException(status_code=400, detail=f"Gecersiz metrik: {metric}")
+    if end <= start:
+        raise HTTPException(status_code=400, detail="Bitis baslangictan sonra olmali")
+    if (end - start) / GRANULARITY_STEP[granularity] > MAX_POINTS:
+        raise HTTPException(status_code=400, detail="Aralik bu cozunurluk icin cok genis")
+
+    dimensions = metric_dimensions(metric)
+    if group_by is not None and group_by not in dimensions:
+        raise HTTPException(status_code=400, detail=f"{metric} icin gruplanamaz: {group_by}")
+
+    filters = {
+        name: value
+        for name, value in {
+            "ilce": ilce, "source": source, "status": status,
+            "call_type": call_type, "result_code": result_code, "office_id": office_id,
+        }.items()
+        if value is not None
+    }
+    unknown = set(filters) - set(dimensions)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"{metric} icin gecersiz filtre: {', '.join(sorted(unknown))}")
+
+    # Bayi kullanicilari sadece kendi ofisinin randevu serisini gorebilir
+    if not has_permission(current_user.role_names, Permission.KPI_VIEW_ALL):
+        if (
+            metric != "appointments"
+            or not current_user.franchise_office_id
+            or not has_permission(current_user.role_names, Permission.KPI_VIEW_OWN_OFFICE)
+        ):
+            raise HTTPException(status_code=403, detail="Bu metrigi goruntuleme yetkiniz yok")
+        filters["office_id"] = current_user.franchise_office_id
+
+    points = await read_timeseries(db, metric, start, end, granularity, group_by, filters)
+    return TimeseriesResponse(
+        metric=metric,
+        granularity=granularity,
+        start=start,
+        end=end,
+        group_by=group_by,
+        points=points,
+    )
@@ -16,6 +16,9 @@ from app.schemas.appointment import (
     AppointmentCreateRequest,
     AppointmentResponse,
 )
+from app.services.dashboard_cache import mark_dirty
+from app.services.lead_events import record_status_change
+from app.services.office_load import record_appointment_status
 from app.utils.permissions import Permission
 
 router = APIRouter()
@@ -71,10 +74,14 @@ async def create_appointment(
         confirmation_deadline=datetime.now(timezone.utc) + timedelta(hours=2),
     )
     db.add(appointment)
+    record_appointment_status(db, request.franchise_office_id, None, "beklemede")
+    mark_dirty(db, request.franchise_office_id)
 
     # Lead durumunu guncelle
+    old_status = lead.status
     lead.status = "toplanti_planlandi"
     lead.assigned_franchise_id = request.franchise_office_id
+    await record_status_change(db, lead, old_status)
 
     # Aktivite kaydi
     db.add(CRMActivity(
@@ -134,6 +141,8 @@ async def confirm_appointment(
     else:
         appointment.status = "onaylandi"
 
+    record_appointment_status(db, appointment.franchise_office_id, "beklemede", "onaylandi")
+    mark_dirty(db, appointment.franchise_office_id)
     appointment.confirmed_at = datetime.now(timezone.utc)
     appointment.confirmed_by_id = current_user.id
 
@@ -165,6 +174,8 @@ async def complete_appointment(
     if not appointment:
         raise HTTPException(status_code=404, detail="Randevu bulunamadi")
 
+    record_appointment_status(db, appointment.franchise_office_id, appointment.status, "tamamlandi")
+    mark_dirty(db, appointment.franchise_office_id)
     appointment.status = "tamamlandi"
 
     # Lead durumunu guncelle
@@ -173,7 +184,9 @@ async def complete_appointment(
     )
     lead = lead_result.scalar_one_or_none()
     if lead:
+        old_status = lead.status
         lead.status = "toplanti_yapildi"
+        await record_status_change(db, lead, old_status)
 
     await db.flush()
     return {"ok": True, "status": "tamamlandi"}
@@ -192,6 +205,8 @@ async def mark_no_show(
     if not appointment:
         raise HTTPException(status_code=404, detail="Randevu bulunamadi")
 
+    record_appointment_status(db, appointment.franchise_office_id, appointment.status, "gelmedi")
+    mark_dirty(db, appointment.franchise_office_id)
     appointment.status = "gelmedi"
 
     db.add(CRMActivity(
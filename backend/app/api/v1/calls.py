@@ -12,6 +12,7 @@ from app.models.lead import CRMLead
 from app.models.activity import CRMActivity
 from app.models.user import CRMUser
 from app.schemas.call import CallLogCreateRequest, CallLogResponse
+from app.services.lead_events import record_status_change
 from app.utils.permissions import Permission
 
 router = APIRouter()
@@ -64,6 +65,8 @@ async def create_call_log(
     )
     db.add(call_log)
 
+    old_status = lead.status
+
     # Ilk arama ise lead'i guncelle
     if request.call_type == "ilk_arama" and request.result_code == "baglanti_kuruldu":
         lead.ilk_arama_yapildi_at = datetime.now()
@@ -75,6 +78,8 @@ async def create_call_log(
             lead.lead_sinif = request.lead_sinif_cikti
         if request.toplanti_uygunluk_skoru is not None:
             lead.toplanti_uygunluk_skoru = request.toplanti_uygunluk_skoru
+        if request.lead_sinif_cikti or request.toplanti_uygunluk_skoru is not None:
+            lead.skor_kaynagi = "ajan"
 
         # Script verilerini lead'e kaydet
         if request.script_data:
@@ -98,6 +103,8 @@ async def create_call_log(
         metadata={"call_type": request.call_type, "result": request.result_code},
     ))
 
+    await record_status_change(db, lead, old_status)
+
     await db.flush()
     await db.refresh(call_log)
     return call_log
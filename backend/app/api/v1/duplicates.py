@@ -0,0 +1,117 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import require_permission
+from app.database import get_db
+from app.models.dedup import CRMDuplicateCluster
+from app.models.user import CRMUser
+from app.schemas.duplicate import DuplicateMergeRequest
+from app.services.dedup import merge_cluster
+from app.utils.permissions import Permission
+
+router = APIRouter()
+
+
+def _cluster_summary(cluster: CRMDuplicateCluster) -> dict:
+    return {
+        "id": cluster.id,
+        "status": cluster.status,
+        "primary_lead_id": cluster.primary_lead_id,
+        "created_at": cluster.created_at.isoformat(),
+        "members": [
+            {
+                "lead_id": m.lead_id,
+                "score": m.score,
+                "reasons": m.reasons.split(",") if m.reasons else [],
+                "customer_name": m.lead.customer_name,
+                "customer_phone": m.lead.customer_phone,
+                "ilce": m.lead.ilce,
+                "mahalle": m.lead.mahalle,
+                "sokak": m.lead.sokak,
+                "kapi_no": m.lead.kapi_no,
+                "ada": m.lead.ada,
+                "parsel": m.lead.parsel,
+                "status": m.lead.status,
+                "created_at": m.lead.created_at.isoformat(),
+            }
+            for m in sorted(cluster.members, key=lambda m: m.lead_id)
+            if m.lead is not None
+        ],
+    }
+
+
+async def _get_open_cluster(db: AsyncSession, cluster_id: int) -> CRMDuplicateCluster:
+    cluster = await db.get(CRMDuplicateCluster, cluster_id)
+    if not cluster:
+        raise HTTPException(status_code=404, detail="Mukerrer grubu bulunamadi")
+    if cluster.status != "acik":
+        raise HTTPException(status_code=400, detail="Bu grup zaten sonuclandirilmis")
+    return cluster
+
+
+@router.get("")
+async def list_duplicate_clusters(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: CRMUser = Depends(require_permission(Permission.LEADS_CLASSIFY)),
+):
+    """Birlestirilmeyi bekleyen mukerrer lead gruplari (en yeni once)."""
+    query = select(CRMDuplicateCluster).where(CRMDuplicateCluster.status == "acik")
+    total = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar() or 0
+
+    result = await db.execute(
+        query.order_by(CRMDuplicateCluster.id.desc())
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+    )
+    return {
+        "items": [_cluster_summary(c) for c in result.scalars().all()],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+    }
+
+
+@router.post("/{cluster_id}/merge")
+async def merge_duplicate_cluster(
+    cluster_id: int,
+    request: DuplicateMergeRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: CRMUser = Depends(require_permission(Permission.LEADS_CLASSIFY)),
+):
+    """Gruptaki lead'leri secilen ana lead'de birlestirir, digerlerini kapatir."""
+    cluster = await _get_open_cluster(db, cluster_id)
+    if request.primary_lead_id not in {m.lead_id for m in cluster.members}:
+        raise HTTPException(status_code=400, detail="Ana lead bu grubun uyesi degil")
+
+    primary = await merge_cluster(db, cluster, request.primary_lead_id, current_user.id)
+    return {"ok": True, "primary_lead_id": primary.id}
+
+
+@router.post("/{cluster_id}/ignore")
+async def ignore_duplicate_cluster(
+    cluster_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: CRMUser = Depends(require_permission(Permission.LEADS_CLASSIFY)),
+):
+    """Grubu mukerrer degil olarak isaretler; batch yeniden hesaplamada tekrar acilmaz."""
+    cluster = await _get_open_cluster(db, cluster_id)
+    cluster.status = "yoksayildi"
+    cluster.resolved_by = current_user.id
+    cluster.resolved_at = datetime.now()
+    return {"ok": True}
+
+
+@router.post("/rebuild")
+async def rebuild_duplicates(
+    current_user: CRMUser = Depends(require_permission(Permission.LEADS_CLASSIFY)),
+):
+    """Tum tablo icin mukerrer gruplarini arka planda yeniden hesaplar."""
+    from app.tasks.dedup_tasks import rebuild_duplicate_clusters
+
+    task = rebuild_duplicate_clusters.delay()
+    return {"ok": True, "task_id": task.id}
@@ -11,6 +11,8 @@ from app.schemas.franchise import (
     FranchiseOfficeResponse,
     FranchiseOfficeUpdateRequest,
 )
+from app.services.lead_routing import territory_index
+from app.services.office_load import office_load
 from app.utils.permissions import Permission
 
 router = APIRouter()
@@ -45,9 +47,23 @@ async def create_office(
     db.add(office)
     await db.flush()
     await db.refresh(office)
+    territory_index.invalidate()
+    office_load.invalidate()
     return office
 
 
+@router.get("/load")
+async def office_load_status(
+    db: AsyncSession = Depends(get_db),
+    current_user: CRMUser = Depends(
+        require_permission(Permission.FRANCHISE_VIEW_ALL)
+    ),
+):
+    """Otomatik dagitimin gordugu ofis yukleri (bu surecin onbellegi)."""
+    tracker = await office_load.refresh(db)
+    return {"items": tracker.snapshot()}
+
+
 @router.get("/{office_id}", response_model=FranchiseOfficeResponse)
 async def get_office(
     office_id: int,
@@ -84,4 +100,6 @@ async def update_office(
 
     await db.flush()
     await db.refresh(office)
+    territory_index.invalidate()
+    office_load.invalidate()
     return office
@@ -1,22 +1,37 @@
+import time
+from collections import Counter
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, select
+from sqlalchemy import func, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, require_permission
 from app.models.lead import CRMLead
 from app.models.activity import CRMActivity
 from app.models.user import CRMUser
 from app.schemas.lead import (
     LeadCreateRequest,
     LeadResponse,
+    LeadRouteRequest,
     LeadStatusUpdate,
     LeadUpdateRequest,
 )
-from app.utils.pagination import PaginatedResponse
+from app.services.dedup import detect_duplicates
+from app.services.funnel import apply_deltas, counter_key, read_funnel
+from app.services.lead_events import record_lead_created, record_status_change
+from app.services.lead_routing import territory_index
+from app.services.lead_search import (
+    apply_search,
+    find_duplicate_lead_ids,
+    refresh_search_fields,
+)
+from app.services.office_load import office_load
+from app.utils.pagination import PaginatedResponse, decode_cursor, encode_cursor
+from app.utils.permissions import Permission
+from app.utils.phone import to_e164
 
 router = APIRouter()
 
@@ -36,9 +51,19 @@ async def list_leads(
     ilce: Optional[str] = None,
     search: Optional[str] = None,
     assigned_franchise_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: AsyncSession = Depends(get_db),
     current_user: CRMUser = Depends(get_current_user),
 ):
+    """
+    Iki sayfalama modu vardir:
+    - page/per_page (eski API, OFFSET ile)
+    - cursor: ilk istekte cursor="" gonderilir, sonraki isteklerde yanittaki
+      next_cursor kullanilir. Derin sayfalarda da sabit maliyetlidir.
+    include_total=false toplam sayimi (count(*)) atlar.
+    search sonuclari sayfa modunda alakaya, cursor modunda tarihe gore siralanir.
+    """
     query = select(CRMLead)
 
     # Franchise kullanicilari sadece kendi ofislerini gorur
@@ -56,32 +81,59 @@ async def list_leads(
         query = query.where(CRMLead.ilce == ilce)
     if assigned_franchise_id:
         query = query.where(CRMLead.assigned_franchise_id == assigned_franchise_id)
+    rank = None
     if search:
-        search_filter = f"%{search}%"
-        query = query.where(
-            CRMLead.customer_name.ilike(search_filter)
-            | CRMLead.customer_phone.ilike(search_filter)
-            | CRMLead.ilce.ilike(search_filter)
-            | CRMLead.mahalle.ilike(search_filter)
-        )
+        query, rank = apply_search(query, search)
 
     # Toplam sayim
-    count_query = select(func.count()).select_from(query.subquery())
-    total = (await db.execute(count_query)).scalar() or 0
+    total = None
+    if include_total:
+        count_query = select(func.count()).select_from(query.subquery())
+        total = (await db.execute(count_query)).scalar() or 0
+
+    # Siralama: id esit created_at'ler arasinda kesin sirayi saglar
+    query = query.order_by(CRMLead.created_at.desc(), CRMLead.id.desc())
+
+    if cursor is None:
+        # Sayfa modunda arama sonuclari once alaka puanina gore siralanir
+        if rank is not None:
+            query = query.order_by(None).order_by(
+                rank.desc(), CRMLead.created_at.desc(), CRMLead.id.desc()
+            )
+        query = query.offset((page - 1) * per_page).limit(per_page)
+        result = await db.execute(query)
+        leads = result.scalars().all()
+
+        return PaginatedResponse(
+            items=[LeadResponse.model_validate(l) for l in leads],
+            total=total,
+            page=page,
+            per_page=per_page,
+            total_pages=(total + per_page - 1) // per_page if total is not None else None,
+        )
 
-    # Siralama + sayfalama
-    query = query.order_by(CRMLead.created_at.desc())
-    query = query.offset((page - 1) * per_page).limit(per_page)
+    # Keyset: son gorulen (created_at, id)'den sonrasi
+    if cursor:
+        try:
+            last_created_at, last_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Gecersiz cursor")
+        query = query.where(
+            tuple_(CRMLead.created_at, CRMLead.id) < tuple_(last_created_at, last_id)
+        )
 
-    result = await db.execute(query)
+    # Bir fazla satir cekilir; varsa sonraki sayfa vardir
+    result = await db.execute(query.limit(per_page + 1))
     leads = result.scalars().all()
+    has_more = len(leads) > per_page
+    leads = leads[:per_page]
 
     return PaginatedResponse(
         items=[LeadResponse.model_validate(l) for l in leads],
         total=total,
-        page=page,
         per_page=per_page,
-        total_pages=(total + per_page - 1) // per_page,
+        total_pages=(total + per_page - 1) // per_page if total is not None else None,
+        next_cursor=encode_cursor(leads[-1].created_at, leads[-1].id) if has_more else None,
     )
 
 
@@ -92,12 +144,14 @@ async def create_lead(
     current_user: CRMUser = Depends(get_current_user),
 ):
     lead = CRMLead(**request.model_dump())
+    refresh_search_fields(lead)
 
     # SLA deadline (varsayilan 30dk)
     lead.ilk_arama_deadline = datetime.now() + timedelta(minutes=30)
 
     db.add(lead)
     await db.flush()
+    await record_lead_created(db, lead)
 
     # Aktivite kaydi
     db.add(CRMActivity(
@@ -107,10 +161,101 @@ async def create_lead(
         title="Lead olusturuldu",
         description=f"Kaynak: {lead.source}",
     ))
+    await detect_duplicates(db, [lead.id])
 
     await db.flush()
     await db.refresh(lead)
-    return lead
+    return await _with_duplicates(db, lead)
+
+
+async def _with_duplicates(db: AsyncSession, lead: CRMLead) -> LeadResponse:
+    """Yanita ayni telefonlu diger lead'leri ekler (mukerrer arama uyarisi icin)."""
+    response = LeadResponse.model_validate(lead)
+    response.duplicate_lead_ids = await find_duplicate_lead_ids(db, lead)
+    return response
+
+
+@router.get("/by-phone/{phone}", response_model=list[LeadResponse])
+async def get_leads_by_phone(
+    phone: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: CRMUser = Depends(get_current_user),
+):
+    """Telefon numarasina gore lead'ler; numara hangi bicimde yazilirsa yazilsin eslesir."""
+    phone_e164 = to_e164(phone)
+    if not phone_e164:
+        raise HTTPException(status_code=400, detail="Gecersiz telefon numarasi")
+
+    query = select(CRMLead).where(CRMLead.customer_phone_e164 == phone_e164)
+    if current_user.is_franchise and current_user.franchise_office_id:
+        query = query.where(
+            CRMLead.assigned_franchise_id == current_user.franchise_office_id
+        )
+
+    result = await db.execute(query.order_by(CRMLead.created_at.desc()))
+    return result.scalars().all()
+
+
+@router.post("/route")
+async def route_leads(
+    request: LeadRouteRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: CRMUser = Depends(require_permission(Permission.LEADS_ASSIGN)),
+):
+    """
+    Lead'leri bolge indeksine gore ofislere yonlendirir. dry_run=true (varsayilan)
+    sadece kararlari dondurur; false ise atanmamis lead'lere uygular.
+    """
+    query = select(
+        CRMLead.id, CRMLead.ilce, CRMLead.mahalle, CRMLead.assigned_franchise_id, CRMLead.status,
+    )
+    if request.lead_ids:
+        query = query.where(CRMLead.id.in_(request.lead_ids))
+    else:
+        query = query.where(CRMLead.assigned_franchise_id.is_(None)).order_by(CRMLead.id)
+    rows = (await db.execute(query.limit(request.limit))).all()
+
+    index = await territory_index.refresh(db)
+    plan = (await office_load.refresh(db)).plan()
+    started = time.perf_counter()
+    items = []
+    for row in rows:
+        decision = index.route(row.ilce, row.mahalle, plan)
+        items.append({
+            "lead_id": row.id,
+            "office_id": decision.office_id,
+            "rule": decision.rule,
+            "current_office_id": row.assigned_franchise_id,
+            "status": row.status,
+        })
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    applied = 0
+    if not request.dry_run:
+        # Elle atanmis lead'lere dokunulmaz
+        to_apply = [
+            i for i in items if i["office_id"] is not None and i["current_office_id"] is None
+        ]
+        updates = [{"id": i["lead_id"], "assigned_franchise_id": i["office_id"]} for i in to_apply]
+        if updates:
+            await db.execute(update(CRMLead), updates)
+            plan.commit(db, (i["office_id"] for i in to_apply))
+            deltas = Counter()
+            for i in to_apply:
+                deltas[counter_key(None, i["status"])] -= 1
+                deltas[counter_key(i["office_id"], i["status"])] += 1
+            await apply_deltas(db, deltas)
+        applied = len(updates)
+
+    return {
+        "dry_run": request.dry_run,
+        "routed": sum(1 for i in items if i["office_id"] is not None),
+        "applied": applied,
+        "elapsed_ms": round(elapsed_ms, 3),
+        "by_office": dict(Counter(i["office_id"] for i in items if i["office_id"] is not None)),
+        "by_rule": dict(Counter(i["rule"] for i in items)),
+        "items": items,
+    }
 
 
 @router.get("/{lead_id}", response_model=LeadResponse)
@@ -149,6 +294,10 @@ async def update_lead(
 
     for field, value in update_data.items():
         setattr(lead, field, value)
+    refresh_search_fields(lead)
+    # Elle verilen puan/sinif gece yeniden puanlamada ezilmez
+    if "lead_sinif" in update_data or "toplanti_uygunluk_skoru" in update_data:
+        lead.skor_kaynagi = "ajan"
 
     # Status degistiyse aktivite kaydi
     new_status = update_data.get("status")
@@ -165,9 +314,12 @@ async def update_lead(
         if new_status in ("kapanis_basarili", "kapanis_basarisiz", "iptal", "sahte_bos"):
             lead.closed_at = datetime.now()
 
+    await record_status_change(db, lead, old_status)
+    await detect_duplicates(db, [lead.id])
+
     await db.flush()
     await db.refresh(lead)
-    return lead
+    return await _with_duplicates(db, lead)
 
 
 @router.post("/{lead_id}/status")
@@ -204,20 +356,22 @@ async def update_lead_status(
         metadata={"old_status": old_status, "new_status": request.status},
     ))
 
+    await record_status_change(db, lead, old_status)
+
     await db.flush()
     return {"ok": True, "status": lead.status}
 
 
 @router.get("/stats/funnel")
 async def get_funnel_stats(
+    franchise_office_id: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
     current_user: CRMUser = Depends(get_current_user),
 ):
-    result = await db.execute(
-        select(CRMLead.status, func.count(CRMLead.id))
-        .group_by(CRMLead.status)
-    )
-    counts = dict(result.all())
+    """Huni sayilari crm_funnel_counters'tan okunur; franchise kullanicisi sadece kendi ofisini gorur."""
+    if current_user.is_franchise and current_user.franchise_office_id:
+        franchise_office_id = current_user.franchise_office_id
+    counts = await read_funnel(db, franchise_office_id)
 
     return {
         "talep_geldi": counts.get("talep_geldi", 0),
@@ -11,6 +11,7 @@ from app.models.meeting_report import CRMMeetingReport
 from app.models.activity import CRMActivity
 from app.models.user import CRMUser
 from app.schemas.report import MeetingReportCreateRequest, MeetingReportResponse
+from app.services.dashboard_cache import mark_dirty
 from app.utils.permissions import Permission
 
 router = APIRouter()
@@ -101,6 +102,7 @@ async def create_report(
     report.tamlik_puani = calculate_completeness(report)
 
     db.add(report)
+    mark_dirty(db, appointment.franchise_office_id)
 
     # Aktivite kaydi
     db.add(CRMActivity(
@@ -1,150 +1,201 @@
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException
 from pydantic import BaseModel
-from sqlalchemy import select, func
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user
 from app.config import get_settings
 from app.database import get_db
-from app.models.lead import CRMLead
-from app.services.yevveko_db_sync import fetch_talepler_from_yevveko, fetch_single_talep
+from app.models.outbox import CRMOutboxEvent
+from app.models.sync_run import CRMSyncRun
+from app.services.sync_scheduler import (
+    find_leader_pid,
+    run_locked_sync,
+    scheduler,
+    sync_cycle_busy,
+)
+from app.services.talep_intake import intake_queue
 
 router = APIRouter()
 settings = get_settings()
 
-# SLA suresi (dakika)
-SLA_MINUTES = 30
-
-
-def _build_lead(talep: dict) -> CRMLead:
-    """Talep verisinden CRMLead olusturur."""
-    # Deadline: talebin orijinal olusturulma tarihi + SLA suresi
-    created_at = talep.get("created_at")
-    if created_at:
-        deadline = created_at + timedelta(minutes=SLA_MINUTES)
-    else:
-        deadline = datetime.now() + timedelta(minutes=SLA_MINUTES)
-
-    return CRMLead(
-        yevveko_talep_id=talep["talep_id"],
-        source="yevveko",
-        customer_name=talep["customer_name"],
-        customer_phone=talep["customer_phone"],
-        customer_email=talep["customer_email"],
-        il="İstanbul",
-        ilce=talep["ilce"],
-        mahalle=talep["mahalle"],
-        sokak=talep["sokak"],
-        kapi_no=talep["kapi_no"],
-        ada=talep["ada"],
-        parsel=talep["parsel"],
-        bina_alani=talep["bina_alani"],
-        bagimsiz_bolum_sayisi=talep["bagimsiz_bolum_sayisi"],
-        donusum_tipi=talep["donusum_tipi"],
-        status="talep_geldi",
-        ilk_arama_deadline=deadline,
-    )
+# Bu sureden uzun suredir ilerlemeyen "calisiyor" kaydi yarim kalmis sayilir
+STALE_RUN_MINUTES = 5
 
 
 class WebhookPayload(BaseModel):
     talep_id: int
 
 
+def _run_summary(run: CRMSyncRun) -> dict:
+    return {
+        "id": run.id,
+        "mode": run.mode,
+        "status": run.status,
+        "processed": run.processed,
+        "total_estimate": run.total_estimate,
+        "percent": run.percent,
+        "created": run.created,
+        "skipped": run.skipped,
+        "chunks": run.chunks,
+        "last_talep_id": run.last_talep_id,
+        "target_talep_id": run.target_talep_id,
+        "error": run.error,
+        "started_at": run.started_at,
+        "updated_at": run.updated_at,
+        "finished_at": run.finished_at,
+    }
+
+
 @router.post("/yevveko-sync")
 async def sync_from_yevveko_db(
-    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
     """evveko_db'den yeni talepleri CRM'e senkronize eder."""
+    acquired, run = await run_locked_sync("incremental")
+    if not acquired:
+        return {
+            "ok": False,
+            "message": "Baska bir surec su an sync yapiyor",
+            "created": 0,
+            "skipped": 0,
+        }
+    if run is None:
+        return {
+            "ok": True,
+            "message": "Yeni talep yok",
+            "created": 0,
+            "skipped": 0,
+        }
+
+    return {
+        "ok": True,
+        "message": f"{run.created} yeni talep senkronize edildi, {run.skipped} zaten mevcuttu",
+        "created": run.created,
+        "skipped": run.skipped,
+        "last_yevveko_id": run.start_talep_id,
+    }
+
+
+@router.post("/yevveko-sync-all")
+async def sync_all_from_yevveko_db(
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    evveko_db'den TUM talepleri CRM'e senkronize eder (ilk kurulum icin).
+    Arka planda chunk chunk calisir; ilerleme /sync/progress'ten izlenir.
+    """
     result = await db.execute(
-        select(func.coalesce(func.max(CRMLead.yevveko_talep_id), 0))
+        select(CRMSyncRun).where(
+            CRMSyncRun.mode == "full",
+            CRMSyncRun.status == "calisiyor",
+            CRMSyncRun.updated_at > datetime.now() - timedelta(minutes=STALE_RUN_MINUTES),
+        )
     )
-    last_id = result.scalar() or 0
+    running = result.scalars().first()
+    if running:
+        return {"ok": False, "message": "Tam senkronizasyon zaten calisiyor", "run": _run_summary(running)}
 
-    talepler = await fetch_talepler_from_yevveko(since_id=last_id)
+    # Devam eden periyodik dongu bitince baslar; bu sirada periyodik sync atlanir
+    background_tasks.add_task(run_locked_sync, "full", wait=True)
+    return {"ok": True, "message": "Tam senkronizasyon baslatildi"}
 
-    created = 0
-    skipped = 0
 
-    for talep in talepler:
-        existing = await db.execute(
-            select(CRMLead).where(CRMLead.yevveko_talep_id == talep["talep_id"])
-        )
-        if existing.scalar_one_or_none():
-            skipped += 1
-            continue
+@router.post("/yevveko-backfill")
+async def start_parallel_backfill(
+    parts: int = 16,
+    current_user=Depends(get_current_user),
+):
+    """
+    Buyuk kurulumlar icin paralel backfill: id uzayi araliklara bolunur ve her
+    aralik ayri bir Celery task'inda islenir. Yarida kalan araliklar tekrar
+    baslatildiginda checkpoint'ten devam eder. Bir sync dongusu (veya baska
+    bir backfill) calisirken reddedilir.
+    """
+    from app.tasks.backfill_tasks import start_backfill
 
-        db.add(_build_lead(talep))
-        created += 1
+    if await sync_cycle_busy():
+        return {"ok": False, "message": "Baska bir surec su an sync yapiyor"}
 
-    await db.flush()
+    task = start_backfill.delay(parts=parts)
+    return {"ok": True, "message": "Paralel backfill kuyruga alindi", "task_id": task.id}
 
-    return {
-        "ok": True,
-        "message": f"{created} yeni talep senkronize edildi, {skipped} zaten mevcuttu",
-        "created": created,
-        "skipped": skipped,
-        "last_yevveko_id": last_id,
-    }
 
+@router.get("/progress")
+async def sync_progress(
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Son senkronizasyon calismalarinin ilerlemesini dondurur."""
+    result = await db.execute(
+        select(CRMSyncRun).order_by(CRMSyncRun.id.desc()).limit(10)
+    )
+    runs = result.scalars().all()
+    return {"items": [_run_summary(r) for r in runs]}
 
-@router.post("/yevveko-sync-all")
-async def sync_all_from_yevveko_db(
+
+@router.get("/scheduler")
+async def scheduler_status(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    """evveko_db'den TUM talepleri CRM'e senkronize eder (ilk kurulum icin)."""
-    talepler = await fetch_talepler_from_yevveko(since_id=0)
+    """Sync zamanlayicisinin lider/takipci durumunu ve son/sonraki calismayi dondurur."""
+    result = await db.execute(
+        select(CRMSyncRun).order_by(CRMSyncRun.id.desc()).limit(1)
+    )
+    last_run = result.scalar_one_or_none()
 
-    created = 0
-    skipped = 0
+    # Takipci worker'lar liderin planini bilmez; son calismadan tahmin edilir
+    next_run_at = scheduler.next_run_at if scheduler.role == "leader" else None
+    if next_run_at is None and last_run is not None:
+        next_run_at = last_run.updated_at + timedelta(seconds=scheduler.interval)
 
-    for talep in talepler:
-        existing = await db.execute(
-            select(CRMLead).where(CRMLead.yevveko_talep_id == talep["talep_id"])
-        )
-        if existing.scalar_one_or_none():
-            skipped += 1
-            continue
+    return {
+        "this_worker": scheduler.status(),
+        "leader_db_pid": await find_leader_pid(),
+        "last_run": _run_summary(last_run) if last_run else None,
+        "next_run_at": next_run_at,
+    }
 
-        db.add(_build_lead(talep))
-        created += 1
 
-    await db.flush()
+@router.get("/outbox")
+async def outbox_status(
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """CRM -> Yevveko outbox kuyrugunun durum bazli sayilarini dondurur."""
+    result = await db.execute(
+        select(CRMOutboxEvent.status, func.count(CRMOutboxEvent.id))
+        .group_by(CRMOutboxEvent.status)
+    )
+    counts = dict(result.all())
 
     return {
-        "ok": True,
-        "message": f"{created} talep senkronize edildi, {skipped} zaten mevcuttu",
-        "created": created,
-        "skipped": skipped,
-        "total_in_yevveko": len(talepler),
+        "beklemede": counts.get("beklemede", 0),
+        "gonderildi": counts.get("gonderildi", 0),
+        "olu": counts.get("olu", 0),
     }
 
 
-@router.post("/webhook/yeni-talep")
+@router.post("/webhook/yeni-talep", status_code=202)
 async def receive_new_talep(
     payload: WebhookPayload,
     x_api_key: str = Header(...),
-    db: AsyncSession = Depends(get_db),
 ):
-    """Yevveko'dan gelen yeni talep webhook'u."""
+    """
+    Yevveko'dan gelen yeni talep webhook'u.
+    Talep kuyruga alinip hemen onaylanir; toplu yazim arka planda yapilir.
+    """
     if x_api_key != settings.yevveko_crm_api_key:
         raise HTTPException(status_code=401, detail="Gecersiz API key")
 
-    existing = await db.execute(
-        select(CRMLead).where(CRMLead.yevveko_talep_id == payload.talep_id)
-    )
-    if existing.scalar_one_or_none():
-        return {"ok": True, "message": "Talep zaten mevcut"}
-
-    talep_data = await fetch_single_talep(payload.talep_id)
-    if not talep_data:
-        raise HTTPException(status_code=404, detail="Talep evveko_db'de bulunamadi")
-
-    lead = _build_lead(talep_data)
-    db.add(lead)
-    await db.flush()
+    if intake_queue.submit(payload.talep_id):
+        return {"ok": True, "queued": True}
 
-    return {"ok": True, "lead_id": lead.id}
+    # Kuyruk doluysa talebi dogrudan isle
+    created = await intake_queue.process([payload.talep_id])
+    return {"ok": True, "queued": False, "created": created}
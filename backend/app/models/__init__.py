@@ -10,6 +10,17 @@ from app.models.revenue import CRMRevenueEvent, CRMRevenueRate
 from app.models.activity import CRMActivity
 from app.models.notification import CRMNotification
 from app.models.settings import CRMSetting, CRMCallScript
+from app.models.sync_run import CRMSyncRun
+from app.models.sync_state import CRMSyncState
+from app.models.outbox import CRMOutboxEvent
+from app.models.dedup import CRMLeadBlockKey, CRMDuplicateCluster, CRMDuplicateMember
+from app.models.funnel import CRMFunnelCounter
+from app.models.rollup import (
+    CRMOfficeDailyRollup,
+    CRMLeadHourlyRollup,
+    CRMCallHourlyRollup,
+    CRMAppointmentHourlyRollup,
+)
 
 __all__ = [
     "CRMUser", "CRMRole", "CRMUserRole",
@@ -24,4 +35,10 @@ __all__ = [
     "CRMActivity",
     "CRMNotification",
     "CRMSetting", "CRMCallScript",
+    "CRMSyncRun", "CRMSyncState",
+    "CRMOutboxEvent",
+    "CRMLeadBlockKey", "CRMDuplicateCluster", "CRMDuplicateMember",
+    "CRMFunnelCounter",
+    "CRMOfficeDailyRollup",
+    "CRMLeadHourlyRollup", "CRMCallHourlyRollup", "CRMAppointmentHourlyRollup",
 ]
@@ -1,7 +1,7 @@
 from datetime import date, datetime, time
 from typing import Optional
 
-from sqlalchemy import Date, DateTime, ForeignKey, Integer, String, Text, Time, func
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, String, Text, Time, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -10,6 +10,17 @@ from app.models.base import TimestampMixin
 
 class CRMAppointment(Base, TimestampMixin):
     __tablename__ = "crm_appointments"
+    __table_args__ = (
+        # Dashboard: gunun randevulari ve raporu beklenen tamamlanmis randevular
+        Index("ix_crm_appointments_scheduled_date", "scheduled_date"),
+        Index(
+            "ix_crm_appointments_tamamlandi",
+            "id",
+            postgresql_where=text("status = 'tamamlandi'"),
+        ),
+        # Saatlik ve ofis gunluk rollup'lar: watermark'tan sonra degisen randevular
+        Index("ix_crm_appointments_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     lead_id: Mapped[int] = mapped_column(
@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.database import Base
+
+
+class CRMLeadBlockKey(Base):
+    """Mukerrer tespiti icin lead basina blok anahtarlari (sadece ayni bloktakiler karsilastirilir)."""
+
+    __tablename__ = "crm_lead_block_keys"
+    __table_args__ = (
+        Index("ix_crm_lead_block_keys_block", "key_type", "key_value"),
+    )
+
+    lead_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("crm_leads.id", ondelete="CASCADE"), primary_key=True
+    )
+    # telefon / parsel / adres
+    key_type: Mapped[str] = mapped_column(String(20), primary_key=True)
+    key_value: Mapped[str] = mapped_column(String(300), nullable=False)
+
+
+class CRMDuplicateCluster(Base):
+    """Ayni talebi temsil ettigi dusunulen lead grubu."""
+
+    __tablename__ = "crm_duplicate_clusters"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Durum: acik / birlestirildi / yoksayildi
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="acik", index=True)
+    primary_lead_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("crm_leads.id", ondelete="SET NULL")
+    )
+    resolved_by: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("crm_users.id", ondelete="SET NULL")
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+    resolved_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    members = relationship(
+        "CRMDuplicateMember", back_populates="cluster", lazy="selectin",
+        cascade="all, delete-orphan",
+    )
+
+
+class CRMDuplicateMember(Base):
+    __tablename__ = "crm_duplicate_members"
+    __table_args__ = (
+        UniqueConstraint("cluster_id", "lead_id", name="uq_crm_duplicate_members_cluster_lead"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cluster_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("crm_duplicate_clusters.id", ondelete="CASCADE"), nullable=False
+    )
+    lead_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("crm_leads.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    # Gruptaki diger bir uyeyle en yuksek eslesme puani ve gerekceleri
+    score: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    reasons: Mapped[Optional[str]] = mapped_column(Text)
+
+    cluster = relationship("CRMDuplicateCluster", back_populates="members")
+    lead = relationship("CRMLead", lazy="selectin")
@@ -29,6 +29,8 @@ class FranchiseOffice(Base, TimestampMixin):
 
     # Bolge
     territory_ilceler: Mapped[dict] = mapped_column(JSONB, server_default="[]")
+    # Ayni anda tasiyabilecegi acik randevu sayisi (otomatik dagitimda kullanilir)
+    capacity: Mapped[int] = mapped_column(Integer, default=20, server_default="20")
 
     # Durum
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
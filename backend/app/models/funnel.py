@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class CRMFunnelCounter(Base):
+    """(ofis, durum) basina lead sayaci; durum gecisleriyle ayni transaction'da guncellenir."""
+
+    __tablename__ = "crm_funnel_counters"
+
+    # 0 = ofise atanmamis lead'ler (PK'da NULL olamaz)
+    office_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    status: Mapped[str] = mapped_column(String(30), primary_key=True)
+    lead_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
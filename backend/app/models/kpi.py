@@ -10,7 +10,12 @@ from app.database import Base
 class CRMKPISnapshot(Base):
     __tablename__ = "crm_kpi_snapshots"
     __table_args__ = (
-        UniqueConstraint("snapshot_date", "entity_type", "entity_id"),
+        # Merkez satirinda entity_id NULL; NULLS NOT DISTINCT ile o da tekil olur (PG 15+)
+        UniqueConstraint(
+            "snapshot_date", "entity_type", "entity_id",
+            name="uq_crm_kpi_snapshots_entity_day",
+            postgresql_nulls_not_distinct=True,
+        ),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -41,6 +46,9 @@ class CRMKPISnapshot(Base):
     # Finansal
     kazanilan_gelir: Mapped[Optional[float]] = mapped_column(Numeric(12, 2), default=0)
 
+    # Satiri hesaplayan KPI tanimlarinin surumu (kpi_engine.KPI_VERSION)
+    kpi_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
     )
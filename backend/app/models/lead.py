@@ -1,7 +1,9 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, Text, func
+from sqlalchemy import (
+    Boolean, Computed, DateTime, Float, ForeignKey, Index, Integer, String, Text, func, text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -10,6 +12,33 @@ from app.models.base import TimestampMixin
 
 class CRMLead(Base, TimestampMixin):
     __tablename__ = "crm_leads"
+    __table_args__ = (
+        # GET /leads keyset sayfalama: ORDER BY created_at DESC, id DESC
+        Index("ix_crm_leads_created_at_id", "created_at", "id"),
+        # Arama: katlanmis metin uzerinde trigram, telefon icin esitlik indeksi
+        Index(
+            "ix_crm_leads_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+        Index("ix_crm_leads_phone_digits", "customer_phone_digits"),
+        # Mukerrer kontrolu ve /leads/by-phone: ayni numara birden fazla lead'de olabilir
+        Index("ix_crm_leads_phone_e164", "customer_phone_e164"),
+        # Dashboard: SLA ihlali (aranmamis yeni talepler) ve aylik kapanis sayimlari
+        Index(
+            "ix_crm_leads_sla_open",
+            "ilk_arama_deadline",
+            postgresql_where=text("status = 'talep_geldi' AND ilk_arama_yapildi_at IS NULL"),
+        ),
+        Index(
+            "ix_crm_leads_closed_won",
+            "closed_at",
+            postgresql_where=text("status = 'kapanis_basarili'"),
+        ),
+        # Saatlik rollup'lar: watermark'tan sonra degisen lead'ler
+        Index("ix_crm_leads_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
@@ -17,11 +46,19 @@ class CRMLead(Base, TimestampMixin):
     yevveko_talep_id: Mapped[Optional[int]] = mapped_column(Integer, unique=True)
     source: Mapped[str] = mapped_column(String(50), nullable=False, default="yevveko")
     source_detail: Mapped[Optional[str]] = mapped_column(Text)
+    inceleme_durumu: Mapped[Optional[str]] = mapped_column(String(50))
 
     # Musteri bilgileri
     customer_name: Mapped[Optional[str]] = mapped_column(String(200))
     customer_phone: Mapped[Optional[str]] = mapped_column(String(20))
     customer_email: Mapped[Optional[str]] = mapped_column(String(255))
+    # normalize_phone ile +905XXXXXXXXX; taninmayan numaralarda bos
+    customer_phone_e164: Mapped[Optional[str]] = mapped_column(String(20))
+    # Telefonun son 10 rakami (ulusal numara); veritabani hesaplar
+    customer_phone_digits: Mapped[Optional[str]] = mapped_column(
+        String(10),
+        Computed("right(regexp_replace(customer_phone, '[^0-9]', '', 'g'), 10)", persisted=True),
+    )
 
     # Lokasyon
     il: Mapped[Optional[str]] = mapped_column(String(100))
@@ -47,9 +84,14 @@ class CRMLead(Base, TimestampMixin):
     niyet: Mapped[Optional[str]] = mapped_column(String(30))
     ek_notlar: Mapped[Optional[str]] = mapped_column(Text)
 
+    # Arama metni: isim, telefon, ilce, mahalle (Turkce karakter ve harf duyarsiz)
+    search_text: Mapped[Optional[str]] = mapped_column(Text)
+
     # Siniflandirma
     lead_sinif: Mapped[Optional[str]] = mapped_column(String(1))
     toplanti_uygunluk_skoru: Mapped[int] = mapped_column(Integer, default=0)
+    # otomatik: lead_scoring motoru, ajan: arama sonrasi elle verildi (motor ezmez)
+    skor_kaynagi: Mapped[Optional[str]] = mapped_column(String(20))
 
     # CRM Pipeline Durumu
     status: Mapped[str] = mapped_column(
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -10,6 +10,14 @@ from app.database import Base
 
 class CRMMeetingReport(Base):
     __tablename__ = "crm_meeting_reports"
+    __table_args__ = (
+        # Raporu olmayan randevular (anti-join) ve randevudan rapora erisim
+        Index("ix_crm_meeting_reports_appointment_id", "appointment_id"),
+        # Ofis rollup'lari: gun araligindaki raporlar
+        Index("ix_crm_meeting_reports_office_submitted", "franchise_office_id", "submitted_at"),
+        # Ofis rollup'lari: watermark'tan sonra degisen raporlar
+        Index("ix_crm_meeting_reports_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     appointment_id: Mapped[int] = mapped_column(
@@ -60,6 +68,9 @@ class CRMMeetingReport(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
 
     # Relationships
     appointment = relationship("CRMAppointment", back_populates="report")
@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class CRMOutboxEvent(Base):
+    """CRM -> Yevveko gonderilecek olaylar (transactional outbox)."""
+
+    __tablename__ = "crm_outbox_events"
+    __table_args__ = (
+        Index("ix_crm_outbox_events_due", "status", "next_attempt_at"),
+        Index("ix_crm_outbox_events_aggregate", "aggregate_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    lead_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("crm_leads.id", ondelete="SET NULL")
+    )
+    # Siralama anahtari: ayni talebin olaylari id sirasiyla gonderilir
+    aggregate_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+
+    # Durum: beklemede / gonderildi / olu (dead-letter)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="beklemede")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
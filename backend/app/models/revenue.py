@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, Numeric, String, Text, func
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, Numeric, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -9,6 +9,12 @@ from app.database import Base
 
 class CRMRevenueEvent(Base):
     __tablename__ = "crm_revenue_events"
+    __table_args__ = (
+        # Ofis rollup'lari: gun araligindaki hakedis olaylari
+        Index("ix_crm_revenue_events_office_created", "franchise_office_id", "created_at"),
+        # Ofis rollup'lari: watermark'tan sonra degisen (onay, iptal) olaylar
+        Index("ix_crm_revenue_events_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     franchise_office_id: Mapped[int] = mapped_column(
@@ -34,6 +40,9 @@ class CRMRevenueEvent(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
 
     # Relationships
     franchise_office = relationship("FranchiseOffice", lazy="selectin")
@@ -0,0 +1,101 @@
+from datetime import date, datetime
+
+from sqlalchemy import BigInteger, Date, DateTime, ForeignKey, Integer, Numeric, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class CRMOfficeDailyRollup(Base):
+    """
+    Ofis basina gunluk toplamlar. Sadece toplanabilir degerler tutulur (oranlar
+    ve ortalamalar okurken hesaplanir), boylece herhangi bir tarih araligi
+    satirlarin toplamidir.
+    """
+
+    __tablename__ = "crm_office_daily_rollups"
+
+    office_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("crm_franchise_offices.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    # Randevular (scheduled_date gunune yazilir)
+    randevu_toplam: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    randevu_tamamlandi: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    randevu_gelmedi: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # Toplanti raporlari (submitted_at gunune yazilir)
+    rapor_sayisi: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rapor_zamaninda: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    tamlik_toplam: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    teklif_sayisi: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # Memnuniyet aramalari (called_at gunune yazilir); her puan ayri sayilir, bos olabilir
+    genel_puan_sayisi: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    genel_puan_toplam: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    profesyonellik_sayisi: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    profesyonellik_toplam: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    bilgi_netlik_sayisi: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    bilgi_netlik_toplam: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # Hakedis (created_at gunune yazilir)
+    gelir_toplam: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class CRMLeadHourlyRollup(Base):
+    """Lead gelisleri: olusturulma saati ve (ilce, kaynak, guncel durum) basina."""
+
+    __tablename__ = "crm_lead_hourly_rollups"
+
+    bucket: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    ilce: Mapped[str] = mapped_column(String(100), primary_key=True)
+    source: Mapped[str] = mapped_column(String(50), primary_key=True)
+    status: Mapped[str] = mapped_column(String(30), primary_key=True)
+
+    lead_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Ilk arama gecikmesi: ortalama = first_call_seconds / first_call_count
+    first_call_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    first_call_seconds: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    sla_met_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class CRMCallHourlyRollup(Base):
+    """Aramalar: baslangic saati ve (arama tipi, sonuc kodu) basina."""
+
+    __tablename__ = "crm_call_hourly_rollups"
+
+    bucket: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    call_type: Mapped[str] = mapped_column(String(30), primary_key=True)
+    result_code: Mapped[str] = mapped_column(String(30), primary_key=True)
+
+    call_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    duration_seconds: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class CRMAppointmentHourlyRollup(Base):
+    """Randevular: olusturulma saati ve (ofis, guncel durum) basina."""
+
+    __tablename__ = "crm_appointment_hourly_rollups"
+
+    bucket: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    office_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    status: Mapped[str] = mapped_column(String(30), primary_key=True)
+
+    appointment_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -9,6 +9,12 @@ from app.database import Base
 
 class CRMSatisfactionCall(Base):
     __tablename__ = "crm_satisfaction_calls"
+    __table_args__ = (
+        # Ofis rollup'lari: gun araligindaki aramalar
+        Index("ix_crm_satisfaction_calls_called_at", "called_at"),
+        # Ofis rollup'lari: watermark'tan sonra degisen aramalar
+        Index("ix_crm_satisfaction_calls_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     lead_id: Mapped[int] = mapped_column(
@@ -33,6 +39,9 @@ class CRMSatisfactionCall(Base):
     called_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
 
     # Relationships
     lead = relationship("CRMLead", lazy="selectin")
@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class CRMSyncRun(Base):
+    __tablename__ = "crm_sync_runs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    source: Mapped[str] = mapped_column(String(50), nullable=False, default="yevveko")
+    mode: Mapped[str] = mapped_column(String(20), nullable=False)
+
+    # Durum: calisiyor / tamamlandi / hata
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="calisiyor")
+    error: Mapped[Optional[str]] = mapped_column(Text)
+
+    # Ilerleme (her commit edilen chunk'ta guncellenir)
+    start_talep_id: Mapped[int] = mapped_column(Integer, default=0)
+    last_talep_id: Mapped[int] = mapped_column(Integer, default=0)
+    target_talep_id: Mapped[int] = mapped_column(Integer, default=0)
+    total_estimate: Mapped[int] = mapped_column(Integer, default=0)
+    processed: Mapped[int] = mapped_column(Integer, default=0)
+    created: Mapped[int] = mapped_column(Integer, default=0)
+    skipped: Mapped[int] = mapped_column(Integer, default=0)
+    updated: Mapped[int] = mapped_column(Integer, default=0)
+    chunks: Mapped[int] = mapped_column(Integer, default=0)
+
+    started_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    @property
+    def percent(self) -> float:
+        if not self.total_estimate:
+            return 100.0 if self.status == "tamamlandi" else 0.0
+        return round(min(self.processed / self.total_estimate * 100, 100.0), 1)
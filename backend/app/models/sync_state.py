@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class CRMSyncState(Base):
+    """Kaynak basina kalici sync imleci (watermark)."""
+
+    __tablename__ = "crm_sync_state"
+
+    source: Mapped[str] = mapped_column(String(100), primary_key=True)
+
+    # Son gorulen kaynak id'si (yeni kayitlar) ve updated_at (degisen kayitlar)
+    last_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
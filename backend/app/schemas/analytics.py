@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class TimeseriesPoint(BaseModel):
+    t: datetime
+    group: Optional[str] = None
+    value: Optional[float] = None
+
+
+class TimeseriesResponse(BaseModel):
+    metric: str
+    granularity: str
+    start: datetime
+    end: datetime
+    group_by: Optional[str] = None
+    points: list[TimeseriesPoint] = []
@@ -16,9 +16,16 @@ class FranchiseDashboardStats(BaseModel):
     bekleyen_randevular: int = 0
     onay_bekleyen: int = 0
     teslim_edilecek_raporlar: int = 0
+    bu_ayki_randevu: int = 0
     bu_ayki_toplanti: int = 0
     bu_ayki_hakedis: float = 0.0
+    gelmedi_orani: float = 0.0
+    rapor_zamaninda_orani: float = 0.0
+    rapor_tamlik_ortalama: float = 0.0
+    toplantidan_teklif_orani: float = 0.0
     memnuniyet_ortalama: float = 0.0
+    memnuniyet_profesyonellik: float = 0.0
+    memnuniyet_bilgi_netlik: float = 0.0
 
 
 class FunnelData(BaseModel):
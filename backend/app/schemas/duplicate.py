@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+
+class DuplicateMergeRequest(BaseModel):
+    primary_lead_id: int
@@ -1,7 +1,7 @@
 from datetime import date, datetime
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 
 class FranchiseOfficeResponse(BaseModel):
@@ -16,6 +16,7 @@ class FranchiseOfficeResponse(BaseModel):
     phone: Optional[str] = None
     email: Optional[str] = None
     territory_ilceler: list = []
+    capacity: int = 20
     is_active: bool
     contract_start_date: Optional[date] = None
     contract_end_date: Optional[date] = None
@@ -37,6 +38,7 @@ class FranchiseOfficeCreateRequest(BaseModel):
     phone: Optional[str] = None
     email: Optional[EmailStr] = None
     territory_ilceler: list = []
+    capacity: int = Field(20, ge=0)
     contract_start_date: Optional[date] = None
     contract_end_date: Optional[date] = None
     manager_id: Optional[int] = None
@@ -50,6 +52,7 @@ class FranchiseOfficeUpdateRequest(BaseModel):
     phone: Optional[str] = None
     email: Optional[str] = None
     territory_ilceler: Optional[list] = None
+    capacity: Optional[int] = Field(None, ge=0)
     is_active: Optional[bool] = None
     contract_start_date: Optional[date] = None
     contract_end_date: Optional[date] = None
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class LeadResponse(BaseModel):
@@ -9,11 +9,15 @@ class LeadResponse(BaseModel):
     yevveko_talep_id: Optional[int] = None
     source: str
     source_detail: Optional[str] = None
+    inceleme_durumu: Optional[str] = None
 
     # Musteri
     customer_name: Optional[str] = None
     customer_phone: Optional[str] = None
     customer_email: Optional[str] = None
+    customer_phone_e164: Optional[str] = None
+    # Ayni telefon numarasina sahip diger lead'ler (olusturma/guncelleme yanitinda)
+    duplicate_lead_ids: list[int] = []
 
     # Lokasyon
     il: Optional[str] = None
@@ -42,6 +46,7 @@ class LeadResponse(BaseModel):
     # Siniflandirma
     lead_sinif: Optional[str] = None
     toplanti_uygunluk_skoru: int = 0
+    skor_kaynagi: Optional[str] = None
 
     # Durum
     status: str
@@ -112,3 +117,10 @@ class LeadStatusUpdate(BaseModel):
     status: str
     sub_status: Optional[str] = None
     note: Optional[str] = None
+
+
+class LeadRouteRequest(BaseModel):
+    # Bos ise atanmamis lead'ler (en eski once) yonlendirilir
+    lead_ids: Optional[list[int]] = None
+    limit: int = Field(1000, ge=1, le=10000)
+    dry_run: bool = True
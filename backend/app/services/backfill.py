@@ -0,0 +1,209 @@
+"""
+Gecmis talepler icin paralel, araliklara bolunmus backfill.
+
+Kaynak id uzayi esit araliklara bolunur; her aralik ayri bir surecte (kendi
+engine ve baglanti havuzuyla) chunk chunk islenir. Her chunk ile birlikte
+araligin checkpoint'i (crm_sync_state, "backfill:<alt>-<ust>") ayni
+transaction'da yazilir, yarida kalan bir backfill kaldigi yerden devam eder.
+Sonunda her aralik icin kaynak ve CRM satir sayilari karsilastirilir.
+
+Backfill sync cycle lock'u altinda calisir (bkz. sync_scheduler); boylece
+finish_backfill yevveko imlecini calisan bir sync'in altinda ilerletmez.
+
+Kullanim:
+    python -m app.services.backfill --workers 4 --ranges 16
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+
+from app.database import async_session, engine
+from app.models.lead import CRMLead
+from app.models.sync_state import CRMSyncState
+from app.services.lead_ingestion import get_sync_state, upsert_talepler
+from app.services.sync_scheduler import sync_cycle_lock
+from app.services.yevveko_db_sync import (
+    DEFAULT_CHUNK_SIZE,
+    count_talepler,
+    fetch_talep_id_range,
+    iter_talep_chunks,
+    yevveko_engine,
+)
+
+
+@dataclass
+class RangeResult:
+    low_id: int
+    high_id: int
+    processed: int = 0
+    created: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+
+def plan_ranges(min_id: int, max_id: int, parts: int) -> list[tuple[int, int]]:
+    """[min_id, max_id] araligini en fazla parts adet kapali araliga boler."""
+    if max_id < min_id or max_id == 0:
+        return []
+    span = max_id - min_id + 1
+    parts = max(1, min(parts, span))
+    step = -(-span // parts)  # yukari yuvarlanmis bolme
+
+    ranges = []
+    low = min_id
+    while low <= max_id:
+        high = min(low + step - 1, max_id)
+        ranges.append((low, high))
+        low = high + 1
+    return ranges
+
+
+def checkpoint_key(low_id: int, high_id: int) -> str:
+    return f"backfill:{low_id}-{high_id}"
+
+
+async def backfill_range(
+    low_id: int, high_id: int, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> RangeResult:
+    """Tek bir id araligini checkpoint'ten devam ederek isler."""
+    started = time.perf_counter()
+    result = RangeResult(low_id, high_id)
+    key = checkpoint_key(low_id, high_id)
+
+    async with async_session() as db:
+        state = await db.get(CRMSyncState, key)
+        if state is None:
+            state = CRMSyncState(source=key, last_id=low_id - 1)
+            db.add(state)
+            await db.commit()
+
+        if state.last_id < high_id:
+            async for chunk in iter_talep_chunks(
+                since_id=state.last_id, chunk_size=chunk_size, until_id=high_id
+            ):
+                ingest = await upsert_talepler(db, chunk)
+                result.processed += len(chunk)
+                result.created += ingest.created
+                result.skipped += ingest.skipped
+                # Checkpoint chunk ile ayni transaction'da ilerler
+                state.last_id = ingest.last_talep_id
+                await db.commit()
+
+            state.last_id = high_id
+            await db.commit()
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+async def reconcile(ranges: list[tuple[int, int]]) -> list[dict]:
+    """Her aralik icin kaynak ve CRM satir sayilarini karsilastirir."""
+    report = []
+    async with async_session() as db:
+        for low_id, high_id in ranges:
+            source_count = await count_talepler(low_id, high_id)
+            crm_count = (await db.execute(
+                select(func.count(CRMLead.id)).where(
+                    CRMLead.yevveko_talep_id.between(low_id, high_id)
+                )
+            )).scalar() or 0
+            report.append({
+                "low_id": low_id,
+                "high_id": high_id,
+                "source": source_count,
+                "crm": crm_count,
+                "missing": source_count - crm_count,
+            })
+    return report
+
+
+async def finish_backfill(max_id: int) -> None:
+    """Incremental sync'in backfill edilen araligi yeniden taramamasi icin imleci ilerletir."""
+    async with async_session() as db:
+        state = await get_sync_state(db)
+        state.last_id = max(state.last_id, max_id)
+        await db.commit()
+
+
+def _run_range_in_process(low_id: int, high_id: int, chunk_size: int) -> RangeResult:
+    # "spawn" ile baslatilan surec modulleri yeniden import eder; boylece CRM ve
+    # evveko_db engine'leri (ve havuzlari) bu surece ait olur.
+    return asyncio.run(backfill_range(low_id, high_id, chunk_size))
+
+
+async def _run_parallel(workers: int, parts: int, chunk_size: int) -> list[dict] | None:
+    async with sync_cycle_lock() as acquired:
+        if not acquired:
+            print("Baska bir surec su an sync yapiyor; backfill baslatilmadi")
+            return None
+
+        min_id, max_id = await fetch_talep_id_range()
+        ranges = plan_ranges(min_id, max_id, parts)
+        if not ranges:
+            print("Kaynak tabloda talep yok")
+            return []
+
+        print(f"{len(ranges)} aralik, {workers} surec (id {min_id}..{max_id})")
+        started = time.perf_counter()
+        total_processed = 0
+
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [
+                loop.run_in_executor(pool, _run_range_in_process, low, high, chunk_size)
+                for low, high in ranges
+            ]
+            for done, future in enumerate(asyncio.as_completed(futures), start=1):
+                r = await future
+                total_processed += r.processed
+                rate = r.processed / r.seconds if r.seconds else 0
+                print(
+                    f"[{done}/{len(ranges)}] {r.low_id}-{r.high_id}: "
+                    f"{r.created} eklendi, {r.skipped} mevcut ({rate:.0f} satir/sn)"
+                )
+
+        elapsed = time.perf_counter() - started
+        print(f"Toplam {total_processed} satir, {elapsed:.1f}sn ({total_processed / elapsed:.0f} satir/sn)")
+
+        await finish_backfill(max_id)
+
+    report = await reconcile(ranges)
+    for row in report:
+        if row["missing"]:
+            print(f"UYUMSUZ {row['low_id']}-{row['high_id']}: kaynak={row['source']} crm={row['crm']}")
+    print(f"Mutabakat: {sum(r['source'] for r in report)} kaynak, {sum(r['crm'] for r in report)} CRM")
+    return report
+
+
+def run_parallel_backfill(workers: int, parts: int, chunk_size: int) -> list[dict] | None:
+    """
+    Araliklari surec havuzunda isler. Ana surec sync cycle lock'unu (ozel)
+    bastan sona tutar; sync calisiyorsa backfill baslamaz ve None doner.
+    Alt surecler lock almaz, ana surecin lock'u altinda calisir.
+    """
+    async def _main():
+        try:
+            return await _run_parallel(workers, parts, chunk_size)
+        finally:
+            # Havuzlar bu loop'a bagli; ayni surecte tekrar cagrilabilsin diye kapatilir
+            await engine.dispose()
+            await yevveko_engine.dispose()
+
+    return asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yevveko talepleri paralel backfill")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--ranges", type=int, default=16)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    run_parallel_backfill(args.workers, args.ranges, args.chunk_size)
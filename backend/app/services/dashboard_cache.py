@@ -0,0 +1,209 @@
+"""
+Dashboard onbellegi (Redis).
+
+Dashboard yanitlari kapsam (scope) basina kisa TTL ile Redis'te tutulur:
+"merkez" ve "bayi:<office_id>". Anahtar kapsamin nesil (generation) sayacini
+icerir; yazma islemi nesli artirir, eski nesil anahtari TTL ile kendiliginden
+silinir. Boylece invalidation'dan once baslamis bir hesaplama sonucunu yeni
+nesle yazamaz.
+
+Invalidation transaction commit edildikten sonra yapilir: yazan kod
+mark_dirty(db, office_id) cagirir, kapsamlar session.info'da birikir ve
+after_commit'te nesiller artirilir (rollback'te atilir). Artirma loop'ta
+gorev olarak zamanlanir; loop'u istek disinda calismayan Celery gorevleri
+bitmeden flush() ile beklenir (app.tasks.runtime).
+
+Ayni anahtar icin es zamanli miss'ler tek hesaplamaya indirilir (single-flight):
+surec icinde ortak bir future, surecler arasinda Redis'te kisa omurlu bir kilit.
+Redis'e ulasilamazsa deger dogrudan hesaplanir; dashboard hata vermez.
+"""
+
+import asyncio
+import logging
+import secrets
+import time
+from typing import Awaitable, Callable, TypeVar
+
+import redis.asyncio as redis
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.utils.metrics import metrics
+
+logger = logging.getLogger("evvekocrm.dashboard_cache")
+
+settings = get_settings()
+
+M = TypeVar("M", bound=BaseModel)
+
+_DIRTY_KEY = "dashboard_dirty_scopes"
+
+# Kilidi alamayan surec, degerin yazilmasini bu araliklarla bekler
+_WAIT_POLL_SECONDS = 0.05
+
+# Kilidi yalnizca sahibi silsin (suresi dolup baskasina gecmis olabilir)
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def merkez_scope() -> str:
+    return "merkez"
+
+
+def office_scope(office_id: int) -> str:
+    return f"bayi:{office_id}"
+
+
+class DashboardCache:
+    def __init__(self):
+        self._client: redis.Redis | None = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._pending: set[asyncio.Task] = set()
+
+    @property
+    def client(self) -> redis.Redis:
+        # Baglanti havuzu event loop'a baglidir; Celery'de her gorev yeni loop acabilir
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = redis.from_url(settings.redis_url, decode_responses=True)
+            self._client_loop = loop
+        return self._client
+
+    async def get_or_compute(
+        self, scope: str, model: type[M], compute: Callable[[], Awaitable[M]]
+    ) -> M:
+        if not settings.dashboard_cache_enabled:
+            return await compute()
+
+        inflight = self._inflight.get(scope)
+        if inflight is not None:
+            metrics.incr("dashboard_cache.coalesced")
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Ortak hesaplama iptal olduysa kendimiz hesaplariz; biz iptal edildiysek cikariz
+                if not inflight.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[scope] = future
+        try:
+            value = await self._load(scope, model, compute)
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(scope) is future:
+                del self._inflight[scope]
+
+    async def _load(self, scope: str, model: type[M], compute: Callable[[], Awaitable[M]]) -> M:
+        try:
+            client = self.client
+            generation = await client.get(f"dashboard:gen:{scope}") or "0"
+            key = f"dashboard:{scope}:{generation}"
+            cached = await client.get(key)
+            if cached is not None:
+                metrics.incr("dashboard_cache.hit")
+                return model.model_validate_json(cached)
+
+            metrics.incr("dashboard_cache.miss")
+            lock_key = f"{key}:lock"
+            token = secrets.token_hex(8)
+            locked = await client.set(
+                lock_key, token, nx=True, px=int(settings.dashboard_cache_lock_seconds * 1000)
+            )
+            if not locked:
+                # Baska bir surec hesapliyor; sonucunu bekle
+                deadline = time.monotonic() + settings.dashboard_cache_lock_seconds
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(_WAIT_POLL_SECONDS)
+                    cached = await client.get(key)
+                    if cached is not None:
+                        metrics.incr("dashboard_cache.coalesced")
+                        return model.model_validate_json(cached)
+        except redis.RedisError as e:
+            metrics.incr("dashboard_cache.error")
+            logger.warning(f"Dashboard onbellegi okunamadi ({scope}): {e}")
+            return await self._compute(scope, compute)
+
+        try:
+            value = await self._compute(scope, compute)
+            await client.set(key, value.model_dump_json(), ex=settings.dashboard_cache_ttl_seconds)
+        except redis.RedisError as e:
+            metrics.incr("dashboard_cache.error")
+            logger.warning(f"Dashboard onbellegine yazilamadi ({scope}): {e}")
+        finally:
+            if locked:
+                try:
+                    await client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+                except redis.RedisError:
+                    pass  # kilit zaten suresi dolunca duser
+        return value
+
+    async def _compute(self, scope: str, compute: Callable[[], Awaitable[M]]) -> M:
+        started = time.perf_counter()
+        value = await compute()
+        kind = scope.split(":", 1)[0]
+        metrics.observe(f"dashboard_cache.recompute_seconds.{kind}", time.perf_counter() - started)
+        return value
+
+    async def invalidate(self, scopes: set[str]) -> None:
+        if not scopes:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for scope in sorted(scopes):
+                    pipe.incr(f"dashboard:gen:{scope}")
+                await pipe.execute()
+            metrics.incr("dashboard_cache.invalidated", len(scopes))
+        except redis.RedisError as e:
+            # Kacirilan invalidation en fazla TTL kadar eski veri demektir
+            metrics.incr("dashboard_cache.error")
+            logger.warning(f"Dashboard onbellegi gecersiz kilinamadi {sorted(scopes)}: {e}")
+
+    def schedule_invalidate(self, scopes: set[str]) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self.invalidate(scopes))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def flush(self) -> None:
+        """Zamanlanmis invalidation'lar bitene kadar bekler (loop'u gorevler arasinda duran Celery icin)."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+
+dashboard_cache = DashboardCache()
+
+
+def mark_dirty(db: AsyncSession, *office_ids: int | None) -> None:
+    """Commit sonrasi merkez ve verilen ofislerin dashboard onbellegini gecersiz kilar."""
+    scopes = db.info.setdefault(_DIRTY_KEY, set())
+    scopes.add(merkez_scope())
+    scopes.update(office_scope(o) for o in office_ids if o)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    scopes = session.info.pop(_DIRTY_KEY, None)
+    if scopes:
+        dashboard_cache.schedule_invalidate(scopes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,183 @@
+"""
+Dashboard istatistikleri.
+
+Merkez paneli tek bir statement ile (tek round trip) hesaplanir:
+- Toplam / bekleyen / toplantiya donusen lead sayilari huni sayaclarindan
+  (crm_funnel_counters, birkac satir) FILTER ile okunur. Sayaclar henuz
+  reconcile ile doldurulmadiysa ayni sayilar crm_leads'ten FILTER ile sayilir.
+- Bugun gelen, SLA ihlali ve aylik kapanis sayilari crm_leads uzerinde
+  yari acik zaman araliklariyla (created_at >= gun_basi AND < yarin) sayilir;
+  func.date()/extract() kullanilmaz, boylece indeksler kullanilabilir.
+- Raporu olmayan tamamlanmis randevular NOT EXISTS (anti-join) ile sayilir.
+
+Sure olcumu (ornegin 1M lead ile):
+    python -m app.services.dashboard_stats 20
+"""
+
+import asyncio
+import sys
+import time as _time
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import and_, exists, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models.appointment import CRMAppointment
+from app.models.funnel import CRMFunnelCounter
+from app.models.lead import CRMLead
+from app.models.meeting_report import CRMMeetingReport
+from app.schemas.dashboard import DashboardStats, FranchiseDashboardStats
+from app.services.funnel import counters_ready
+from app.services.office_rollups import kpi_values, office_totals
+
+TOPLANTI_STATUSES = ("toplanti_planlandi", "toplanti_yapildi", "teklif_asamasi", "kapanis_basarili")
+
+
+def _day_range(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def _month_range(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day.replace(day=1), time.min)
+    if start.month == 12:
+        return start, start.replace(year=start.year + 1, month=1)
+    return start, start.replace(month=start.month + 1)
+
+
+def _funnel_subquery(use_counters: bool):
+    if not use_counters:
+        return select(
+            func.count().label("toplam"),
+            func.count().filter(CRMLead.status == "talep_geldi").label("bekleyen"),
+            func.count().filter(CRMLead.status.in_(TOPLANTI_STATUSES)).label("toplanti"),
+        ).subquery()
+    return select(
+        func.coalesce(func.sum(CRMFunnelCounter.lead_count), 0).label("toplam"),
+        func.coalesce(
+            func.sum(CRMFunnelCounter.lead_count).filter(CRMFunnelCounter.status == "talep_geldi"), 0
+        ).label("bekleyen"),
+        func.coalesce(
+            func.sum(CRMFunnelCounter.lead_count).filter(CRMFunnelCounter.status.in_(TOPLANTI_STATUSES)), 0
+        ).label("toplanti"),
+    ).subquery()
+
+
+def merkez_stats_query(now: datetime, use_counters: bool = True):
+    """Merkez panelinin tum sayilarini tek satir olarak donduren statement."""
+    today = now.date()
+    day_start, day_end = _day_range(today)
+    month_start, month_end = _month_range(today)
+
+    funnel = _funnel_subquery(use_counters)
+
+    bugun = and_(CRMLead.created_at >= day_start, CRMLead.created_at < day_end)
+    sla = and_(
+        CRMLead.status == "talep_geldi",
+        CRMLead.ilk_arama_yapildi_at.is_(None),
+        CRMLead.ilk_arama_deadline < now,
+    )
+    aylik = and_(
+        CRMLead.status == "kapanis_basarili",
+        CRMLead.closed_at >= month_start,
+        CRMLead.closed_at < month_end,
+    )
+    # Her kosulun kendi indeksi var; OR ile sadece ilgili satirlar okunur (BitmapOr)
+    leads = (
+        select(
+            func.count().filter(bugun).label("bugun"),
+            func.count().filter(sla).label("sla"),
+            func.count().filter(aylik).label("aylik"),
+        )
+        .where(or_(bugun, sla, aylik))
+        .subquery()
+    )
+
+    randevular = (
+        select(func.count().label("randevular"))
+        .where(CRMAppointment.scheduled_date == today)
+        .subquery()
+    )
+    bekleyen_rapor = (
+        select(func.count().label("bekleyen_rapor"))
+        .where(
+            CRMAppointment.status == "tamamlandi",
+            ~exists().where(CRMMeetingReport.appointment_id == CRMAppointment.id),
+        )
+        .subquery()
+    )
+
+    return select(
+        funnel.c.toplam,
+        funnel.c.bekleyen,
+        funnel.c.toplanti,
+        leads.c.bugun,
+        leads.c.sla,
+        leads.c.aylik,
+        randevular.c.randevular,
+        bekleyen_rapor.c.bekleyen_rapor,
+    )
+
+
+async def compute_merkez_stats(db: AsyncSession) -> DashboardStats:
+    row = (await db.execute(merkez_stats_query(datetime.now(), await counters_ready(db)))).one()
+    total = int(row.toplam)
+    return DashboardStats(
+        toplam_lead=total,
+        bugunun_leadleri=row.bugun,
+        bekleyen_aramalar=int(row.bekleyen),
+        sla_ihlali=row.sla,
+        bugunun_randevulari=row.randevular,
+        bekleyen_raporlar=row.bekleyen_rapor,
+        toplantiya_donusum_orani=round(int(row.toplanti) / total * 100, 1) if total > 0 else 0.0,
+        aylik_kapanis=row.aylik,
+    )
+
+
+async def compute_bayi_stats(db: AsyncSession, office_id: int) -> FranchiseDashboardStats:
+    """Acik isler canli sayilir; aylik KPI'lar gunluk rollup'lar + bugunun canli verisidir."""
+    report_missing = (
+        select(func.count())
+        .where(
+            CRMAppointment.franchise_office_id == office_id,
+            CRMAppointment.status == "tamamlandi",
+            ~exists().where(CRMMeetingReport.appointment_id == CRMAppointment.id),
+        )
+        .scalar_subquery()
+    )
+    row = (await db.execute(
+        select(
+            func.count().filter(CRMAppointment.status.in_(["beklemede", "onaylandi"])).label("bekleyen"),
+            func.count().filter(CRMAppointment.status == "beklemede").label("onay"),
+            report_missing.label("rapor"),
+        ).where(CRMAppointment.franchise_office_id == office_id)
+    )).one()
+
+    month_start = date.today().replace(day=1)
+    totals = await office_totals(db, office_id, month_start)
+    return FranchiseDashboardStats(
+        bekleyen_randevular=row.bekleyen,
+        onay_bekleyen=row.onay,
+        teslim_edilecek_raporlar=row.rapor,
+        **kpi_values(totals),
+    )
+
+
+async def _benchmark(iterations: int) -> None:
+    async with async_session() as db:
+        await compute_merkez_stats(db)  # isinma
+        timings = []
+        for _ in range(iterations):
+            started = _time.perf_counter()
+            await compute_merkez_stats(db)
+            timings.append((_time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(
+        f"merkez dashboard: {iterations} calisma, "
+        f"p50={timings[len(timings) // 2]:.1f}ms, max={timings[-1]:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
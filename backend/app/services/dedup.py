@@ -0,0 +1,472 @@
+"""
+Mukerrer lead tespiti.
+
+Her lead icin blok anahtarlari uretilir:
+- telefon: customer_phone_e164
+- parsel:  ilce + ada + parsel
+- adres:   ilce + normalize sokak + kapi_no
+Aday ciftler sadece ayni anahtari paylasan lead'ler arasinda puanlanir; cok
+buyuk bloklar (ornegin ortak bir santral numarasi) atlanir. Boylece maliyet
+N^2 yerine blok boyutlarinin kareleri toplamiyla sinirli kalir.
+
+Esik ustu ciftler union-find ile gruplanip crm_duplicate_clusters'a yazilir.
+Yeni ve kaynakta degisen lead'ler ingestion sirasinda artimli olarak
+(detect_duplicates), tum tablo ise gece calisan batch gorevle
+(rebuild_duplicate_clusters) islenir.
+"""
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Iterable
+
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.database import async_session
+from app.models.activity import CRMActivity
+from app.models.dedup import CRMDuplicateCluster, CRMDuplicateMember, CRMLeadBlockKey
+from app.models.lead import CRMLead
+from app.services.lead_events import record_status_change
+from app.services.lead_search import refresh_search_fields
+from app.utils.search import fold_text
+
+# Bu puanin ustundeki ciftler ayni talep sayilir
+DUPLICATE_THRESHOLD = 0.6
+
+# Bundan buyuk bloklar ayirt edici degildir, karsilastirilmaz
+MAX_BLOCK_SIZE = 200
+
+# Ortak anahtar basina puan; ayni parsel tek basina yeterlidir, ayni telefon degil
+# (ayni kisi farkli binalar icin basvurabilir)
+KEY_WEIGHTS = {"parsel": 0.6, "adres": 0.5, "telefon": 0.4}
+NAME_WEIGHT = 0.2
+MAHALLE_WEIGHT = 0.1
+
+LOAD_CHUNK_SIZE = 5000
+KEY_INSERT_BATCH = 5000
+
+# Birlestirmede ana lead'de bos olan alanlar digerlerinden doldurulur
+MERGE_FILL_FIELDS = (
+    "customer_name", "customer_phone", "customer_email",
+    "mahalle", "sokak", "kapi_no", "ada", "parsel",
+    "bina_alani", "bagimsiz_bolum_sayisi", "bina_yasi", "donusum_tipi",
+)
+
+_LEAD_COLUMNS = (
+    CRMLead.id, CRMLead.customer_name, CRMLead.customer_phone_e164,
+    CRMLead.ilce, CRMLead.mahalle, CRMLead.sokak, CRMLead.kapi_no,
+    CRMLead.ada, CRMLead.parsel,
+)
+
+_STREET_WORDS = {
+    "sokak", "sokagi", "sok", "sk", "cadde", "caddesi", "cad", "cd",
+    "bulvar", "bulvari", "blv", "mahallesi", "mah", "mh", "no",
+}
+
+
+def _normalize_code(value) -> str:
+    """Ada/parsel/kapi no: '0012', '12 ', '12/A' -> '12', '12', '12a'."""
+    text = re.sub(r"[^0-9a-z]", "", fold_text(str(value)))
+    return text.lstrip("0") or text
+
+
+def normalize_street(sokak: str | None) -> str:
+    """'Gül Sk.' ve 'GUL SOKAGI' -> 'gul'."""
+    words = re.sub(r"[^0-9a-z]+", " ", fold_text(sokak)).split()
+    return " ".join(w for w in words if w not in _STREET_WORDS)
+
+
+@dataclass
+class LeadProfile:
+    id: int
+    keys: dict[str, str] = field(default_factory=dict)
+    name: str = ""
+    mahalle: str = ""
+
+
+def build_profile(lead) -> LeadProfile:
+    """Lead (ORM nesnesi veya satir) icin blok anahtarlarini ve karsilastirma alanlarini cikarir."""
+    keys = {}
+    ilce = fold_text(lead.ilce)
+    if lead.customer_phone_e164:
+        keys["telefon"] = lead.customer_phone_e164
+    if lead.ada and lead.parsel:
+        keys["parsel"] = f"{ilce}|{_normalize_code(lead.ada)}|{_normalize_code(lead.parsel)}"
+    street = normalize_street(lead.sokak)
+    if street and lead.kapi_no:
+        keys["adres"] = f"{ilce}|{street}|{_normalize_code(lead.kapi_no)}"
+    return LeadProfile(
+        id=lead.id,
+        keys=keys,
+        name=fold_text(lead.customer_name),
+        mahalle=fold_text(lead.mahalle),
+    )
+
+
+def score_pair(a: LeadProfile, b: LeadProfile) -> tuple[float, list[str]]:
+    """Iki lead'in ayni talep olma puani (0-1) ve eslesen alanlar."""
+    score = 0.0
+    reasons = []
+    for key_type, weight in KEY_WEIGHTS.items():
+        value = a.keys.get(key_type)
+        if value is not None and value == b.keys.get(key_type):
+            score += weight
+            reasons.append(key_type)
+    if not reasons:
+        return 0.0, reasons
+
+    if a.name and b.name:
+        ratio = SequenceMatcher(None, a.name, b.name).ratio()
+        score += NAME_WEIGHT * ratio
+        if ratio >= 0.8:
+            reasons.append("isim")
+    if a.mahalle and a.mahalle == b.mahalle:
+        score += MAHALLE_WEIGHT
+    return min(score, 1.0), reasons
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: dict[int, int] = {}
+
+    def find(self, x: int) -> int:
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+    def groups(self) -> list[set[int]]:
+        result = defaultdict(set)
+        for x in self.parent:
+            result[self.find(x)].add(x)
+        return list(result.values())
+
+
+Matches = dict[tuple[int, int], tuple[float, list[str]]]
+
+
+def _score_pairs(pairs: Iterable[tuple[int, int]], profiles: dict[int, LeadProfile]) -> Matches:
+    matches = {}
+    for a, b in pairs:
+        if a in profiles and b in profiles:
+            score, reasons = score_pair(profiles[a], profiles[b])
+            if score >= DUPLICATE_THRESHOLD:
+                matches[(a, b)] = (score, reasons)
+    return matches
+
+
+def _member_rows(cluster_id: int, members: set[int], matches: Matches) -> list[dict]:
+    """Her uye icin gruptaki en iyi eslesmesinin puani ve gerekcesi."""
+    best: dict[int, tuple[float, list[str]]] = {}
+    for (a, b), (score, reasons) in matches.items():
+        for lead_id in (a, b):
+            if lead_id in members and score > best.get(lead_id, (0.0, []))[0]:
+                best[lead_id] = (score, reasons)
+    return [
+        {
+            "cluster_id": cluster_id,
+            "lead_id": lead_id,
+            "score": round(best.get(lead_id, (0.0, []))[0], 3),
+            "reasons": ",".join(best.get(lead_id, (0.0, []))[1]),
+        }
+        for lead_id in sorted(members)
+    ]
+
+
+def candidate_pairs(blocks: Iterable[list[int]], lead_ids: Iterable[int]) -> set[tuple[int, int]]:
+    """
+    Ayni bloktaki lead ciftleri (kucuk id once); en az biri lead_ids'te olmali.
+    MAX_BLOCK_SIZE'i asan bloklar atlanir.
+    """
+    lead_ids = set(lead_ids)
+    pairs = set()
+    for members in blocks:
+        if len(members) > MAX_BLOCK_SIZE:
+            continue
+        for lead_id in members:
+            if lead_id in lead_ids:
+                pairs.update((min(lead_id, o), max(lead_id, o)) for o in members if o != lead_id)
+    return pairs
+
+
+def _active_leads():
+    # Birlestirilip kapatilmis lead'ler tekrar aday olmaz
+    return CRMLead.sub_status.is_distinct_from("mukerrer")
+
+
+async def _load_profiles(db: AsyncSession, lead_ids: Iterable[int]) -> dict[int, LeadProfile]:
+    ids = sorted(set(lead_ids))
+    profiles = {}
+    for i in range(0, len(ids), LOAD_CHUNK_SIZE):
+        result = await db.execute(
+            select(*_LEAD_COLUMNS).where(
+                CRMLead.id.in_(ids[i:i + LOAD_CHUNK_SIZE]), _active_leads()
+            )
+        )
+        for row in result.all():
+            profiles[row.id] = build_profile(row)
+    return profiles
+
+
+async def _store_keys(db: AsyncSession, profiles: Iterable[LeadProfile]) -> None:
+    profiles = list(profiles)
+    await db.execute(
+        delete(CRMLeadBlockKey).where(CRMLeadBlockKey.lead_id.in_([p.id for p in profiles]))
+    )
+    rows = [
+        {"lead_id": p.id, "key_type": key_type, "key_value": value}
+        for p in profiles
+        for key_type, value in p.keys.items()
+    ]
+    # asyncpg parametre siniri (32767) icin parcali yazilir
+    for i in range(0, len(rows), KEY_INSERT_BATCH):
+        await db.execute(insert(CRMLeadBlockKey).values(rows[i:i + KEY_INSERT_BATCH]))
+
+
+async def _attach_to_clusters(db: AsyncSession, matches: Matches) -> int:
+    """Eslesmeleri acik gruplara ekler; ayni bilesene dusen acik gruplari birlestirir."""
+    if not matches:
+        return 0
+
+    uf = _UnionFind()
+    for a, b in matches:
+        uf.union(a, b)
+    lead_ids = list(uf.parent)
+
+    result = await db.execute(
+        select(CRMDuplicateMember.lead_id, CRMDuplicateMember.cluster_id)
+        .join(CRMDuplicateCluster, CRMDuplicateCluster.id == CRMDuplicateMember.cluster_id)
+        .where(CRMDuplicateCluster.status == "acik", CRMDuplicateMember.lead_id.in_(lead_ids))
+    )
+    open_cluster_of = {row.lead_id: row.cluster_id for row in result.all()}
+
+    for members in uf.groups():
+        cluster_ids = sorted({open_cluster_of[i] for i in members if i in open_cluster_of})
+        if cluster_ids:
+            target, others = cluster_ids[0], cluster_ids[1:]
+            if others:
+                in_target = aliased(CRMDuplicateMember)
+                await db.execute(
+                    update(CRMDuplicateMember)
+                    .where(
+                        CRMDuplicateMember.cluster_id.in_(others),
+                        CRMDuplicateMember.lead_id.notin_(
+                            select(in_target.lead_id).where(in_target.cluster_id == target)
+                        ),
+                    )
+                    .values(cluster_id=target)
+                )
+                await db.execute(delete(CRMDuplicateCluster).where(CRMDuplicateCluster.id.in_(others)))
+        else:
+            cluster = CRMDuplicateCluster(status="acik", primary_lead_id=min(members))
+            db.add(cluster)
+            await db.flush()
+            target = cluster.id
+
+        stmt = insert(CRMDuplicateMember).values(_member_rows(target, members, matches))
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_crm_duplicate_members_cluster_lead",
+            set_={
+                "score": func.greatest(CRMDuplicateMember.score, stmt.excluded.score),
+                "reasons": stmt.excluded.reasons,
+            },
+        )
+        await db.execute(stmt)
+
+    return len(lead_ids)
+
+
+async def detect_duplicates(db: AsyncSession, lead_ids: list[int]) -> int:
+    """
+    Yeni/degisen lead'lerin anahtarlarini yazar ve sadece ayni bloktaki
+    lead'lerle karsilastirir. Commit cagirana aittir; gruplanan lead sayisini dondurur.
+    """
+    if not lead_ids:
+        return 0
+
+    profiles = await _load_profiles(db, lead_ids)
+    if not profiles:
+        return 0
+    await _store_keys(db, profiles.values())
+
+    wanted = {(t, v) for p in profiles.values() for t, v in p.keys.items()}
+    if not wanted:
+        return 0
+
+    result = await db.execute(
+        select(CRMLeadBlockKey.key_type, CRMLeadBlockKey.key_value, CRMLeadBlockKey.lead_id)
+        .where(tuple_(CRMLeadBlockKey.key_type, CRMLeadBlockKey.key_value).in_(list(wanted)))
+    )
+    blocks = defaultdict(list)
+    for row in result.all():
+        blocks[(row.key_type, row.key_value)].append(row.lead_id)
+
+    pairs = candidate_pairs(blocks.values(), profiles.keys())
+    missing = {i for pair in pairs for i in pair} - profiles.keys()
+    profiles.update(await _load_profiles(db, missing))
+    return await _attach_to_clusters(db, _score_pairs(pairs, profiles))
+
+
+async def rebuild_duplicate_clusters(chunk_size: int = LOAD_CHUNK_SIZE) -> dict:
+    """
+    Tum tablo icin anahtarlari yeniler ve acik gruplari bastan hesaplar.
+    Birlestirilmis/yoksayilmis gruplarla ayni (veya alt) kume tekrar acilmaz.
+    """
+    # 1) Blok anahtarlari (id sirasiyla, chunk basina commit)
+    indexed = 0
+    last_id = 0
+    while True:
+        async with async_session() as db:
+            result = await db.execute(
+                select(*_LEAD_COLUMNS)
+                .where(CRMLead.id > last_id, _active_leads())
+                .order_by(CRMLead.id)
+                .limit(chunk_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            await _store_keys(db, [build_profile(r) for r in rows])
+            await db.commit()
+        indexed += len(rows)
+        last_id = rows[-1].id
+
+    async with async_session() as db:
+        # 2) Aday ciftler: sadece ayni bloktakiler
+        pairs = set()
+        result = await db.stream(
+            select(func.array_agg(CRMLeadBlockKey.lead_id))
+            .group_by(CRMLeadBlockKey.key_type, CRMLeadBlockKey.key_value)
+            .having(func.count() > 1, func.count() <= MAX_BLOCK_SIZE)
+        )
+        async for (members,) in result:
+            members = sorted(members)
+            for i, a in enumerate(members):
+                pairs.update((a, b) for b in members[i + 1:])
+
+        # 3) Puanlama
+        profiles = await _load_profiles(db, {i for pair in pairs for i in pair})
+        matches = _score_pairs(pairs, profiles)
+
+        # 4) Acik gruplari yeniden yaz
+        result = await db.execute(
+            select(CRMDuplicateMember.cluster_id, CRMDuplicateMember.lead_id)
+            .join(CRMDuplicateCluster, CRMDuplicateCluster.id == CRMDuplicateMember.cluster_id)
+            .where(CRMDuplicateCluster.status != "acik")
+        )
+        resolved: dict[int, set[int]] = defaultdict(set)
+        for row in result.all():
+            resolved[row.cluster_id].add(row.lead_id)
+        resolved_by_lead: dict[int, list[set[int]]] = defaultdict(list)
+        for members in resolved.values():
+            for lead_id in members:
+                resolved_by_lead[lead_id].append(members)
+
+        await db.execute(delete(CRMDuplicateCluster).where(CRMDuplicateCluster.status == "acik"))
+
+        uf = _UnionFind()
+        for a, b in matches:
+            uf.union(a, b)
+
+        clusters = 0
+        for members in uf.groups():
+            if any(members <= s for s in resolved_by_lead.get(min(members), [])):
+                continue
+            cluster = CRMDuplicateCluster(status="acik", primary_lead_id=min(members))
+            db.add(cluster)
+            await db.flush()
+            await db.execute(insert(CRMDuplicateMember).values(_member_rows(cluster.id, members, matches)))
+            clusters += 1
+
+        await db.commit()
+
+    return {"leads": indexed, "pairs": len(pairs), "matches": len(matches), "clusters": clusters}
+
+
+async def merge_cluster(
+    db: AsyncSession, cluster: CRMDuplicateCluster, primary_lead_id: int, actor_id: int
+) -> CRMLead:
+    """
+    Gruptaki lead'leri ana lead'de birlestirir: bos alanlar digerlerinden
+    doldurulur, digerleri 'iptal / mukerrer' olarak kapatilir.
+    """
+    leads = {m.lead.id: m.lead for m in cluster.members if m.lead is not None}
+    primary = leads.pop(primary_lead_id)
+
+    for lead in sorted(leads.values(), key=lambda l: l.id):
+        for name in MERGE_FILL_FIELDS:
+            if getattr(primary, name) in (None, "") and getattr(lead, name) not in (None, ""):
+                setattr(primary, name, getattr(lead, name))
+
+        old_status = lead.status
+        lead.status = "iptal"
+        lead.sub_status = "mukerrer"
+        lead.closed_at = datetime.now()
+        db.add(CRMActivity(
+            lead_id=lead.id,
+            actor_id=actor_id,
+            activity_type="duplicate_merged",
+            title=f"Mukerrer: #{primary.id} ile birlestirildi",
+            extra_data={"primary_lead_id": primary.id, "cluster_id": cluster.id},
+        ))
+        await record_status_change(db, lead, old_status)
+
+    refresh_search_fields(primary)
+    db.add(CRMActivity(
+        lead_id=primary.id,
+        actor_id=actor_id,
+        activity_type="duplicate_merged",
+        title=f"{len(leads)} mukerrer lead birlestirildi",
+        extra_data={"merged_lead_ids": sorted(leads), "cluster_id": cluster.id},
+    ))
+
+    cluster.status = "birlestirildi"
+    cluster.primary_lead_id = primary.id
+    cluster.resolved_by = actor_id
+    cluster.resolved_at = datetime.now()
+
+    await db.flush()
+
+    # Kapatilan lead'ler artik aday degil; diger acik gruplardan da cikarilir
+    if leads:
+        merged_ids = list(leads)
+        await db.execute(delete(CRMLeadBlockKey).where(CRMLeadBlockKey.lead_id.in_(merged_ids)))
+        result = await db.execute(
+            delete(CRMDuplicateMember)
+            .where(
+                CRMDuplicateMember.lead_id.in_(merged_ids),
+                CRMDuplicateMember.cluster_id.in_(
+                    select(CRMDuplicateCluster.id).where(CRMDuplicateCluster.status == "acik")
+                ),
+            )
+            .returning(CRMDuplicateMember.cluster_id)
+        )
+        affected = set(result.scalars().all())
+        if affected:
+            # Tek uyesi kalan gruplar kapanir
+            still_grouped = (
+                select(CRMDuplicateMember.cluster_id)
+                .where(CRMDuplicateMember.cluster_id.in_(affected))
+                .group_by(CRMDuplicateMember.cluster_id)
+                .having(func.count() > 1)
+            )
+            await db.execute(
+                delete(CRMDuplicateCluster).where(
+                    CRMDuplicateCluster.id.in_(affected),
+                    CRMDuplicateCluster.id.notin_(still_grouped),
+                )
+            )
+
+    await detect_duplicates(db, [primary.id])
+    return primary
@@ -0,0 +1,159 @@
+"""
+Artimli huni (funnel) sayaclari.
+
+crm_funnel_counters (ofis, durum) basina lead sayisini tutar. Lead'in ofisi
+veya durumu degistiginde eski anahtar bir azaltilir, yenisi bir artirilir;
+bu, lead guncellemesiyle ayni transaction'da yapilir (lead_events uzerinden).
+Huni okumasi boylece crm_leads taramasi yerine birkac satirlik bir okumadir.
+
+Sayaclar tek bir satir kilidi uzerinden guncellenir; ayni (ofis, durum)
+anahtarina yazan transaction'lar commit'e kadar sirayla bekler. Deadlock
+olmamasi icin bir statement'taki anahtarlar her zaman sirali yazilir.
+
+Kaymayi (elle SQL, eski surum kod vb.) duzeltmek icin reconcile gece calisir;
+ilk kurulumda tabloyu doldurmak icin de kullanilir:
+    python -m app.services.funnel
+
+Sayaclar ancak reconcile en az bir kez commit edildikten sonra (crm_sync_state'te
+"funnel_counters" kaydi) kullanilir; o zamana kadar okumalar crm_leads'ten sayilir.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models.funnel import CRMFunnelCounter
+from app.models.lead import CRMLead
+from app.models.sync_state import CRMSyncState
+from app.services.dashboard_cache import mark_dirty
+
+logger = logging.getLogger("evvekocrm.funnel")
+
+# Atanmamis lead'lerin sayac anahtari
+UNASSIGNED = 0
+
+# Sayaclarin en az bir kez crm_leads'ten dolduruldugunu gosteren kayit
+READY_STATE_SOURCE = "funnel_counters"
+
+# Sayaclar bir kez dolduktan sonra surec icinde tekrar sorgulanmaz
+_counters_ready = False
+
+
+def counter_key(office_id: int | None, status: str) -> tuple[int, str]:
+    return (office_id or UNASSIGNED, status)
+
+
+async def apply_deltas(db: AsyncSession, deltas: Counter) -> None:
+    """{(office_id, status): degisim} sayaclara eklenir. Commit cagirana aittir."""
+    values = [
+        {"office_id": office_id, "status": status, "lead_count": delta}
+        for (office_id, status), delta in sorted(deltas.items())
+        if delta
+    ]
+    if not values:
+        return
+    mark_dirty(db, *{v["office_id"] for v in values if v["office_id"] != UNASSIGNED})
+
+    stmt = insert(CRMFunnelCounter).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CRMFunnelCounter.office_id, CRMFunnelCounter.status],
+        set_={
+            "lead_count": CRMFunnelCounter.lead_count + stmt.excluded.lead_count,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def record_transition(
+    db: AsyncSession,
+    old_office_id: int | None,
+    old_status: str | None,
+    new_office_id: int | None,
+    new_status: str,
+) -> None:
+    """Tek lead'in (ofis, durum) gecisi; old_status None ise yeni lead'dir."""
+    deltas = Counter()
+    if old_status is not None:
+        deltas[counter_key(old_office_id, old_status)] -= 1
+    deltas[counter_key(new_office_id, new_status)] += 1
+    await apply_deltas(db, deltas)
+
+
+async def counters_ready(db: AsyncSession) -> bool:
+    """Sayaclar reconcile ile doldurulduysa True; doldurulmadiysa okumalar crm_leads'e duser."""
+    global _counters_ready
+    if not _counters_ready:
+        _counters_ready = await db.get(CRMSyncState, READY_STATE_SOURCE) is not None
+    return _counters_ready
+
+
+async def read_funnel(db: AsyncSession, office_id: int | None = None) -> dict[str, int]:
+    """Durum basina lead sayisi; office_id verilirse sadece o ofisin lead'leri."""
+    if await counters_ready(db):
+        query = select(CRMFunnelCounter.status, func.sum(CRMFunnelCounter.lead_count))
+        if office_id is not None:
+            query = query.where(CRMFunnelCounter.office_id == office_id)
+        query = query.group_by(CRMFunnelCounter.status)
+    else:
+        query = select(CRMLead.status, func.count())
+        if office_id is not None:
+            query = query.where(CRMLead.assigned_franchise_id == office_id)
+        query = query.group_by(CRMLead.status)
+    result = await db.execute(query)
+    return {status: int(count) for status, count in result.all()}
+
+
+def lead_counts_query():
+    """crm_leads'ten (ofis, durum) basina gercek lead sayilari."""
+    # Ayni ifade nesnesi SELECT ve GROUP BY'da ayni parametreyle derlenir
+    office = func.coalesce(CRMLead.assigned_franchise_id, UNASSIGNED)
+    return select(office, CRMLead.status, func.count()).group_by(office, CRMLead.status)
+
+
+async def reconcile_funnel_counters() -> dict:
+    """
+    Sayaclari crm_leads'ten yeniden sayar ve farklari duzeltir.
+
+    Tablo EXCLUSIVE modda kilitlenir: devam eden gecisler bitene kadar
+    beklenir, yeni gecisler de sayim commit edilene kadar bekler. Sayimdan
+    sonra gelen gecisler duzeltilmis sayacin uzerine eklenir.
+    """
+    async with async_session() as db:
+        await db.execute(text("LOCK TABLE crm_funnel_counters IN EXCLUSIVE MODE"))
+
+        result = await db.execute(lead_counts_query())
+        actual = {(office_id, status): count for office_id, status, count in result.all()}
+
+        result = await db.execute(
+            select(CRMFunnelCounter.office_id, CRMFunnelCounter.status, CRMFunnelCounter.lead_count)
+        )
+        stored = {(office_id, status): count for office_id, status, count in result.all()}
+
+        deltas = Counter({
+            key: actual.get(key, 0) - stored.get(key, 0)
+            for key in actual.keys() | stored.keys()
+        })
+        await apply_deltas(db, deltas)
+
+        # Sayaclar artik crm_leads ile uyumlu; okumalar sayaclara gecebilir
+        stmt = insert(CRMSyncState).values(source=READY_STATE_SOURCE, last_id=0, last_updated_at=func.now())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CRMSyncState.source], set_={"last_updated_at": func.now()}
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+    drift = {f"{office_id}:{status}": d for (office_id, status), d in sorted(deltas.items()) if d}
+    if drift and stored:
+        logger.warning(f"Huni sayaclarinda kayma duzeltildi: {drift}")
+    return {"keys": len(actual), "corrected": len(drift), "drift": drift}
+
+
+if __name__ == "__main__":
+    print(asyncio.run(reconcile_funnel_counters()))
@@ -0,0 +1,127 @@
+"""
+KPI snapshot'larinin tarih araligi icin paralel yeniden hesaplanmasi.
+
+Aralik ardisik gunlerden olusan parcalara bolunur; her parca ayri bir surecte
+(kendi engine ve baglanti havuzuyla) kpi_engine ile sabit sayida sorguyla
+hesaplanip tek transaction'da yazilir. Es zamanli surec sayisi (--workers)
+ayni zamanda ana veritabanina acilan baglanti sayisinin ust sinirdir.
+
+Devam etme: bir gun, merkez satiri guncel KPI_VERSION ile yazilmissa bitmis
+sayilir (merkez satiri ofis satirlariyla ayni transaction'da yazilir). Yarida
+kalan bir backfill ayni komutla tekrar calistirilinca sadece eksik ya da eski
+surumlu gunler hesaplanir; --force tum araligi yeniden yazar.
+
+Kullanim (son iki yil):
+    python -m app.services.kpi_backfill 2024-10-01 2026-10-01 --workers 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from app.database import async_session
+from app.models.kpi import CRMKPISnapshot
+from app.services.kpi_engine import KPI_VERSION, compute_kpi_rows
+from app.services.kpi_snapshot import upsert_snapshots
+from app.services.office_rollups import day_ranges
+
+DEFAULT_CHUNK_DAYS = 7
+
+
+def plan_chunks(days: list[date], chunk_days: int) -> list[tuple[date, date]]:
+    """Sirali gunleri en fazla chunk_days uzunlugunda ardisik [start, end) parcalarina boler."""
+    return day_ranges(days, chunk_days)
+
+
+async def pending_days(start: date, end: date, force: bool = False) -> list[date]:
+    """[start, end) icinde guncel surumle hesaplanmamis gunler."""
+    days = [start + timedelta(days=i) for i in range((end - start).days)]
+    if force:
+        return days
+    async with async_session() as db:
+        result = await db.execute(
+            select(CRMKPISnapshot.snapshot_date).where(
+                CRMKPISnapshot.entity_type == "merkez",
+                CRMKPISnapshot.snapshot_date >= start,
+                CRMKPISnapshot.snapshot_date < end,
+                CRMKPISnapshot.kpi_version >= KPI_VERSION,
+            )
+        )
+        done = set(result.scalars())
+    return [d for d in days if d not in done]
+
+
+async def backfill_chunk(start: date, end: date) -> tuple[int, float]:
+    """Tek parcayi hesaplayip yazar; (satir sayisi, sure) dondurur."""
+    started = time.perf_counter()
+    async with async_session() as db:
+        rows = await compute_kpi_rows(db, start, end)
+        await upsert_snapshots(db, rows)
+        await db.commit()
+    return len(rows), time.perf_counter() - started
+
+
+def _run_chunk_in_process(start: date, end: date) -> tuple[int, float]:
+    # "spawn" ile baslatilan surec app.database'i yeniden import eder; engine bu surece aittir
+    return asyncio.run(backfill_chunk(start, end))
+
+
+def run_kpi_backfill(start: date, end: date, workers: int, chunk_days: int, force: bool = False) -> bool:
+    days = asyncio.run(pending_days(start, end, force))
+    total_days = (end - start).days
+    if not days:
+        print(f"{start}..{end}: tum gunler guncel (KPI_VERSION={KPI_VERSION})")
+        return True
+
+    chunks = plan_chunks(days, chunk_days)
+    print(
+        f"{len(days)}/{total_days} gun hesaplanacak, {len(chunks)} parca, "
+        f"{workers} surec (KPI_VERSION={KPI_VERSION})"
+    )
+    started = time.perf_counter()
+    done_days = 0
+    failed = []
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(_run_chunk_in_process, s, e): (s, e) for s, e in chunks}
+        for done, future in enumerate(as_completed(futures), start=1):
+            chunk_start, chunk_end = futures[future]
+            try:
+                rows, seconds = future.result()
+            except Exception as e:
+                failed.append((chunk_start, chunk_end))
+                print(f"[{done}/{len(chunks)}] {chunk_start}..{chunk_end} HATA: {e}")
+                continue
+
+            done_days += (chunk_end - chunk_start).days
+            elapsed = time.perf_counter() - started
+            remaining = elapsed / done_days * (len(days) - done_days)
+            print(
+                f"[{done}/{len(chunks)}] {chunk_start}..{chunk_end}: {rows} satir, "
+                f"{seconds:.1f}sn (gun {done_days}/{len(days)}, kalan ~{remaining:.0f}sn)"
+            )
+
+    print(f"Toplam {done_days} gun, {time.perf_counter() - started:.1f}sn")
+    if failed:
+        print(f"{len(failed)} parca basarisiz; ayni komutla tekrar calistirinca kaldigi yerden devam eder")
+    return not failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="KPI snapshot'larini tarih araligi icin yeniden hesaplar")
+    parser.add_argument("start", type=date.fromisoformat, help="ilk gun (dahil), YYYY-MM-DD")
+    parser.add_argument("end", type=date.fromisoformat, help="son gun (haric), YYYY-MM-DD")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-days", type=int, default=DEFAULT_CHUNK_DAYS)
+    parser.add_argument("--force", action="store_true", help="guncel surumlu gunleri de yeniden yaz")
+    args = parser.parse_args()
+
+    ok = run_kpi_backfill(args.start, args.end, args.workers, args.chunk_days, args.force)
+    sys.exit(0 if ok else 1)
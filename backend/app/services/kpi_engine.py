@@ -0,0 +1,149 @@
+"""
+KPI motoru: crm_kpi_snapshots satirlarinin tum kolonlari.
+
+Bir tarih araligi icin ofis ve gun sayisindan bagimsiz sabit sayida sorgu
+calisir: lead kohortu icin bir, ofis metrik aileleri icin office_rollups'in
+gruplu sorgulari (randevu, rapor, memnuniyet, gelir) ve ofis listesi. Satirlar
+saf bir fonksiyonla (build_snapshot_rows) bu toplamlardan kurulur.
+
+Tanimlar:
+- Lead metrikleri o gun olusturulan lead kohortu uzerindendir (ofis satirinda
+  ofise atanmis lead'ler); donusum ve sahte/bos kohortun guncel durumundan sayilir.
+- Randevu metrikleri o gune planlanan randevulardir; rapor, memnuniyet ve gelir
+  o gun gonderilen / yapilan / olusan kayitlardir.
+- Merkez satiri tum ofislerin toplamidir (lead'lerde atanmamislar dahil).
+- Oranlar paydasi sifirsa 0, ortalamalar orneklem yoksa NULL yazilir.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, fields
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.franchise import FranchiseOffice
+from app.models.lead import CRMLead
+from app.services.dashboard_stats import TOPLANTI_STATUSES
+from app.services.office_rollups import OfficeTotals, compute_daily_totals
+
+SAHTE_BOS_STATUS = "sahte_bos"
+
+# Tanimlar degistiginde artirilir; backfill eski surumlu gunleri yeniden hesaplar
+KPI_VERSION = 1
+
+
+@dataclass
+class LeadTotals:
+    toplam_lead: int = 0
+    sla_icinde_arama: int = 0
+    toplantiya_donusum: int = 0
+    sahte_bos_lead: int = 0
+
+    def add(self, other: "LeadTotals") -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+def _rate(part, whole) -> float:
+    return round(part / whole * 100, 2) if whole else 0
+
+
+def _mean(total, count) -> float | None:
+    return round(total / count, 2) if count else None
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def _days(start: date, end: date) -> list[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days)]
+
+
+def snapshot_row(day: date, entity_type: str, entity_id: int | None, leads: LeadTotals, t: OfficeTotals) -> dict:
+    """Tek entity/gun icin snapshot kolonlari."""
+    return {
+        "snapshot_date": day,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "toplam_lead": leads.toplam_lead,
+        "sla_icinde_arama": leads.sla_icinde_arama,
+        "sla_uyum_orani": _rate(leads.sla_icinde_arama, leads.toplam_lead),
+        "toplantiya_donusum": leads.toplantiya_donusum,
+        "toplantiya_donusum_orani": _rate(leads.toplantiya_donusum, leads.toplam_lead),
+        "sahte_bos_lead": leads.sahte_bos_lead,
+        "sahte_bos_orani": _rate(leads.sahte_bos_lead, leads.toplam_lead),
+        "randevu_toplam": t.randevu_toplam,
+        "randevu_katilim": t.randevu_tamamlandi,
+        "gelmedi_sayisi": t.randevu_gelmedi,
+        "gelmedi_orani": _rate(t.randevu_gelmedi, t.randevu_toplam),
+        "rapor_zamaninda": t.rapor_zamaninda,
+        "rapor_tamlik_ortalama": _mean(t.tamlik_toplam, t.rapor_sayisi),
+        "toplantidan_teklif": t.teklif_sayisi,
+        "toplantidan_teklif_orani": _rate(t.teklif_sayisi, t.rapor_sayisi),
+        "memnuniyet_ortalama": _mean(t.genel_puan_toplam, t.genel_puan_sayisi),
+        "kazanilan_gelir": t.gelir_toplam,
+        "kpi_version": KPI_VERSION,
+    }
+
+
+def build_snapshot_rows(
+    days: list[date],
+    office_ids: list[int],
+    leads: dict[tuple[int | None, date], LeadTotals],
+    totals: dict[tuple[int, date], OfficeTotals],
+) -> list[dict]:
+    """
+    Her gun icin bir merkez satiri ve her ofis icin bir satir. leads anahtari
+    (atanan ofis ya da None, gun); totals anahtari (ofis, gun). Verisi olmayan
+    ofisler sifir satiriyla yer alir.
+    """
+    merkez_leads: dict[date, LeadTotals] = defaultdict(LeadTotals)
+    for (_, day), counts in leads.items():
+        merkez_leads[day].add(counts)
+    merkez_totals: dict[date, OfficeTotals] = defaultdict(OfficeTotals)
+    for (_, day), t in totals.items():
+        merkez_totals[day].add(t.as_dict())
+
+    rows = []
+    for day in days:
+        rows.append(snapshot_row(day, "merkez", None, merkez_leads[day], merkez_totals[day]))
+        for office_id in office_ids:
+            rows.append(snapshot_row(
+                day,
+                "franchise",
+                office_id,
+                leads.get((office_id, day), LeadTotals()),
+                totals.get((office_id, day), OfficeTotals()),
+            ))
+    return rows
+
+
+async def compute_lead_totals(db: AsyncSession, start: date, end: date) -> dict[tuple[int | None, date], LeadTotals]:
+    """[start, end) araliginda olusturulan lead'ler, (atanan ofis, gun) bazinda."""
+    day = func.date(CRMLead.created_at)
+    result = await db.execute(
+        select(
+            CRMLead.assigned_franchise_id,
+            day,
+            func.count(),
+            func.count().filter(CRMLead.ilk_arama_yapildi_at <= CRMLead.ilk_arama_deadline),
+            func.count().filter(CRMLead.status.in_(TOPLANTI_STATUSES)),
+            func.count().filter(CRMLead.status == SAHTE_BOS_STATUS),
+        )
+        .where(CRMLead.created_at >= _day_start(start), CRMLead.created_at < _day_start(end))
+        .group_by(CRMLead.assigned_franchise_id, day)
+    )
+    return {
+        (office_id, d): LeadTotals(toplam, sla, toplanti, sahte)
+        for office_id, d, toplam, sla, toplanti, sahte in result.all()
+    }
+
+
+async def compute_kpi_rows(db: AsyncSession, start: date, end: date) -> list[dict]:
+    """[start, end) gunleri icin tum snapshot satirlari (sabit sayida sorgu)."""
+    office_ids = list((await db.execute(select(FranchiseOffice.id).order_by(FranchiseOffice.id))).scalars())
+    leads = await compute_lead_totals(db, start, end)
+    totals = await compute_daily_totals(db, start, end)
+    return build_snapshot_rows(_days(start, end), office_ids, leads, totals)
@@ -0,0 +1,53 @@
+"""
+Gunluk KPI snapshot'i (crm_kpi_snapshots).
+
+Satirlar kpi_engine ile ofis sayisindan bagimsiz sabit sayida gruplu sorguyla
+hesaplanir ve INSERT ... ON CONFLICT DO UPDATE ile yazilir; ayni gun icin
+tekrar calistirmak satirlari gunceller, hata vermez.
+
+Gecmis bir gunu elle yeniden hesaplamak icin:
+    python -m app.services.kpi_snapshot 2026-10-01
+"""
+
+import asyncio
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models.kpi import CRMKPISnapshot
+from app.services.kpi_engine import compute_kpi_rows
+
+_KEY_COLUMNS = ("snapshot_date", "entity_type", "entity_id")
+
+# Tek INSERT'te yazilan satir (asyncpg parametre siniri: ~20 kolon x 1000)
+UPSERT_BATCH = 1000
+
+
+async def upsert_snapshots(db: AsyncSession, rows: list[dict]) -> None:
+    """Satirlari (gun, tip, entity) anahtarina gore ekler ya da gunceller. Commit cagirana aittir."""
+    for i in range(0, len(rows), UPSERT_BATCH):
+        batch = rows[i:i + UPSERT_BATCH]
+        stmt = insert(CRMKPISnapshot).values(batch)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_crm_kpi_snapshots_entity_day",
+            set_={c: stmt.excluded[c] for c in batch[0] if c not in _KEY_COLUMNS},
+        )
+        await db.execute(stmt)
+
+
+async def take_daily_snapshot(day: date | None = None) -> dict:
+    """day (varsayilan dun) icin snapshot'i hesaplayip yazar; tekrar calistirmak guvenlidir."""
+    day = day or date.today() - timedelta(days=1)
+    async with async_session() as db:
+        rows = await compute_kpi_rows(db, day, day + timedelta(days=1))
+        await upsert_snapshots(db, rows)
+        await db.commit()
+    return {"day": day.isoformat(), "rows": len(rows)}
+
+
+if __name__ == "__main__":
+    target = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+    print(asyncio.run(take_daily_snapshot(target)))
@@ -0,0 +1,46 @@
+"""
+Lead durum degisikliklerinin yan etkileri.
+
+Durumu degistiren her endpoint record_status_change() cagirir; yan etkiler
+(ornegin Yevveko'ya geri bildirim icin outbox kaydi, huni sayaclari) ayni
+transaction'a yazilir, boylece lead guncellemesi ile birlikte commit ya da
+rollback olur.
+"""
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.lead import CRMLead
+from app.models.outbox import CRMOutboxEvent
+from app.services.funnel import record_transition
+
+
+async def record_status_change(db: AsyncSession, lead: CRMLead, old_status: str | None) -> None:
+    """
+    Lead'in durumu old_status'tan veya ofisi degistiyse yan etkileri ekler.
+    Flush'tan once cagrilmalidir: eski ofis attribute gecmisinden okunur.
+    """
+    history = inspect(lead).attrs.assigned_franchise_id.history
+    old_office_id = history.deleted[0] if history.deleted else lead.assigned_franchise_id
+
+    if (old_office_id, old_status) != (lead.assigned_franchise_id, lead.status):
+        await record_transition(db, old_office_id, old_status, lead.assigned_franchise_id, lead.status)
+
+    if lead.status == old_status:
+        return
+
+    # Sadece Yevveko'dan gelen talepler geri bildirilir
+    if lead.yevveko_talep_id:
+        db.add(CRMOutboxEvent(
+            lead_id=lead.id,
+            aggregate_id=lead.yevveko_talep_id,
+            event_type="talep_durum",
+            payload={"durum": lead.status, "onceki_durum": old_status},
+            status="beklemede",
+            attempts=0,
+        ))
+
+
+async def record_lead_created(db: AsyncSession, lead: CRMLead) -> None:
+    """Elle olusturulan lead'i huni sayaclarina ekler (flush'tan sonra)."""
+    await record_transition(db, None, None, lead.assigned_franchise_id, lead.status)
@@ -0,0 +1,397 @@
+"""
+Yevveko taleplerini CRM'e toplu (set-based) aktaran ingestion motoru.
+Her talep icin ayri SELECT + INSERT yapmak yerine batch'ler tek bir
+INSERT ... ON CONFLICT (yevveko_talep_id) ... RETURNING ile yazilir.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import async_session
+from app.models.lead import CRMLead
+from app.models.sync_run import CRMSyncRun
+from app.models.sync_state import CRMSyncState
+from app.services.dedup import detect_duplicates
+from app.services.funnel import apply_deltas, counter_key
+from app.services.lead_routing import route_rows
+from app.services.lead_scoring import score_leads
+from app.services.yevveko_db_sync import (
+    DEFAULT_CHUNK_SIZE,
+    fetch_max_updated_at,
+    fetch_talep_bounds,
+    iter_talep_chunks,
+    iter_updated_talep_chunks,
+)
+from app.utils.phone import to_e164
+from app.utils.search import build_search_text
+
+settings = get_settings()
+
+# crm_sync_state'teki kaynak anahtari
+SYNC_SOURCE = "yevveko"
+
+# Ayni anda commit edilen kaynak transaction'lari icin updated_at geri bakis payi
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+# SLA suresi (dakika)
+SLA_MINUTES = 30
+
+# asyncpg tek sorguda en fazla 32767 parametre kabul eder (~22 kolon x 1000 satir)
+DEFAULT_BATCH_SIZE = 1000
+
+# Yevveko tarafinda sahiplenilen kolonlar (ON CONFLICT DO UPDATE ile guncellenir)
+SOURCE_COLUMNS = (
+    "customer_name",
+    "customer_phone",
+    "customer_email",
+    "ilce",
+    "mahalle",
+    "sokak",
+    "kapi_no",
+    "ada",
+    "parsel",
+    "bina_alani",
+    "bagimsiz_bolum_sayisi",
+    "donusum_tipi",
+    "inceleme_durumu",
+)
+
+# Kaynak kolonlardan turetilen kolonlar; kaynak degistiginde birlikte yazilir
+DERIVED_COLUMNS = ("customer_phone_e164", "search_text")
+
+
+@dataclass
+class IngestResult:
+    created: int = 0
+    skipped: int = 0
+    updated: int = 0
+    last_talep_id: int = 0
+    created_lead_ids: list[int] = field(default_factory=list)
+    updated_lead_ids: list[int] = field(default_factory=list)
+
+    def merge(self, other: "IngestResult") -> None:
+        self.created += other.created
+        self.skipped += other.skipped
+        self.updated += other.updated
+        self.last_talep_id = max(self.last_talep_id, other.last_talep_id)
+        self.created_lead_ids.extend(other.created_lead_ids)
+        self.updated_lead_ids.extend(other.updated_lead_ids)
+
+
+def build_lead_values(talep: dict) -> dict:
+    """Talep verisinden crm_leads satir degerlerini olusturur."""
+    # Deadline: talebin orijinal olusturulma tarihi + SLA suresi
+    created_at = talep.get("created_at")
+    if isinstance(created_at, datetime):
+        deadline = created_at + timedelta(minutes=SLA_MINUTES)
+    else:
+        deadline = datetime.now() + timedelta(minutes=SLA_MINUTES)
+
+    return {
+        "yevveko_talep_id": talep["talep_id"],
+        "source": "yevveko",
+        "customer_name": talep.get("customer_name"),
+        "customer_phone": talep.get("customer_phone"),
+        "customer_email": talep.get("customer_email"),
+        "customer_phone_e164": to_e164(talep.get("customer_phone")),
+        "il": talep.get("il") or "İstanbul",
+        "ilce": talep.get("ilce") or "Bilinmiyor",
+        "mahalle": talep.get("mahalle"),
+        "sokak": talep.get("sokak"),
+        "kapi_no": talep.get("kapi_no"),
+        "ada": talep.get("ada"),
+        "parsel": talep.get("parsel"),
+        "bina_alani": talep.get("bina_alani"),
+        "bagimsiz_bolum_sayisi": talep.get("bagimsiz_bolum_sayisi"),
+        "donusum_tipi": talep.get("donusum_tipi"),
+        "inceleme_durumu": talep.get("inceleme_durumu"),
+        "search_text": build_search_text(
+            talep.get("customer_name"),
+            talep.get("customer_phone"),
+            talep.get("ilce") or "Bilinmiyor",
+            talep.get("mahalle"),
+        ),
+        "assigned_franchise_id": None,
+        "status": "talep_geldi",
+        "toplanti_uygunluk_skoru": 0,
+        "ilk_arama_deadline": deadline,
+    }
+
+
+async def _upsert_batch(
+    db: AsyncSession, rows: list[dict], update_existing: bool
+) -> IngestResult:
+    # Atama sadece yeni eklenen satirlarda gecerli olur (ON CONFLICT set_'te yok);
+    # CRM'de zaten olan talepler yonlendirilmez
+    plan = None
+    if settings.lead_routing_enabled:
+        existing = set((await db.execute(
+            select(CRMLead.yevveko_talep_id).where(
+                CRMLead.yevveko_talep_id.in_([r["yevveko_talep_id"] for r in rows])
+            )
+        )).scalars())
+        plan = await route_rows(db, [r for r in rows if r["yevveko_talep_id"] not in existing])
+
+    stmt = insert(CRMLead).values(rows)
+
+    if update_existing:
+        # Sadece kaynakta gercekten degisen satirlar yeniden yazilir
+        table = CRMLead.__table__
+        changed = or_(*(
+            table.c[col].is_distinct_from(stmt.excluded[col]) for col in SOURCE_COLUMNS
+        ))
+        set_ = {col: stmt.excluded[col] for col in SOURCE_COLUMNS + DERIVED_COLUMNS}
+        set_["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CRMLead.yevveko_talep_id],
+            set_=set_,
+            where=changed,
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=[CRMLead.yevveko_talep_id],
+        )
+
+    # xmax = 0 -> satir bu statement ile eklendi, aksi halde guncellendi
+    stmt = stmt.returning(
+        CRMLead.id,
+        CRMLead.yevveko_talep_id,
+        literal_column("(xmax = 0)").label("inserted"),
+    )
+    returned = (await db.execute(stmt)).all()
+
+    result = IngestResult(last_talep_id=max(r["yevveko_talep_id"] for r in rows))
+    values_by_talep = {r["yevveko_talep_id"]: r for r in rows}
+    funnel_deltas = Counter()
+    for row in returned:
+        if row.inserted:
+            result.created += 1
+            result.created_lead_ids.append(row.id)
+            values = values_by_talep[row.yevveko_talep_id]
+            funnel_deltas[counter_key(values["assigned_franchise_id"], values["status"])] += 1
+        else:
+            result.updated += 1
+            result.updated_lead_ids.append(row.id)
+    result.skipped = len(rows) - len(returned)
+    if plan is not None:
+        # Araya giren es zamanli ekleme de olabilir; yuke sadece xmax = 0 satirlari
+        # yansir, o da transaction commit edildikten sonra
+        plan.commit(
+            db,
+            (values_by_talep[row.yevveko_talep_id]["assigned_franchise_id"]
+             for row in returned if row.inserted),
+        )
+    # Guncellemeler durum/ofis kolonlarina dokunmaz; sadece yeni satirlar sayilir
+    await apply_deltas(db, funnel_deltas)
+
+    # Yeni ve kaynakta degisen lead'ler ayni transaction icinde puanlanir
+    if settings.lead_scoring_enabled:
+        await score_leads(db, result.created_lead_ids + result.updated_lead_ids)
+    return result
+
+
+async def upsert_talepler(
+    db: AsyncSession,
+    talepler: Iterable[dict],
+    *,
+    update_existing: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> IngestResult:
+    """
+    Talepleri batch'ler halinde crm_leads'e yazar.
+
+    update_existing=False iken mevcut talepler atlanir (skipped); True iken
+    Yevveko'ya ait kolonlardan en az biri degismisse guncellenir (updated),
+    degismemisse atlanir. Commit cagirana aittir.
+    """
+    total = IngestResult()
+    batch: dict[int, dict] = {}
+
+    async def _flush():
+        if batch:
+            total.merge(await _upsert_batch(db, list(batch.values()), update_existing))
+            batch.clear()
+
+    for talep in talepler:
+        if not talep.get("talep_id"):
+            continue
+        # Ayni batch icinde tekrar eden talep ON CONFLICT'i iki kez tetiklememeli
+        batch[talep["talep_id"]] = build_lead_values(talep)
+        if len(batch) >= batch_size:
+            await _flush()
+
+    await _flush()
+    return total
+
+
+async def get_sync_state(db: AsyncSession, source: str = SYNC_SOURCE) -> CRMSyncState:
+    """Kaynagin watermark kaydini dondurur, yoksa bir kerelik olusturur."""
+    state = await db.get(CRMSyncState, source)
+    if state is None:
+        # Ilk calisma: imleci mevcut CRM verisinden baslat (tek seferlik tarama)
+        result = await db.execute(
+            select(func.coalesce(func.max(CRMLead.yevveko_talep_id), 0))
+        )
+        state = CRMSyncState(
+            source=source,
+            last_id=result.scalar() or 0,
+            last_updated_at=await fetch_max_updated_at(),
+        )
+        db.add(state)
+        await db.flush()
+    return state
+
+
+async def _open_full_run(db: AsyncSession) -> CRMSyncRun:
+    """Yarim kalan tam sync'i devralir veya yeni bir calisma kaydi acar."""
+    result = await db.execute(
+        select(CRMSyncRun)
+        .where(CRMSyncRun.mode == "full", CRMSyncRun.status != "tamamlandi")
+        .order_by(CRMSyncRun.id.desc())
+        .limit(1)
+    )
+    run = result.scalar_one_or_none()
+    if run:
+        # Son commit edilen chunk'tan devam et
+        run.status = "calisiyor"
+        run.error = None
+        return run
+
+    total, max_id = await fetch_talep_bounds(0)
+    run = _new_run("full", since_id=0, target_id=max_id, total=total)
+    db.add(run)
+    return run
+
+
+def _new_run(mode: str, since_id: int, target_id: int = 0, total: int = 0) -> CRMSyncRun:
+    return CRMSyncRun(
+        source=SYNC_SOURCE,
+        mode=mode,
+        status="calisiyor",
+        start_talep_id=since_id,
+        last_talep_id=since_id,
+        target_talep_id=target_id,
+        total_estimate=total,
+        processed=0,
+        created=0,
+        skipped=0,
+        updated=0,
+        chunks=0,
+    )
+
+
+def _record_chunk(run: CRMSyncRun, chunk: list[dict], result: IngestResult) -> None:
+    run.last_talep_id = max(run.last_talep_id, result.last_talep_id)
+    run.processed += len(chunk)
+    run.created += result.created
+    run.skipped += result.skipped
+    run.updated += result.updated
+    run.chunks += 1
+
+
+async def _sync_full(db: AsyncSession, chunk_size: int) -> CRMSyncRun:
+    run = await _open_full_run(db)
+    state = await get_sync_state(db)
+    await db.commit()
+
+    async for chunk in iter_talep_chunks(
+        since_id=run.last_talep_id,
+        chunk_size=chunk_size,
+        until_id=run.target_talep_id,
+    ):
+        result = await upsert_talepler(db, chunk)
+        _record_chunk(run, chunk, result)
+        await detect_duplicates(db, result.created_lead_ids + result.updated_lead_ids)
+        state.last_id = max(state.last_id, result.last_talep_id)
+        await db.commit()
+
+    return run
+
+
+async def _sync_incremental(db: AsyncSession, chunk_size: int) -> CRMSyncRun | None:
+    state = await get_sync_state(db)
+    await db.commit()
+
+    run = _new_run("incremental", since_id=state.last_id)
+
+    # 1) Degisen mevcut talepler: updated_at watermark'indan sonrasi
+    if state.last_updated_at is not None:
+        async for chunk in iter_updated_talep_chunks(
+            since=state.last_updated_at - WATERMARK_OVERLAP,
+            max_id=state.last_id,
+            chunk_size=chunk_size,
+        ):
+            result = await upsert_talepler(db, chunk, update_existing=True)
+            _record_chunk(run, chunk, result)
+            await detect_duplicates(db, result.created_lead_ids + result.updated_lead_ids)
+            # Sayfalar updated_at sirasinda geldigi icin watermark monoton ilerler
+            chunk_max = chunk[-1]["updated_at"]
+            if chunk_max and chunk_max > state.last_updated_at:
+                state.last_updated_at = chunk_max
+            await db.commit()
+
+    # 2) Yeni talepler: id watermark'indan sonrasi
+    async for chunk in iter_talep_chunks(since_id=state.last_id, chunk_size=chunk_size):
+        result = await upsert_talepler(db, chunk, update_existing=True)
+        _record_chunk(run, chunk, result)
+        await detect_duplicates(db, result.created_lead_ids + result.updated_lead_ids)
+        state.last_id = max(state.last_id, result.last_talep_id)
+        if state.last_updated_at is None:
+            state.last_updated_at = max(
+                (t["updated_at"] for t in chunk if t.get("updated_at")), default=None
+            )
+        await db.commit()
+
+    # Degisiklik yoksa calisma kaydi tutulmaz (her dakika bos satir yazmamak icin)
+    if run.created == 0 and run.updated == 0:
+        return None
+
+    run.target_talep_id = state.last_id
+    run.total_estimate = run.processed
+    db.add(run)
+    return run
+
+
+async def sync_talepler_chunked(
+    mode: str = "incremental",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> CRMSyncRun | None:
+    """
+    evveko_db'den talepleri chunk chunk ceker, her chunk'i ayri commit eder.
+
+    Imlec crm_sync_state'te tutulur: incremental sync hem yeni (id) hem
+    degisen (updated_at) talepleri ceker ve mevcut leadlerde sadece Yevveko'ya
+    ait kolonlari gunceller. Tam sync (mode="full") ilerlemesini crm_sync_runs'a
+    yazar ve yarim kaldiysa son commit edilen chunk'tan devam eder.
+    Incremental'da degisiklik yoksa None doner.
+    """
+    async with async_session() as db:
+        run = None
+        try:
+            if mode == "full":
+                run = await _sync_full(db, chunk_size)
+            else:
+                run = await _sync_incremental(db, chunk_size)
+                if run is None:
+                    return None
+
+            run.status = "tamamlandi"
+            run.finished_at = datetime.now()
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            if run is not None:
+                run.status = "hata"
+                run.error = str(e)[:2000]
+                db.add(run)
+                await db.commit()
+            raise
+
+    return run
@@ -0,0 +1,167 @@
+"""
+Bolgeye gore otomatik lead yonlendirme.
+
+Aktif ofislerin territory_ilceler listesinden surec ici bir
+"ilce/mahalle -> ofis" indeksi kurulur; yonlendirme lead basina sorgu
+atmadan bellekte yapilir. Liste elemanlari su bicimlerde olabilir:
+    "Kadıköy"                              -> tum ilce
+    "Kadıköy/Moda"                         -> sadece mahalle
+    {"ilce": "Kadıköy", "mahalleler": ["Moda", "Fenerbahçe"]}
+
+Kurallar (oncelik sirasiyla):
+1. mahalle eslesmesi  2. ilce eslesmesi  3. ofisin kendi ilcesi (yedek)
+Ayni seviyede birden fazla ofis varsa (cakisan bolgeler) lead, ofislerin
+yuk ve kapasitesine gore secilir (bkz. office_load). Eslesme yoksa lead
+atanmamis kalir.
+
+Indeks ofis eklenip guncellendiginde bu surecte hemen, diger sureclerde
+ofis tablosundaki degisiklik imzasi (max(updated_at), count) en gec
+CHECK_INTERVAL_SECONDS icinde fark edilerek yenilenir.
+"""
+
+import time
+from collections import defaultdict
+from functools import lru_cache
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.franchise import FranchiseOffice
+from app.services.office_load import AllocationPlan, office_load
+from app.utils.search import fold_text
+
+# Diger sureclerdeki ofis degisikliklerinin kontrol araligi (saniye)
+CHECK_INTERVAL_SECONDS = 10.0
+
+# ilce/mahalle adlari sinirli bir kume; katlama sonucu onbellekte tutulur
+_fold = lru_cache(maxsize=8192)(fold_text)
+
+
+@dataclass
+class RouteDecision:
+    office_id: Optional[int]
+    rule: str  # mahalle / ilce / ofis_ilcesi / eslesme_yok
+
+
+def _territory_entries(territory) -> list[tuple[str, Optional[str]]]:
+    """territory_ilceler elemanlarini (ilce, mahalle|None) ciftlerine cevirir."""
+    entries = []
+    for item in territory or []:
+        if isinstance(item, dict):
+            ilce = fold_text(item.get("ilce"))
+            mahalleler = item.get("mahalleler") or []
+            if ilce and mahalleler:
+                entries.extend((ilce, fold_text(m)) for m in mahalleler if m)
+            elif ilce:
+                entries.append((ilce, None))
+        elif isinstance(item, str):
+            ilce, _, mahalle = item.partition("/")
+            if fold_text(ilce):
+                entries.append((fold_text(ilce), fold_text(mahalle) or None))
+    return entries
+
+
+def _is_active(office: FranchiseOffice, today: date) -> bool:
+    if not office.is_active:
+        return False
+    if office.contract_start_date and office.contract_start_date > today:
+        return False
+    if office.contract_end_date and office.contract_end_date < today:
+        return False
+    return True
+
+
+class TerritoryIndex:
+    def __init__(self):
+        self.by_mahalle: dict[tuple[str, str], list[int]] = {}
+        self.by_ilce: dict[str, list[int]] = {}
+        self.by_home_ilce: dict[str, list[int]] = {}
+        self._signature = None
+        self._checked_at = 0.0
+        self._stale = True
+
+    def invalidate(self) -> None:
+        """Ofis eklendi/guncellendi: bir sonraki kullanimda yeniden kurulur."""
+        self._stale = True
+
+    def build(self, offices: list[FranchiseOffice]) -> None:
+        today = date.today()
+        by_mahalle = defaultdict(set)
+        by_ilce = defaultdict(set)
+        by_home_ilce = defaultdict(set)
+
+        for office in offices:
+            if not _is_active(office, today):
+                continue
+            by_home_ilce[fold_text(office.ilce)].add(office.id)
+            for ilce, mahalle in _territory_entries(office.territory_ilceler):
+                if mahalle:
+                    by_mahalle[(ilce, mahalle)].add(office.id)
+                else:
+                    by_ilce[ilce].add(office.id)
+
+        self.by_mahalle = {k: sorted(v) for k, v in by_mahalle.items()}
+        self.by_ilce = {k: sorted(v) for k, v in by_ilce.items()}
+        self.by_home_ilce = {k: sorted(v) for k, v in by_home_ilce.items()}
+
+    async def refresh(self, db: AsyncSession) -> "TerritoryIndex":
+        """Gerekiyorsa indeksi veritabanindan yeniden kurar."""
+        now = time.monotonic()
+        if not self._stale and now - self._checked_at < CHECK_INTERVAL_SECONDS:
+            return self
+
+        result = await db.execute(
+            select(func.max(FranchiseOffice.updated_at), func.count(FranchiseOffice.id))
+        )
+        signature = tuple(result.one())
+        # Sozlesme tarihleri gun degisince sonuclari etkiler
+        signature += (date.today(),)
+
+        if self._stale or signature != self._signature:
+            offices = (await db.execute(select(FranchiseOffice))).scalars().all()
+            self.build(list(offices))
+            self._signature = signature
+            self._stale = False
+        self._checked_at = now
+        return self
+
+    def candidates(self, ilce: Optional[str], mahalle: Optional[str]) -> tuple[list[int], str]:
+        ilce_key = _fold(ilce)
+        mahalle_key = _fold(mahalle)
+        if mahalle_key and (ilce_key, mahalle_key) in self.by_mahalle:
+            return self.by_mahalle[(ilce_key, mahalle_key)], "mahalle"
+        if ilce_key in self.by_ilce:
+            return self.by_ilce[ilce_key], "ilce"
+        if ilce_key in self.by_home_ilce:
+            return self.by_home_ilce[ilce_key], "ofis_ilcesi"
+        return [], "eslesme_yok"
+
+    def route(
+        self, ilce: Optional[str], mahalle: Optional[str], plan: AllocationPlan
+    ) -> RouteDecision:
+        offices, rule = self.candidates(ilce, mahalle)
+        if not offices:
+            return RouteDecision(None, rule)
+        return RouteDecision(plan.choose(offices), rule)
+
+
+territory_index = TerritoryIndex()
+
+
+async def route_rows(db: AsyncSession, rows: list[dict]) -> AllocationPlan:
+    """
+    Ingestion satirlarina assigned_franchise_id'yi toplu olarak yazar (yerinde).
+    Plan commit edilmeden doner; cagiran, sadece gercekten eklenen satirlarin
+    ofislerini plan.commit(db, office_ids) ile (commit sonrasi) yuke yansitir.
+    """
+    index = await territory_index.refresh(db)
+    plan = (await office_load.refresh(db)).plan()
+    for row in rows:
+        if row.get("assigned_franchise_id") is None:
+            row["assigned_franchise_id"] = index.route(
+                row.get("ilce"), row.get("mahalle"), plan
+            ).office_id
+    return plan
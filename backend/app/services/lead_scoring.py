@@ -0,0 +1,208 @@
+"""
+Toplu lead puanlama (toplanti_uygunluk_skoru / lead_sinif).
+
+Kurallar aktif ilk arama scriptinin scoring_rules alanindan okunur. Lead
+ozellikleri chunk chunk NumPy dizilerine yuklenir, puan tum chunk icin tek
+seferde hesaplanir ve sonuc tek bir UPDATE ... FROM unnest(...) ile yazilir.
+Ajanin arama sonrasi verdigi puan (skor_kaynagi = 'ajan') ezilmez.
+
+Tum tabloyu yeniden puanlamak icin:
+    python -m app.services.lead_scoring
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field, fields
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models.lead import CRMLead
+from app.models.settings import CRMCallScript
+from app.utils.search import fold_text
+
+RESCORE_CHUNK_SIZE = 50000
+
+# Kurallar bu sure boyunca surec icinde tutulur (saniye)
+RULES_TTL_SECONDS = 60.0
+
+_FEATURE_COLUMNS = (
+    CRMLead.id,
+    CRMLead.bina_alani,
+    CRMLead.bagimsiz_bolum_sayisi,
+    CRMLead.bina_yasi,
+    CRMLead.donusum_tipi,
+    CRMLead.riskli_yapi_durumu,
+    CRMLead.niyet,
+    CRMLead.ilce,
+    CRMLead.whatsapp_grubu_var,
+    CRMLead.karar_verici,
+)
+
+_UPDATE_SQL = text("""
+    UPDATE crm_leads AS l
+    SET toplanti_uygunluk_skoru = v.skor,
+        lead_sinif = v.sinif,
+        skor_kaynagi = 'otomatik'
+    FROM unnest(
+        CAST(:ids AS integer[]),
+        CAST(:skorlar AS integer[]),
+        CAST(:siniflar AS varchar[])
+    ) AS v(id, skor, sinif)
+    WHERE l.id = v.id
+      AND l.skor_kaynagi IS DISTINCT FROM 'ajan'
+      AND (l.toplanti_uygunluk_skoru, l.lead_sinif, l.skor_kaynagi)
+          IS DISTINCT FROM (v.skor, v.sinif, 'otomatik')
+""")
+
+
+@dataclass
+class ScoringRules:
+    """scoring_rules JSON'u; eksik anahtarlar varsayilanla doldurulur."""
+
+    daire_sayisi_min: float = 6
+    daire_sayisi_bonus: float = 20
+    bina_yasi_min: float = 20
+    bina_yasi_bonus: float = 15
+    bina_alani_min: float = 500
+    bina_alani_bonus: float = 10
+    niyet_toplanti_bonus: float = 30
+    niyet_teklif_bonus: float = 40
+    whatsapp_var_bonus: float = 10
+    karar_verici_belli_bonus: float = 15
+    riskli_yapi_bonus: dict = field(default_factory=lambda: {"var": 20, "riskli": 20, "surecte": 10})
+    donusum_tipi_bonus: dict = field(default_factory=dict)
+    ilce_bonus: dict = field(default_factory=dict)
+    sinif_esikleri: dict = field(default_factory=lambda: {"A": 70, "B": 40})
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "ScoringRules":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in (data or {}).items() if k in known})
+
+
+def _lookup(values: np.ndarray, bonus: dict) -> np.ndarray:
+    """Kategorik kolonu (katlanmis) bonus tablosuna gore puana cevirir."""
+    if not bonus:
+        return np.zeros(len(values))
+    table = {fold_text(k): float(v) for k, v in bonus.items()}
+    # Once ham degerler koda cevrilir; katlama sadece farkli degerlerde yapilir
+    codes = {v: i for i, v in enumerate(dict.fromkeys(values))}
+    inverse = np.fromiter(map(codes.__getitem__, values), dtype=np.int32, count=len(values))
+    return np.array([table.get(fold_text(u), 0.0) for u in codes])[inverse]
+
+
+def score_rows(rows: list, rules: ScoringRules) -> tuple[np.ndarray, np.ndarray]:
+    """Ozellik satirlarini (_FEATURE_COLUMNS sirasiyla) puan ve sinif dizilerine cevirir."""
+    n = len(rows)
+    if n == 0:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=object)
+
+    # zip(*rows) buyuk chunk'larda yavas; tek object matris uzerinden kolonlara bolunur
+    matrix = np.array(rows, dtype=object)
+    _, alan, bolum, yas, donusum, riskli, niyet, ilce, whatsapp, karar = matrix.T
+    alan = alan.astype(float)
+    bolum = bolum.astype(float)
+    yas = yas.astype(float)
+
+    # NaN (bos) karsilastirmalari False doner, ayrica maskelemeye gerek yok
+    with np.errstate(invalid="ignore"):
+        score = (
+            np.where(bolum >= rules.daire_sayisi_min, rules.daire_sayisi_bonus, 0.0)
+            + np.where(yas >= rules.bina_yasi_min, rules.bina_yasi_bonus, 0.0)
+            + np.where(alan >= rules.bina_alani_min, rules.bina_alani_bonus, 0.0)
+        )
+    score += _lookup(niyet, {
+        "toplanti": rules.niyet_toplanti_bonus,
+        "teklif": rules.niyet_teklif_bonus,
+    })
+    score += _lookup(riskli, rules.riskli_yapi_bonus)
+    score += _lookup(donusum, rules.donusum_tipi_bonus)
+    score += _lookup(ilce, rules.ilce_bonus)
+    # Bos (None) whatsapp NaN olur, == 1 karsilastirmasi False doner
+    score += (whatsapp.astype(float) == 1) * rules.whatsapp_var_bonus
+    score += np.fromiter(map(bool, karar), dtype=bool, count=n) * rules.karar_verici_belli_bonus
+
+    score = np.clip(np.rint(score), 0, 100).astype(np.int32)
+    esik_a = rules.sinif_esikleri.get("A", 70)
+    esik_b = rules.sinif_esikleri.get("B", 40)
+    classes = np.where(score >= esik_a, "A", np.where(score >= esik_b, "B", "C")).astype(object)
+    return score, classes
+
+
+_rules_cache: tuple[float, ScoringRules] | None = None
+
+
+async def load_rules(db: AsyncSession) -> ScoringRules:
+    global _rules_cache
+    if _rules_cache and time.monotonic() - _rules_cache[0] < RULES_TTL_SECONDS:
+        return _rules_cache[1]
+
+    result = await db.execute(
+        select(CRMCallScript.scoring_rules)
+        .where(CRMCallScript.call_type == "ilk_arama", CRMCallScript.is_active == True)
+        .order_by(CRMCallScript.id.desc())
+        .limit(1)
+    )
+    rules = ScoringRules.from_dict(result.scalar_one_or_none())
+    _rules_cache = (time.monotonic(), rules)
+    return rules
+
+
+async def _write_scores(db: AsyncSession, rows: list, rules: ScoringRules) -> int:
+    score, classes = score_rows(rows, rules)
+    result = await db.execute(_UPDATE_SQL, {
+        "ids": [r[0] for r in rows],
+        "skorlar": score.tolist(),
+        "siniflar": classes.tolist(),
+    })
+    return result.rowcount
+
+
+async def score_leads(db: AsyncSession, lead_ids: list[int]) -> int:
+    """Verilen lead'leri puanlar (ingestion icinde); degisen satir sayisini dondurur. Commit cagirana aittir."""
+    if not lead_ids:
+        return 0
+    rules = await load_rules(db)
+    result = await db.execute(select(*_FEATURE_COLUMNS).where(CRMLead.id.in_(lead_ids)))
+    rows = [tuple(r) for r in result.all()]
+    if not rows:
+        return 0
+    return await _write_scores(db, rows, rules)
+
+
+async def rescore_all(chunk_size: int = RESCORE_CHUNK_SIZE) -> dict:
+    """Tum tabloyu id sirasiyla chunk chunk yeniden puanlar (chunk basina commit)."""
+    started = time.perf_counter()
+    processed = 0
+    changed = 0
+    last_id = 0
+
+    async with async_session() as db:
+        rules = await load_rules(db)
+        while True:
+            result = await db.execute(
+                select(*_FEATURE_COLUMNS)
+                .where(CRMLead.id > last_id)
+                .order_by(CRMLead.id)
+                .limit(chunk_size)
+            )
+            rows = [tuple(r) for r in result.all()]
+            if not rows:
+                break
+            changed += await _write_scores(db, rows, rules)
+            await db.commit()
+            processed += len(rows)
+            last_id = rows[-1][0]
+
+    return {
+        "processed": processed,
+        "changed": changed,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+if __name__ == "__main__":
+    print(asyncio.run(rescore_all()))
@@ -0,0 +1,107 @@
+"""
+Lead arama.
+
+crm_leads.search_text her yazimda isim, telefon, ilce ve mahalleden Turkce
+karakter ve harf duyarsiz olarak uretilir ("Şişli" ve "sisli" ayni metne
+katlanir). Uzerindeki pg_trgm GIN indeksi hem '%terim%' hem de yazim
+hatali (benzerlik) aramalarini karsilar. Telefon gibi gorunen aramalar
+trigram yerine son 10 rakam uzerindeki esitlik indeksine yonlendirilir.
+
+Telefonlar ayrica normalize_phone ile customer_phone_e164'e yazilir; ayni
+numarali lead'ler bu kolonun indeksiyle tek sorguda bulunur.
+
+Mevcut satirlar alembic revizyonlarinda doldurulur: search_text 0003'te
+(fill_search_text), customer_phone_e164 0004'te.
+"""
+
+import logging
+
+from sqlalchemy import Connection, Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.lead import CRMLead
+from app.utils.phone import to_e164
+from app.utils.search import build_search_text, fold_text, phone_search_key
+
+logger = logging.getLogger("evvekocrm.search")
+
+BACKFILL_CHUNK_SIZE = 5000
+
+
+def lead_search_text(lead: CRMLead) -> str:
+    return build_search_text(lead.customer_name, lead.customer_phone, lead.ilce, lead.mahalle)
+
+
+def refresh_search_fields(lead: CRMLead) -> None:
+    """ORM ile yazilan lead'lerde (create/update) turetilmis arama kolonlarini gunceller."""
+    lead.customer_phone_e164 = to_e164(lead.customer_phone)
+    lead.search_text = lead_search_text(lead)
+
+
+async def find_duplicate_lead_ids(db: AsyncSession, lead: CRMLead) -> list[int]:
+    """Lead ile ayni normalize telefona sahip diger lead'lerin id'leri."""
+    if not lead.customer_phone_e164:
+        return []
+    result = await db.execute(
+        select(CRMLead.id)
+        .where(CRMLead.customer_phone_e164 == lead.customer_phone_e164, CRMLead.id != lead.id)
+        .order_by(CRMLead.id)
+    )
+    return list(result.scalars().all())
+
+
+def apply_search(query: Select, search: str) -> tuple[Select, ColumnElement | None]:
+    """
+    Sorguya arama filtresini ekler. Ikinci deger siralama icin alaka puanidir
+    (telefon aramasinda None: esitlik eslesmesi zaten kesindir).
+    """
+    phone_key = phone_search_key(search)
+    if phone_key:
+        return query.where(CRMLead.customer_phone_digits == phone_key), None
+
+    term = fold_text(search)
+    if not term:
+        return query, None
+
+    # LIKE alt metin eslesmesi, %> ise kelime benzerligi (yazim hatalari icin);
+    # ikisi de gin_trgm_ops indeksini kullanir
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    query = query.where(
+        CRMLead.search_text.like(f"%{escaped}%")
+        | CRMLead.search_text.op("%>")(term)
+    )
+    rank = func.word_similarity(term, CRMLead.search_text)
+    return query, rank
+
+
+def fill_search_text(conn: Connection, chunk_size: int = BACKFILL_CHUNK_SIZE) -> int:
+    """
+    search_text'i bos satirlari id sirasiyla chunk chunk doldurur; doldurulan
+    sayisini dondurur. Senkron Connection alir: alembic revizyonu (0003)
+    op.get_bind() ile, async kod ise AsyncConnection.run_sync ile cagirir.
+    Transaction cagirana aittir.
+    """
+    select_chunk = text("""
+        SELECT id, customer_name, customer_phone, ilce, mahalle FROM crm_leads
+        WHERE id > :last_id AND search_text IS NULL
+        ORDER BY id LIMIT :limit
+    """)
+    update_chunk = text("""
+        UPDATE crm_leads AS l SET search_text = v.search_text
+        FROM unnest(CAST(:ids AS integer[]), CAST(:texts AS text[])) AS v(id, search_text)
+        WHERE l.id = v.id
+    """)
+    total = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(select_chunk, {"last_id": last_id, "limit": chunk_size}).all()
+        if not rows:
+            return total
+        conn.execute(update_chunk, {
+            "ids": [r.id for r in rows],
+            "texts": [build_search_text(r.customer_name, r.customer_phone, r.ilce, r.mahalle) for r in rows],
+        })
+        total += len(rows)
+        last_id = rows[-1].id
+        logger.info(f"search_text: {total} satir (son id {last_id})")
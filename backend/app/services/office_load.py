@@ -0,0 +1,224 @@
+"""
+Ofis yuk takibi ve kapasiteye gore lead dagitimi.
+
+Ayni bolgeyi birden fazla ofis kapsiyorsa yeni lead, ofislerin acik randevu
+yuku, yakin donemdeki gelmeme (no-show) orani ve tanimli kapasitesine gore
+en uygun ofise verilir.
+
+Ofis basina durum surec icinde tutulur: ilk kullanimda (ve RELOAD_SECONDS'ta
+bir, diger sureclerdeki degisiklikleri yakalamak icin) iki gruplu sorguyla
+yuklenir, arada randevu durum degisiklikleriyle artimli guncellenir. Randevu
+gecisleri (record_appointment_status) ve dagitim planlarinin lead atamalari
+(AllocationPlan.commit) session.info'da biriktirilir ve ancak transaction
+commit edildikten sonra yuke yansir (rollback'te atilir).
+"""
+
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.appointment import CRMAppointment
+from app.models.franchise import FranchiseOffice
+from app.models.lead import CRMLead
+
+RELOAD_SECONDS = 300.0
+
+# No-show orani bu kadar gunluk randevulardan hesaplanir
+NO_SHOW_WINDOW_DAYS = 30
+
+OPEN_APPOINTMENT_STATUSES = ("beklemede", "onaylandi")
+FINISHED_APPOINTMENT_STATUSES = ("tamamlandi", "gelmedi")
+
+# Henuz randevuya donusmemis lead'ler: her biri bir randevunun bu kadari sayilir
+OPEN_LEAD_STATUSES = ("talep_geldi", "merkez_arandi", "besleme", "takip_aramasi")
+LEAD_LOAD_WEIGHT = 0.3
+
+# Az randevusu olan ofisin orani tek bir gelmemeyle ucmasin diye on dagilim
+NO_SHOW_PRIOR_RATE = 0.1
+NO_SHOW_PRIOR_COUNT = 10
+
+DEFAULT_CAPACITY = 20
+
+_PENDING_KEY = "office_load_pending"
+_PENDING_LEADS_KEY = "office_load_pending_leads"
+
+
+@dataclass
+class OfficeLoad:
+    capacity: int = DEFAULT_CAPACITY
+    open_appointments: int = 0
+    open_leads: float = 0
+    completed: int = 0
+    no_shows: int = 0
+
+    @property
+    def no_show_rate(self) -> float:
+        finished = self.completed + self.no_shows
+        return (self.no_shows + NO_SHOW_PRIOR_RATE * NO_SHOW_PRIOR_COUNT) / (finished + NO_SHOW_PRIOR_COUNT)
+
+    @property
+    def load(self) -> float:
+        return self.open_appointments + LEAD_LOAD_WEIGHT * self.open_leads
+
+    def score(self, extra_leads: int = 0) -> float:
+        """Yuksek puan = daha uygun. Bos kapasite orani, gelmeme oraniyla indirgenir."""
+        capacity = max(self.capacity, 1)
+        free = (capacity - self.load - LEAD_LOAD_WEIGHT * extra_leads) / capacity
+        return free * (1 - self.no_show_rate)
+
+
+class AllocationPlan:
+    """
+    Bir batch icin dagitim plani. Secimler once planda birikir (ayni batch
+    ayni ofise yigilmasin); commit() ile transaction'a baglanir ve transaction
+    commit edilince takipciye yansir. Dry-run'da veya rollback'te atilir.
+    """
+
+    def __init__(self, tracker: "OfficeLoadTracker"):
+        self.tracker = tracker
+        self.assigned: dict[int, int] = defaultdict(int)
+
+    def choose(self, office_ids: list[int]) -> int:
+        if len(office_ids) == 1:
+            office_id = office_ids[0]
+        else:
+            # Esit puanda dusuk id: sonuc deterministik kalir
+            office_id = max(
+                office_ids,
+                key=lambda o: (self.tracker.get(o).score(self.assigned[o]), -o),
+            )
+        self.assigned[office_id] += 1
+        return office_id
+
+    def commit(self, db: AsyncSession, office_ids: Iterable[int | None] | None = None) -> None:
+        """
+        Secimleri db'nin transaction'i commit edildikten sonra takipciye
+        yansitilmak uzere kaydeder. office_ids verilirse plan yerine sadece
+        gercekten yazilan atamalar sayilir (ornegin ON CONFLICT'e takilmayanlar).
+        """
+        if office_ids is None:
+            counts = Counter(self.assigned)
+        else:
+            counts = Counter(o for o in office_ids if o is not None)
+        if counts:
+            db.info.setdefault(_PENDING_LEADS_KEY, []).append((self.tracker, counts))
+        self.assigned.clear()
+
+
+class OfficeLoadTracker:
+    def __init__(self):
+        self.offices: dict[int, OfficeLoad] = {}
+        self._loaded_at: float | None = None
+
+    def get(self, office_id: int) -> OfficeLoad:
+        load = self.offices.get(office_id)
+        if load is None:
+            load = self.offices[office_id] = OfficeLoad()
+        return load
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    async def refresh(self, db: AsyncSession) -> "OfficeLoadTracker":
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < RELOAD_SECONDS:
+            return self
+
+        offices: dict[int, OfficeLoad] = {}
+        result = await db.execute(select(FranchiseOffice.id, FranchiseOffice.capacity))
+        for office_id, capacity in result.all():
+            offices[office_id] = OfficeLoad(capacity=capacity or DEFAULT_CAPACITY)
+
+        since = (datetime.now() - timedelta(days=NO_SHOW_WINDOW_DAYS)).date()
+        result = await db.execute(
+            select(
+                CRMAppointment.franchise_office_id,
+                func.count().filter(CRMAppointment.status.in_(OPEN_APPOINTMENT_STATUSES)),
+                func.count().filter(
+                    CRMAppointment.status == "tamamlandi", CRMAppointment.scheduled_date >= since
+                ),
+                func.count().filter(
+                    CRMAppointment.status == "gelmedi", CRMAppointment.scheduled_date >= since
+                ),
+            ).group_by(CRMAppointment.franchise_office_id)
+        )
+        for office_id, open_count, completed, no_shows in result.all():
+            load = offices.setdefault(office_id, OfficeLoad())
+            load.open_appointments = open_count
+            load.completed = completed
+            load.no_shows = no_shows
+
+        result = await db.execute(
+            select(CRMLead.assigned_franchise_id, func.count())
+            .where(
+                CRMLead.assigned_franchise_id.isnot(None),
+                CRMLead.status.in_(OPEN_LEAD_STATUSES),
+            )
+            .group_by(CRMLead.assigned_franchise_id)
+        )
+        for office_id, count in result.all():
+            offices.setdefault(office_id, OfficeLoad()).open_leads = count
+
+        self.offices = offices
+        self._loaded_at = time.monotonic()
+        return self
+
+    def plan(self) -> AllocationPlan:
+        return AllocationPlan(self)
+
+    def on_appointment_status(self, office_id: int, old_status: str | None, new_status: str) -> None:
+        """Randevu olusturuldu (old_status=None) veya durumu degisti."""
+        if self._loaded_at is None or old_status == new_status:
+            return
+        load = self.get(office_id)
+        if old_status in OPEN_APPOINTMENT_STATUSES:
+            load.open_appointments = max(load.open_appointments - 1, 0)
+        if new_status in OPEN_APPOINTMENT_STATUSES:
+            load.open_appointments += 1
+        if new_status == "tamamlandi":
+            load.completed += 1
+        elif new_status == "gelmedi":
+            load.no_shows += 1
+
+    def snapshot(self) -> list[dict]:
+        return [
+            {
+                "office_id": office_id,
+                "capacity": load.capacity,
+                "open_appointments": load.open_appointments,
+                "open_leads": load.open_leads,
+                "no_show_rate": round(load.no_show_rate, 3),
+                "score": round(load.score(), 3),
+            }
+            for office_id, load in sorted(self.offices.items())
+        ]
+
+
+office_load = OfficeLoadTracker()
+
+
+def record_appointment_status(
+    db: AsyncSession, office_id: int, old_status: str | None, new_status: str
+) -> None:
+    """Randevu gecisini commit sonrasi yuke yansitilmak uzere kaydeder."""
+    db.info.setdefault(_PENDING_KEY, []).append((office_id, old_status, new_status))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session: Session) -> None:
+    for office_id, old_status, new_status in session.info.pop(_PENDING_KEY, ()):
+        office_load.on_appointment_status(office_id, old_status, new_status)
+    for tracker, counts in session.info.pop(_PENDING_LEADS_KEY, ()):
+        for office_id, count in counts.items():
+            tracker.get(office_id).open_leads += count
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_PENDING_LEADS_KEY, None)
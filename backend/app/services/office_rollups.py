@@ -0,0 +1,310 @@
+"""
+Ofis KPI'lari icin gunluk rollup'lar.
+
+Gunluk toplamlar crm_office_daily_rollups'ta tutulur. refresh_office_rollups()
+artimli calisir: watermark'tan sonra degisen kaynak satirlarinin (randevu,
+rapor, memnuniyet aramasi, hakedis; updated_at ile) gunleri "kirli" kabul
+edilir ve sadece bu gunler tum ofisler icin yeniden hesaplanir. Gec gelen
+rapor, gunler sonra isaretlenen no-show ya da iptal edilen hakedis ne kadar
+eski bir gune ait olursa olsun o gunu yeniden hesaplatir. Ofis sayisindan
+bagimsiz olarak her metrik ailesi icin tek sorgu calisir.
+
+Watermark yokken (ilk kurulum) tum kaynak satirlari kirlidir; ilk calisma
+gecmisin tamamini doldurur. O zamana kadar okumalar (office_totals) tum
+araligi canli hesaplar, sonrasinda kapanmis gunler rollup'lardan, bugun
+canli veriden okunur.
+
+Silinen kaynak satirlari ve tarihi degistirilen randevunun eski gunu artimli
+olarak yakalanmaz; gerekirse bir aralik bastan hesaplanir (ornegin son 400 gun):
+    python -m app.services.office_rollups 400
+"""
+
+import asyncio
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from sqlalchemy import delete, func, select, union
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models.appointment import CRMAppointment
+from app.models.meeting_report import CRMMeetingReport
+from app.models.revenue import CRMRevenueEvent
+from app.models.rollup import CRMOfficeDailyRollup
+from app.models.satisfaction import CRMSatisfactionCall
+from app.models.sync_state import CRMSyncState
+
+ROLLUP_STATE_SOURCE = "office_daily_rollup"
+
+# Bu kadar yeni degisiklikler bir sonraki calismaya birakilir
+SAFETY_LAG = timedelta(minutes=2)
+
+# Tek transaction'da yeniden hesaplanan en uzun ardisik gun araligi
+RECOMPUTE_CHUNK_DAYS = 31
+
+# Toplantidan teklife donusum: raporda olumlu karar
+TEKLIF_KARARLARI = ("olumlu",)
+
+# Hakedise sayilmayan gelir olaylari
+GELIR_HARIC_DURUMLAR = ("iptal",)
+
+# Tek INSERT'te yazilan satir (asyncpg parametre siniri)
+UPSERT_BATCH = 1000
+
+
+@dataclass
+class OfficeTotals:
+    """Bir ofis ve tarih araligi icin toplanabilir degerler (rollup kolonlariyla ayni)."""
+
+    randevu_toplam: int = 0
+    randevu_tamamlandi: int = 0
+    randevu_gelmedi: int = 0
+    rapor_sayisi: int = 0
+    rapor_zamaninda: int = 0
+    tamlik_toplam: int = 0
+    teklif_sayisi: int = 0
+    genel_puan_sayisi: int = 0
+    genel_puan_toplam: int = 0
+    profesyonellik_sayisi: int = 0
+    profesyonellik_toplam: int = 0
+    bilgi_netlik_sayisi: int = 0
+    bilgi_netlik_toplam: int = 0
+    gelir_toplam: Decimal = field(default_factory=Decimal)
+
+    def add(self, values: dict) -> None:
+        for name, value in values.items():
+            if value is not None:
+                setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self) -> dict:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+TOTAL_COLUMNS = tuple(f.name for f in fields(OfficeTotals))
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def _percent(part: int, whole: int) -> float:
+    return round(part / whole * 100, 1) if whole else 0.0
+
+
+def _average(total: int, count: int) -> float:
+    return round(total / count, 2) if count else 0.0
+
+
+def day_ranges(days: list[date], max_days: int) -> list[tuple[date, date]]:
+    """Sirali gunleri en fazla max_days uzunlugunda ardisik [start, end) araliklarina boler."""
+    ranges = []
+    for day in days:
+        if ranges and ranges[-1][1] == day and (day - ranges[-1][0]).days < max_days:
+            ranges[-1] = (ranges[-1][0], day + timedelta(days=1))
+        else:
+            ranges.append((day, day + timedelta(days=1)))
+    return ranges
+
+
+def _metric_queries(start: date, end: date, office_id: int | None):
+    """[start, end) araligi icin (ofis, gun) gruplu sorgular; her satir (ofis, gun, **degerler)."""
+    start_at, end_at = _day_start(start), _day_start(end)
+
+    appointments = select(
+        CRMAppointment.franchise_office_id.label("office_id"),
+        CRMAppointment.scheduled_date.label("day"),
+        func.count().label("randevu_toplam"),
+        func.count().filter(CRMAppointment.status == "tamamlandi").label("randevu_tamamlandi"),
+        func.count().filter(CRMAppointment.status == "gelmedi").label("randevu_gelmedi"),
+    ).where(CRMAppointment.scheduled_date >= start, CRMAppointment.scheduled_date < end)
+
+    report_day = func.date(CRMMeetingReport.submitted_at)
+    reports = select(
+        CRMMeetingReport.franchise_office_id.label("office_id"),
+        report_day.label("day"),
+        func.count().label("rapor_sayisi"),
+        func.count().filter(CRMMeetingReport.gec_mi.is_(False)).label("rapor_zamaninda"),
+        func.coalesce(func.sum(CRMMeetingReport.tamlik_puani), 0).label("tamlik_toplam"),
+        func.count().filter(CRMMeetingReport.karar_durumu.in_(TEKLIF_KARARLARI)).label("teklif_sayisi"),
+    ).where(CRMMeetingReport.submitted_at >= start_at, CRMMeetingReport.submitted_at < end_at)
+
+    # Memnuniyet aramasinin ofisi randevusundan gelir
+    call_day = func.date(CRMSatisfactionCall.called_at)
+    satisfaction = (
+        select(
+            CRMAppointment.franchise_office_id.label("office_id"),
+            call_day.label("day"),
+            func.count(CRMSatisfactionCall.genel_puan).label("genel_puan_sayisi"),
+            func.coalesce(func.sum(CRMSatisfactionCall.genel_puan), 0).label("genel_puan_toplam"),
+            func.count(CRMSatisfactionCall.profesyonellik_puani).label("profesyonellik_sayisi"),
+            func.coalesce(func.sum(CRMSatisfactionCall.profesyonellik_puani), 0).label("profesyonellik_toplam"),
+            func.count(CRMSatisfactionCall.bilgi_netlik_puani).label("bilgi_netlik_sayisi"),
+            func.coalesce(func.sum(CRMSatisfactionCall.bilgi_netlik_puani), 0).label("bilgi_netlik_toplam"),
+        )
+        .join(CRMAppointment, CRMAppointment.id == CRMSatisfactionCall.appointment_id)
+        .where(CRMSatisfactionCall.called_at >= start_at, CRMSatisfactionCall.called_at < end_at)
+    )
+
+    revenue_day = func.date(CRMRevenueEvent.created_at)
+    revenue = select(
+        CRMRevenueEvent.franchise_office_id.label("office_id"),
+        revenue_day.label("day"),
+        func.coalesce(func.sum(CRMRevenueEvent.amount), 0).label("gelir_toplam"),
+    ).where(
+        CRMRevenueEvent.created_at >= start_at,
+        CRMRevenueEvent.created_at < end_at,
+        CRMRevenueEvent.status.notin_(GELIR_HARIC_DURUMLAR),
+    )
+
+    queries = [
+        (appointments, CRMAppointment.franchise_office_id, CRMAppointment.scheduled_date),
+        (reports, CRMMeetingReport.franchise_office_id, report_day),
+        (satisfaction, CRMAppointment.franchise_office_id, call_day),
+        (revenue, CRMRevenueEvent.franchise_office_id, revenue_day),
+    ]
+    for query, office_col, day_col in queries:
+        if office_id is not None:
+            query = query.where(office_col == office_id)
+        yield query.group_by(office_col, day_col)
+
+
+async def compute_daily_totals(
+    db: AsyncSession, start: date, end: date, office_id: int | None = None
+) -> dict[tuple[int, date], OfficeTotals]:
+    """[start, end) araligini ham tablolardan (ofis, gun) bazinda toplar."""
+    totals: dict[tuple[int, date], OfficeTotals] = defaultdict(OfficeTotals)
+    for query in _metric_queries(start, end, office_id):
+        for row in (await db.execute(query)).mappings():
+            values = dict(row)
+            key = (values.pop("office_id"), values.pop("day"))
+            totals[key].add(values)
+    return totals
+
+
+def dirty_days_query(since: datetime, until: datetime):
+    """(since, until] icinde degisen kaynak satirlarinin rollup gunleri (her metrik ailesinin gun kolonu)."""
+    sources = (
+        (CRMAppointment.scheduled_date, CRMAppointment.updated_at),
+        (func.date(CRMMeetingReport.submitted_at), CRMMeetingReport.updated_at),
+        (func.date(CRMSatisfactionCall.called_at), CRMSatisfactionCall.updated_at),
+        (func.date(CRMRevenueEvent.created_at), CRMRevenueEvent.updated_at),
+    )
+    return union(*(
+        select(day.label("day")).where(updated_at > since, updated_at <= until)
+        for day, updated_at in sources
+    ))
+
+
+async def _get_watermark(db: AsyncSession) -> datetime | None:
+    state = await db.get(CRMSyncState, ROLLUP_STATE_SOURCE)
+    return state.last_updated_at if state else None
+
+
+async def _recompute_days(db: AsyncSession, start: date, end: date) -> int:
+    """[start, end) gunlerini tum ofisler icin silip ham tablolardan yeniden yazar (tek transaction)."""
+    totals = await compute_daily_totals(db, start, end)
+    await db.execute(
+        delete(CRMOfficeDailyRollup).where(
+            CRMOfficeDailyRollup.day >= start, CRMOfficeDailyRollup.day < end
+        )
+    )
+    rows = [
+        {"office_id": office_id, "day": day, **t.as_dict()}
+        for (office_id, day), t in sorted(totals.items())
+    ]
+    for i in range(0, len(rows), UPSERT_BATCH):
+        await db.execute(insert(CRMOfficeDailyRollup).values(rows[i:i + UPSERT_BATCH]))
+    await db.commit()
+    return len(rows)
+
+
+async def refresh_office_rollups(now: datetime | None = None) -> dict:
+    """
+    Son calismadan beri degisen gunleri yeniden hesaplar. Yeniden hesaplama
+    idempotenttir; watermark ancak tum kirli gunler yazildiktan sonra ilerler.
+    """
+    now = now or datetime.now()
+    async with async_session() as db:
+        watermark = await _get_watermark(db)
+        since = watermark or datetime.min
+        until = max(now - SAFETY_LAG, since)
+
+        result = await db.execute(dirty_days_query(since, until))
+        days = sorted(d for (d,) in result.all() if d is not None)
+        rows = 0
+        for start, end in day_ranges(days, RECOMPUTE_CHUNK_DAYS):
+            rows += await _recompute_days(db, start, end)
+
+        stmt = insert(CRMSyncState).values(source=ROLLUP_STATE_SOURCE, last_id=0, last_updated_at=until)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CRMSyncState.source], set_={"last_updated_at": stmt.excluded.last_updated_at}
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+    return {"days": len(days), "rows": rows, "watermark": until.isoformat()}
+
+
+async def rebuild_office_rollups(days: int, today: date | None = None) -> dict:
+    """Son days gunu ve bugunu (silinen ya da tasinan kaynak satirlari dahil) bastan hesaplar."""
+    today = today or date.today()
+    all_days = [today - timedelta(days=i) for i in range(days, -1, -1)]
+    rows = 0
+    async with async_session() as db:
+        for start, end in day_ranges(all_days, RECOMPUTE_CHUNK_DAYS):
+            rows += await _recompute_days(db, start, end)
+    return {"start": all_days[0].isoformat(), "until": today.isoformat(), "rows": rows}
+
+
+async def office_totals(db: AsyncSession, office_id: int, start: date) -> OfficeTotals:
+    """
+    Ofisin start'tan bugune (dahil) toplamlari. Rollup'lar ilk doldurmadan
+    sonra (watermark var) kapanmis gunler icin kullanilir, bugun canli hesaplanir.
+    """
+    today = date.today()
+    live_start = max(start, today) if await _get_watermark(db) else start
+
+    totals = OfficeTotals()
+    if live_start > start:
+        result = await db.execute(
+            select(*(func.coalesce(func.sum(getattr(CRMOfficeDailyRollup, c)), 0).label(c) for c in TOTAL_COLUMNS))
+            .where(
+                CRMOfficeDailyRollup.office_id == office_id,
+                CRMOfficeDailyRollup.day >= start,
+                CRMOfficeDailyRollup.day < live_start,
+            )
+        )
+        totals.add(dict(result.mappings().one()))
+
+    if live_start <= today:
+        live = await compute_daily_totals(db, live_start, today + timedelta(days=1), office_id)
+        for day_totals in live.values():
+            totals.add(day_totals.as_dict())
+    return totals
+
+
+def kpi_values(t: OfficeTotals) -> dict:
+    """Toplamlardan panelde gosterilen oran ve ortalamalar."""
+    return {
+        "bu_ayki_randevu": t.randevu_toplam,
+        "bu_ayki_toplanti": t.randevu_tamamlandi,
+        "gelmedi_orani": _percent(t.randevu_gelmedi, t.randevu_tamamlandi + t.randevu_gelmedi),
+        "rapor_zamaninda_orani": _percent(t.rapor_zamaninda, t.rapor_sayisi),
+        "rapor_tamlik_ortalama": _average(t.tamlik_toplam, t.rapor_sayisi),
+        "toplantidan_teklif_orani": _percent(t.teklif_sayisi, t.rapor_sayisi),
+        "memnuniyet_ortalama": _average(t.genel_puan_toplam, t.genel_puan_sayisi),
+        "memnuniyet_profesyonellik": _average(t.profesyonellik_toplam, t.profesyonellik_sayisi),
+        "memnuniyet_bilgi_netlik": _average(t.bilgi_netlik_toplam, t.bilgi_netlik_sayisi),
+        "bu_ayki_hakedis": float(t.gelir_toplam),
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(asyncio.run(rebuild_office_rollups(int(sys.argv[1]))))
+    else:
+        print(asyncio.run(refresh_office_rollups()))
@@ -0,0 +1,127 @@
+"""
+Outbox dagiticisi: crm_outbox_events'teki bekleyen olaylari batch'ler halinde
+Yevveko'ya gonderir.
+
+- Her talep icin sadece en eski bekleyen olay secilir; boylece ayni talebin
+  olaylari sirasiyla gider ve basarisiz bir olay sonrakileri bekletir.
+- Basarisiz olaylar ustel bekleme ile yeniden denenir, MAX_ATTEMPTS'ten sonra
+  "olu" (dead-letter) olarak isaretlenir.
+- Yevveko devre kesicisi acikken batch hic baslatilmaz; batch sirasinda devre
+  acilirsa basarisiz olaylar deneme sayilmadan ertelenir. Uzun bir kesinti
+  boylece hic gonderilmemis olaylari dead-letter'a dusurmez.
+- FOR UPDATE SKIP LOCKED sayesinde birden fazla dagitici cakismadan calisir.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, exists, select
+from sqlalchemy.orm import aliased
+
+from app.database import async_session
+from app.models.outbox import CRMOutboxEvent
+from app.services import yevveko_client
+from app.services.yevveko_client import YevvekoClient
+from app.utils.metrics import metrics
+
+logger = logging.getLogger("evvekocrm.outbox")
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 10
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * (2 ** (attempts - 1)), RETRY_MAX_SECONDS))
+
+
+async def _send(client: YevvekoClient, event: CRMOutboxEvent) -> bool:
+    if event.event_type == "talep_durum":
+        return await client.update_talep_status(event.aggregate_id, event.payload["durum"])
+    logger.error(f"Bilinmeyen outbox olayi: {event.event_type} (#{event.id})")
+    return False
+
+
+async def dispatch_outbox(batch_size: int = BATCH_SIZE) -> dict:
+    """Vadesi gelen bir batch olayi gonderir; gonderilen/basarisiz sayilarini dondurur."""
+    if yevveko_client.breaker.state == "open":
+        metrics.incr("outbox.circuit_open")
+        return {"sent": 0, "failed": 0, "dead": 0, "deferred": 0}
+
+    now = datetime.now()
+    earlier = aliased(CRMOutboxEvent)
+
+    async with async_session() as db:
+        result = await db.execute(
+            select(CRMOutboxEvent)
+            .where(
+                CRMOutboxEvent.status == "beklemede",
+                CRMOutboxEvent.next_attempt_at <= now,
+                ~exists().where(and_(
+                    earlier.aggregate_id == CRMOutboxEvent.aggregate_id,
+                    earlier.status == "beklemede",
+                    earlier.id < CRMOutboxEvent.id,
+                )),
+            )
+            .order_by(CRMOutboxEvent.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        events = result.scalars().all()
+        if not events:
+            return {"sent": 0, "failed": 0, "dead": 0, "deferred": 0}
+
+        client = YevvekoClient()
+        outcomes = await asyncio.gather(
+            *(_send(client, e) for e in events), return_exceptions=True
+        )
+
+        # Devre batch sirasinda acildiysa basarisizliklarin bir kismi hic gonderilmedi
+        breaker = yevveko_client.breaker
+        circuit_tripped = breaker.state != "closed"
+
+        sent = failed = dead = deferred = 0
+        for event, outcome in zip(events, outcomes):
+            if outcome is True:
+                event.status = "gonderildi"
+                event.sent_at = datetime.now()
+                sent += 1
+                continue
+
+            if circuit_tripped and not isinstance(outcome, Exception):
+                event.last_error = "Yevveko devre kesici acik"
+                event.next_attempt_at = datetime.now() + timedelta(seconds=breaker.reset_timeout)
+                deferred += 1
+                continue
+
+            event.attempts += 1
+            event.last_error = repr(outcome) if isinstance(outcome, Exception) else "Yevveko yaniti basarisiz"
+            if event.attempts >= MAX_ATTEMPTS:
+                event.status = "olu"
+                dead += 1
+                logger.error(f"Outbox olayi dead-letter'a alindi: #{event.id} talep={event.aggregate_id}")
+            else:
+                event.next_attempt_at = datetime.now() + _retry_delay(event.attempts)
+                failed += 1
+
+        await db.commit()
+
+    metrics.incr("outbox.sent", sent)
+    metrics.incr("outbox.failed", failed)
+    metrics.incr("outbox.dead", dead)
+    metrics.incr("outbox.deferred", deferred)
+    return {"sent": sent, "failed": failed, "dead": dead, "deferred": deferred}
+
+
+async def drain_outbox(max_batches: int = 20, batch_size: int = BATCH_SIZE) -> dict:
+    """Bekleyen olaylar bitene veya max_batches'e ulasana kadar batch gonderir."""
+    totals = {"sent": 0, "failed": 0, "dead": 0, "deferred": 0}
+    for _ in range(max_batches):
+        stats = await dispatch_outbox(batch_size)
+        for key in totals:
+            totals[key] += stats[key]
+        if stats["sent"] == 0:
+            break
+    return totals
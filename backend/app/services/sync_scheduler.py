@@ -0,0 +1,276 @@
+"""
+Yevveko sync zamanlayicisi.
+
+Her uvicorn worker'i ve Celery bir SyncScheduler calistirabilir; ancak
+Postgres advisory lock'u (session seviyesinde) alan tek surec lider olur ve
+periyodik sync'i yurutur. Diger surecler takipci olarak lock'u beklemeye devam
+eder, lider dustugunde baglantisi kapanir ve lock otomatik olarak serbest kalir.
+
+Ayrica her sync dongusu ayri bir "cycle" lock'u altinda calisir; boylece manuel
+endpoint'ler ve Celery ile lider ayni anda evveko_db'yi taramaz. Paralel
+backfill araliklari ayni lock'u paylasimli (shared) modda tutar: araliklar
+birbirini beklemez, ama bir sync dongusuyle ayni anda calismazlar.
+
+Push modunda (yevveko_push_enabled) lider evveko_db'yi LISTEN ile dinler ve her
+bildirimde hemen uyanir; periyodik dongu sync_catchup_interval_seconds'a duser.
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config import get_settings
+from app.database import engine
+from app.models.sync_run import CRMSyncRun
+from app.services.lead_ingestion import sync_talepler_chunked
+from app.services.yevveko_listener import YevvekoListener
+
+settings = get_settings()
+logger = logging.getLogger("evvekocrm.sync")
+
+# Advisory lock anahtarlari (31 bit; pg_locks.objid ile eslesir)
+LEADER_LOCK_KEY = 0x45564B01
+CYCLE_LOCK_KEY = 0x45564B02
+
+
+async def _autocommit_connection() -> AsyncConnection:
+    # Session seviyesindeki advisory lock'lar commit'ten etkilenmez; AUTOCOMMIT
+    # ile baglanti "idle in transaction" durumunda beklemez.
+    conn = await engine.connect()
+    await conn.execution_options(isolation_level="AUTOCOMMIT")
+    return conn
+
+
+async def _try_lock(conn: AsyncConnection, key: int) -> bool:
+    result = await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})
+    return bool(result.scalar())
+
+
+@asynccontextmanager
+async def sync_cycle_lock(wait: bool = False, shared: bool = False) -> AsyncIterator[bool]:
+    """
+    Tek bir sync dongusu icin lock alir. wait=False iken baska bir surec
+    calisiyorsa beklemeden False verir; wait=True iken lock bosalana kadar bekler.
+    shared=True paylasimli lock alir (backfill araliklari); paylasimli
+    tutucular birbirini engellemez, ozel (exclusive) tutucuyu engeller.
+    """
+    suffix = "_shared" if shared else ""
+    conn = await _autocommit_connection()
+    acquired = False
+    try:
+        if wait:
+            await conn.execute(
+                text(f"SELECT pg_advisory_lock{suffix}(:key)"), {"key": CYCLE_LOCK_KEY}
+            )
+            acquired = True
+        else:
+            result = await conn.execute(
+                text(f"SELECT pg_try_advisory_lock{suffix}(:key)"), {"key": CYCLE_LOCK_KEY}
+            )
+            acquired = bool(result.scalar())
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                await conn.execute(
+                    text(f"SELECT pg_advisory_unlock{suffix}(:key)"), {"key": CYCLE_LOCK_KEY}
+                )
+            except Exception:
+                pass
+        await conn.close()
+
+
+async def sync_cycle_busy() -> bool:
+    """Su an bir sync dongusu veya backfill cycle lock'unu tutuyor mu?"""
+    async with sync_cycle_lock() as acquired:
+        return not acquired
+
+
+async def run_locked_sync(
+    mode: str = "incremental", wait: bool = False
+) -> tuple[bool, CRMSyncRun | None]:
+    """
+    Cycle lock altinda tek bir sync calistirir.
+    (False, None) -> baska bir surec su an sync yapiyor.
+    """
+    async with sync_cycle_lock(wait=wait) as acquired:
+        if not acquired:
+            return False, None
+        return True, await sync_talepler_chunked(mode)
+
+
+async def run_if_no_leader() -> bool:
+    """
+    Lider yoksa (ornegin API calismiyorsa) tek bir sync dongusunu lider lock'u
+    altinda calistirir. Celery beat gibi yedek tetikleyiciler icindir; bir lider
+    varken hicbir sey yapmaz, boylece sync trafigi katlanmaz.
+    """
+    conn = await _autocommit_connection()
+    try:
+        if not await _try_lock(conn, LEADER_LOCK_KEY):
+            return False
+        try:
+            await run_locked_sync("incremental")
+            return True
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LEADER_LOCK_KEY})
+    finally:
+        await conn.close()
+
+
+async def find_leader_pid() -> int | None:
+    """Lider lock'unu tutan Postgres backend pid'ini dondurur."""
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text("""
+                SELECT pid FROM pg_locks
+                WHERE locktype = 'advisory' AND classid = 0
+                  AND objid = :key AND objsubid = 1 AND granted
+            """),
+            {"key": LEADER_LOCK_KEY},
+        )
+        return result.scalar()
+
+
+class SyncScheduler:
+    """Lider secimli periyodik sync dongusu (surec basina bir ornek)."""
+
+    def __init__(self, interval: int | None = None, push_enabled: bool | None = None):
+        self.push_enabled = (
+            settings.yevveko_push_enabled if push_enabled is None else push_enabled
+        )
+        default_interval = (
+            settings.sync_catchup_interval_seconds
+            if self.push_enabled
+            else settings.sync_interval_seconds
+        )
+        self.interval = interval or default_interval
+        self.role = "follower"
+        self.last_run_at: datetime | None = None
+        self.last_created = 0
+        self.last_error: str | None = None
+        self.next_run_at: datetime | None = None
+        self._conn: AsyncConnection | None = None
+        self._wakeup = asyncio.Event()
+        self._listener: YevvekoListener | None = None
+        self._listener_task: asyncio.Task | None = None
+
+    def wake(self, talep_id: int | None = None) -> None:
+        """Bir sonraki dongunun beklemeden baslamasini saglar."""
+        self._wakeup.set()
+
+    def _start_listener(self) -> None:
+        if not self.push_enabled or self._listener_task is not None:
+            return
+        self._listener = YevvekoListener(on_notify=self.wake)
+        self._listener_task = asyncio.create_task(self._listener.run_forever())
+
+    async def _stop_listener(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener_task = None
+
+    async def _release_connection(self) -> None:
+        if self._conn is not None:
+            try:
+                await self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    async def _ensure_leadership(self) -> bool:
+        """Lider ise baglantiyi dogrular, degilse lock almayi dener."""
+        try:
+            if self._conn is None:
+                self._conn = await _autocommit_connection()
+
+            if self.role == "leader":
+                await self._conn.execute(text("SELECT 1"))
+                return True
+
+            if await _try_lock(self._conn, LEADER_LOCK_KEY):
+                self.role = "leader"
+                logger.info(f"Sync lideri secildi (pid={os.getpid()})")
+                self._start_listener()
+                return True
+
+            # Takipci: baglantiyi acik tutmaya gerek yok
+            await self._release_connection()
+            return False
+        except Exception as e:
+            # Baglanti koptuysa lock Postgres tarafinda zaten birakilmistir
+            if self.role == "leader":
+                logger.warning(f"Sync liderligi kaybedildi: {e}")
+            self.role = "follower"
+            await self._stop_listener()
+            await self._release_connection()
+            return False
+
+    async def run_cycle(self) -> None:
+        acquired, run = await run_locked_sync("incremental")
+        if not acquired:
+            return
+
+        self.last_run_at = datetime.now()
+        self.last_created = run.created if run else 0
+        self.last_error = None
+        if self.last_created > 0:
+            logger.info(f"Otomatik sync: {self.last_created} yeni talep eklendi")
+
+    async def run_forever(self) -> None:
+        mode = "push + catch-up" if self.push_enabled else "polling"
+        logger.info(f"Yevveko sync zamanlayicisi basladi ({mode}, {self.interval}sn aralikla)")
+
+        while True:
+            # Dongu sirasinda gelen bildirimler yeni bir tur tetiklesin diye once temizlenir
+            self._wakeup.clear()
+            if await self._ensure_leadership():
+                try:
+                    await self.run_cycle()
+                except Exception as e:
+                    self.last_error = str(e)
+                    logger.error(f"Otomatik sync hatasi: {e}")
+
+            self.next_run_at = datetime.now() + timedelta(seconds=self.interval)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self) -> None:
+        await self._stop_listener()
+        if self.role == "leader" and self._conn is not None:
+            try:
+                await self._conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": LEADER_LOCK_KEY}
+                )
+            except Exception:
+                pass
+        self.role = "follower"
+        await self._release_connection()
+
+    def status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "role": self.role,
+            "interval_seconds": self.interval,
+            "last_run_at": self.last_run_at,
+            "last_created": self.last_created,
+            "last_error": self.last_error,
+            "next_run_at": self.next_run_at,
+            "push_enabled": self.push_enabled,
+            "listener": self._listener.status() if self._listener else None,
+        }
+
+
+scheduler = SyncScheduler()
@@ -0,0 +1,99 @@
+"""
+Webhook talep kuyrugu.
+
+/sync/webhook/yeni-talep gelen talep id'sini kuyruga birakip hemen doner.
+Tuketici kisa bir pencere icinde biriken id'leri birlestirir, evveko_db'den
+tek sorguyla (WHERE t.id = ANY(:ids)) ceker ve toplu olarak yazar.
+Kuyruk surec icidir; surec coker ve kuyruktakiler kaybolursa periyodik
+sync bunlari yakalar.
+"""
+
+import asyncio
+import logging
+import time
+
+from app.database import async_session
+from app.services.dedup import detect_duplicates
+from app.services.lead_ingestion import upsert_talepler
+from app.services.yevveko_db_sync import fetch_talepler_by_ids
+from app.utils.metrics import metrics
+
+logger = logging.getLogger("evvekocrm.sync")
+
+# Birlestirme penceresi (saniye) ve batch ust siniri
+BATCH_WINDOW_SECONDS = 0.2
+MAX_BATCH_SIZE = 500
+MAX_QUEUE_SIZE = 10000
+
+
+class TalepIntakeQueue:
+    def __init__(
+        self,
+        window: float = BATCH_WINDOW_SECONDS,
+        max_batch: int = MAX_BATCH_SIZE,
+        maxsize: int = MAX_QUEUE_SIZE,
+    ):
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue[int] = asyncio.Queue(maxsize=maxsize)
+        metrics.register_gauge("webhook.queue_depth", self._queue.qsize)
+
+    def submit(self, talep_id: int) -> bool:
+        """Talebi kuyruga ekler; kuyruk doluysa False doner."""
+        try:
+            self._queue.put_nowait(talep_id)
+        except asyncio.QueueFull:
+            metrics.incr("webhook.rejected")
+            return False
+        metrics.incr("webhook.received")
+        return True
+
+    async def _collect_batch(self) -> list[int]:
+        loop = asyncio.get_running_loop()
+        ids = {await self._queue.get()}
+        deadline = loop.time() + self.window
+
+        while len(ids) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                ids.add(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return sorted(ids)
+
+    async def process(self, talep_ids: list[int]) -> int:
+        """Verilen talepleri tek sorguda ceker ve toplu yazar; eklenen sayisini dondurur."""
+        started = time.perf_counter()
+        talepler = await fetch_talepler_by_ids(talep_ids)
+
+        async with async_session() as db:
+            result = await upsert_talepler(db, talepler)
+            await detect_duplicates(db, result.created_lead_ids)
+            await db.commit()
+
+        missing = len(talep_ids) - len(talepler)
+        if missing:
+            metrics.incr("webhook.not_found", missing)
+            logger.warning(f"Webhook: {missing} talep evveko_db'de bulunamadi")
+
+        metrics.incr("webhook.batches")
+        metrics.incr("webhook.created", result.created)
+        metrics.set_gauge("webhook.last_batch_size", len(talep_ids))
+        metrics.observe("webhook.batch_size", len(talep_ids))
+        metrics.observe("webhook.batch_seconds", time.perf_counter() - started)
+        return result.created
+
+    async def run_forever(self) -> None:
+        while True:
+            talep_ids = await self._collect_batch()
+            try:
+                await self.process(talep_ids)
+            except Exception as e:
+                metrics.incr("webhook.errors")
+                logger.error(f"Webhook batch hatasi ({len(talep_ids)} talep): {e}")
+
+
+intake_queue = TalepIntakeQueue()
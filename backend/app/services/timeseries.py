@@ -0,0 +1,276 @@
+"""
+Saatlik zaman serisi rollup'lari (lead, arama, randevu).
+
+Her satir degismez bir saate baglidir: lead ve randevu icin created_at, arama
+icin started_at. Guncel durum (status) da boyuttur; durum degisince satirin
+saati ayni kalir, sadece o saatin sayilari degisir.
+
+refresh_timeseries() artimli calisir: watermark'tan sonra degisen kaynak
+satirlarinin (lead/randevu icin updated_at, arama icin id) saatleri "kirli"
+kabul edilir ve sadece bu saatler kaynaktan silinip yeniden hesaplanir.
+Yeniden hesaplama idempotenttir; yarida kalan bir calisma tekrarlanabilir.
+Uzun suren transaction'larin updated_at'i (transaction baslangici) watermark'in
+gerisinde kalmasin diye ust sinir simdiden SAFETY_LAG kadar geridedir.
+
+Silinen kaynak satirlari artimli olarak yakalanmaz; gerekirse bir aralik
+bastan hesaplanir (ornegin son 30 gun):
+    python -m app.services.timeseries 30
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from typing import Literal
+
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models.rollup import CRMAppointmentHourlyRollup, CRMCallHourlyRollup, CRMLeadHourlyRollup
+from app.models.sync_state import CRMSyncState
+
+# Bu kadar yeni degisiklikler bir sonraki calismaya birakilir
+SAFETY_LAG = timedelta(minutes=2)
+
+# Tek statement'ta yeniden hesaplanan saat sayisi
+BUCKET_BATCH = 500
+
+Granularity = Literal["hour", "day", "week", "month"]
+
+# Yaklasik nokta uzunlugu; sorgu basina nokta sayisini sinirlamak icin
+GRANULARITY_STEP = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=28),
+}
+MAX_POINTS = 2000
+
+
+class _Series:
+    """Bir rollup tablosu: kirli saat tespiti ve saat bazinda yeniden hesaplama SQL'i."""
+
+    def __init__(self, name: str, table: str, dirty_sql: str, recompute_sql: str, by_id: bool):
+        self.name = name
+        self.table = table
+        self.state_source = f"timeseries:{name}"
+        self.dirty_sql = text(dirty_sql)
+        self.recompute_sql = text(recompute_sql)
+        self.by_id = by_id
+
+
+_LEADS = _Series(
+    "leads",
+    "crm_lead_hourly_rollups",
+    """
+    SELECT DISTINCT date_trunc('hour', created_at) FROM crm_leads
+    WHERE updated_at > :since AND updated_at <= :until
+    """,
+    """
+    INSERT INTO crm_lead_hourly_rollups
+        (bucket, ilce, source, status, lead_count,
+         first_call_count, first_call_seconds, sla_met_count, updated_at)
+    SELECT b.bucket, l.ilce, l.source, l.status, count(*),
+           count(l.ilk_arama_yapildi_at),
+           coalesce(sum(extract(epoch FROM l.ilk_arama_yapildi_at - l.created_at)), 0)::bigint,
+           count(*) FILTER (WHERE l.ilk_arama_yapildi_at <= l.ilk_arama_deadline),
+           now()
+    FROM unnest(CAST(:buckets AS timestamp[])) AS b(bucket)
+    JOIN crm_leads l ON l.created_at >= b.bucket AND l.created_at < b.bucket + interval '1 hour'
+    GROUP BY b.bucket, l.ilce, l.source, l.status
+    """,
+    by_id=False,
+)
+
+# Arama kayitlari guncellenmez; yeni kayitlar id ile izlenir
+_CALLS = _Series(
+    "calls",
+    "crm_call_hourly_rollups",
+    """
+    SELECT DISTINCT date_trunc('hour', started_at) FROM crm_call_logs
+    WHERE id > :since AND id <= :until
+    """,
+    """
+    INSERT INTO crm_call_hourly_rollups
+        (bucket, call_type, result_code, call_count, duration_seconds, updated_at)
+    SELECT b.bucket, c.call_type, c.result_code, count(*),
+           coalesce(sum(c.duration_seconds), 0), now()
+    FROM unnest(CAST(:buckets AS timestamp[])) AS b(bucket)
+    JOIN crm_call_logs c ON c.started_at >= b.bucket AND c.started_at < b.bucket + interval '1 hour'
+    GROUP BY b.bucket, c.call_type, c.result_code
+    """,
+    by_id=True,
+)
+
+_APPOINTMENTS = _Series(
+    "appointments",
+    "crm_appointment_hourly_rollups",
+    """
+    SELECT DISTINCT date_trunc('hour', created_at) FROM crm_appointments
+    WHERE updated_at > :since AND updated_at <= :until
+    """,
+    """
+    INSERT INTO crm_appointment_hourly_rollups
+        (bucket, office_id, status, appointment_count, updated_at)
+    SELECT b.bucket, a.franchise_office_id, a.status, count(*), now()
+    FROM unnest(CAST(:buckets AS timestamp[])) AS b(bucket)
+    JOIN crm_appointments a ON a.created_at >= b.bucket AND a.created_at < b.bucket + interval '1 hour'
+    GROUP BY b.bucket, a.franchise_office_id, a.status
+    """,
+    by_id=False,
+)
+
+SERIES = (_LEADS, _CALLS, _APPOINTMENTS)
+
+
+async def _recompute_buckets(db: AsyncSession, series: _Series, buckets: list[datetime]) -> None:
+    """Verilen saatleri silip kaynaktan yeniden yazar; her batch kendi transaction'inda."""
+    for i in range(0, len(buckets), BUCKET_BATCH):
+        batch = buckets[i:i + BUCKET_BATCH]
+        await db.execute(
+            text(f"DELETE FROM {series.table} WHERE bucket = ANY(CAST(:buckets AS timestamp[]))"),
+            {"buckets": batch},
+        )
+        await db.execute(series.recompute_sql, {"buckets": batch})
+        await db.commit()
+
+
+async def _save_watermark(db: AsyncSession, series: _Series, last_id: int, last_updated_at: datetime | None) -> None:
+    stmt = insert(CRMSyncState).values(
+        source=series.state_source, last_id=last_id, last_updated_at=last_updated_at
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CRMSyncState.source],
+        set_={"last_id": stmt.excluded.last_id, "last_updated_at": stmt.excluded.last_updated_at},
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+
+async def _refresh_series(db: AsyncSession, series: _Series, now: datetime) -> int:
+    state = await db.get(CRMSyncState, series.state_source)
+    upper_time = now - SAFETY_LAG
+
+    if series.by_id:
+        since = state.last_id if state else 0
+        until = (await db.execute(
+            text("SELECT coalesce(max(id), 0) FROM crm_call_logs WHERE created_at <= :until"),
+            {"until": upper_time},
+        )).scalar_one()
+        until = max(until, since)
+    else:
+        since = state.last_updated_at if state and state.last_updated_at else datetime.min
+        until = max(upper_time, since)
+
+    result = await db.execute(series.dirty_sql, {"since": since, "until": until})
+    buckets = sorted(b for (b,) in result.all())
+    await _recompute_buckets(db, series, buckets)
+
+    # Watermark ancak tum kirli saatler yazildiktan sonra ilerler
+    if series.by_id:
+        await _save_watermark(db, series, until, None)
+    else:
+        await _save_watermark(db, series, 0, until)
+    return len(buckets)
+
+
+async def refresh_timeseries(now: datetime | None = None) -> dict:
+    """Son calismadan beri degisen saatleri tum seriler icin yeniden hesaplar."""
+    now = now or datetime.now()
+    async with async_session() as db:
+        return {series.name: await _refresh_series(db, series, now) for series in SERIES}
+
+
+def rebuild_buckets(days: int, now: datetime) -> list[datetime]:
+    """Icinde bulunulan saat dahil son days*24 saatin baslangiclari (artan sirada)."""
+    end = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    return [end - timedelta(hours=h) for h in range(days * 24, 0, -1)]
+
+
+async def rebuild_timeseries(days: int, now: datetime | None = None) -> dict:
+    """Son days gunun tum saatlerini (silinen kaynak satirlari dahil) bastan hesaplar."""
+    buckets = rebuild_buckets(days, now or datetime.now())
+    async with async_session() as db:
+        for series in SERIES:
+            await _recompute_buckets(db, series, buckets)
+    end = buckets[-1] + timedelta(hours=1)
+    return {"start": buckets[0].isoformat(), "end": end.isoformat(), "buckets": len(buckets)}
+
+
+# Okuma: metrik -> (tablo, deger ifadesi, gruplanabilir boyutlar)
+def _metric(metric: str):
+    L, C, A = CRMLeadHourlyRollup, CRMCallHourlyRollup, CRMAppointmentHourlyRollup
+    lead_dims = {"ilce": L.ilce, "source": L.source, "status": L.status}
+    call_dims = {"call_type": C.call_type, "result_code": C.result_code}
+    appointment_dims = {"office_id": A.office_id, "status": A.status}
+    metrics = {
+        "leads": (L, func.sum(L.lead_count), lead_dims),
+        "first_call_minutes": (
+            L,
+            func.sum(L.first_call_seconds) / func.nullif(func.sum(L.first_call_count), 0) / 60.0,
+            lead_dims,
+        ),
+        "sla_rate": (
+            L,
+            func.sum(L.sla_met_count) * 100.0 / func.nullif(func.sum(L.lead_count), 0),
+            lead_dims,
+        ),
+        "calls": (C, func.sum(C.call_count), call_dims),
+        "call_seconds_avg": (
+            C,
+            func.sum(C.duration_seconds) * 1.0 / func.nullif(func.sum(C.call_count), 0),
+            call_dims,
+        ),
+        "appointments": (A, func.sum(A.appointment_count), appointment_dims),
+    }
+    return metrics[metric]
+
+
+METRICS = ("leads", "first_call_minutes", "sla_rate", "calls", "call_seconds_avg", "appointments")
+
+
+def metric_dimensions(metric: str) -> tuple[str, ...]:
+    return tuple(_metric(metric)[2])
+
+
+async def read_timeseries(
+    db: AsyncSession,
+    metric: str,
+    start: datetime,
+    end: datetime,
+    granularity: Granularity = "day",
+    group_by: str | None = None,
+    filters: dict | None = None,
+) -> list[dict]:
+    """[start, end) araligi icin {"t", "group", "value"} noktalari (zamana gore sirali)."""
+    table, value, dims = _metric(metric)
+    if granularity not in GRANULARITY_STEP:
+        raise ValueError(f"Gecersiz cozunurluk: {granularity}")
+    # Bind parametresi SELECT ve GROUP BY'da ayri parametre olur; PG ayni ifade saymaz
+    t = func.date_trunc(literal_column(f"'{granularity}'"), table.bucket).label("t")
+    group = dims[group_by].label("group") if group_by else None
+
+    query = select(t, *([group] if group is not None else []), value.label("value")).where(
+        table.bucket >= start, table.bucket < end
+    )
+    for name, wanted in (filters or {}).items():
+        query = query.where(dims[name] == wanted)
+    query = query.group_by(*([t, group] if group is not None else [t])).order_by(t)
+
+    result = await db.execute(query)
+    return [
+        {
+            "t": row.t,
+            "group": str(row.group) if group is not None else None,
+            "value": round(float(row.value), 2) if row.value is not None else None,
+        }
+        for row in result
+    ]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(asyncio.run(rebuild_timeseries(int(sys.argv[1]))))
+    else:
+        print(asyncio.run(refresh_timeseries()))
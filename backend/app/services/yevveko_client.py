@@ -1,62 +1,200 @@
+"""
+Yevveko API HTTP client'i.
+
+Surec basina tek bir httpx.AsyncClient (keep-alive havuzu, istege bagli HTTP/2)
+kullanilir. Istekler eszamanlilik sinirina, jitter'li yeniden denemeye ve bir
+devre kesiciye (circuit breaker) tabidir; endpoint bazinda sureler /metrics'e yazilir.
+"""
+
+import asyncio
+import logging
+import random
+import time
 from typing import Optional
 
 import httpx
 
 from app.config import get_settings
+from app.utils.metrics import metrics
 
 settings = get_settings()
+logger = logging.getLogger("evvekocrm.yevveko")
+
+# Yeniden denemede ilk bekleme (saniye); her denemede ikiye katlanir
+RETRY_BACKOFF_BASE = 0.2
+RETRY_BACKOFF_MAX = 5.0
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+class CircuitBreaker:
+    """Ardisik hatalardan sonra istekleri bir sure keser, sonra tek denemeye izin verir."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        # half_open'da gonderilmis ve sonucu beklenen deneme
+        self.probe_started_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open":
+            return False
+        # half_open: tek deneme; sonucu gelmeyen (iptal edilen) deneme reset_timeout sonra duser
+        now = time.monotonic()
+        if self.probe_started_at is not None and now - self.probe_started_at < self.reset_timeout:
+            return False
+        self.probe_started_at = now
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold or self.state == "half_open":
+            self.opened_at = time.monotonic()
+        self.probe_started_at = None
+
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.yevveko_breaker_threshold,
+    reset_timeout=settings.yevveko_breaker_reset_seconds,
+)
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_semaphore: asyncio.Semaphore | None = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Surecin paylasilan client'ini dondurur (event loop degistiyse yeniden olusturur)."""
+    global _client, _client_loop, _semaphore
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        http2 = settings.yevveko_http2 and _http2_available()
+        if settings.yevveko_http2 and not http2:
+            logger.warning("HTTP/2 icin 'h2' paketi kurulu degil, HTTP/1.1 kullaniliyor")
+
+        _client = httpx.AsyncClient(
+            base_url=settings.yevveko_api_url,
+            headers={"X-API-Key": settings.yevveko_crm_api_key},
+            timeout=settings.yevveko_http_timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.yevveko_http_max_connections,
+                max_keepalive_connections=settings.yevveko_http_max_connections,
+            ),
+        )
+        _client_loop = loop
+        _semaphore = asyncio.Semaphore(settings.yevveko_http_max_concurrency)
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
 
 
 class YevvekoClient:
     """Yevveko API'ye baglanan HTTP client."""
 
-    def __init__(self):
-        self.base_url = settings.yevveko_api_url
-        self.api_key = settings.yevveko_crm_api_key
-        self.headers = {"X-API-Key": self.api_key}
+    def __init__(self, client: httpx.AsyncClient | None = None, retries: int | None = None):
+        # Testlerde ozel client (ornegin MockTransport) verilebilir
+        self._client = client
+        self.retries = settings.yevveko_http_retries if retries is None else retries
+
+    async def _request(
+        self, endpoint: str, method: str, path: str, **kwargs
+    ) -> Optional[httpx.Response]:
+        """Istegi yeniden deneme ve devre kesici ile gonderir; basarisizsa None doner."""
+        if not breaker.allow():
+            metrics.incr(f"yevveko.{endpoint}.circuit_open")
+            return None
+
+        client = self._client or get_http_client()
+        semaphore = _semaphore if self._client is None else None
+        error = None
+
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            try:
+                if semaphore is not None:
+                    async with semaphore:
+                        response = await client.request(method, path, **kwargs)
+                else:
+                    response = await client.request(method, path, **kwargs)
+            except httpx.RequestError as e:
+                error = repr(e)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES and response.status_code < 500:
+                    metrics.observe(f"yevveko.{endpoint}.seconds", time.perf_counter() - started)
+                    breaker.record_success()
+                    return response
+                error = f"HTTP {response.status_code}"
+
+            metrics.observe(f"yevveko.{endpoint}.seconds", time.perf_counter() - started)
+            metrics.incr(f"yevveko.{endpoint}.errors")
+            if attempt < self.retries:
+                # Full jitter: 0 ile ustel sinir arasinda rastgele bekle
+                cap = min(RETRY_BACKOFF_BASE * (2 ** attempt), RETRY_BACKOFF_MAX)
+                await asyncio.sleep(random.uniform(0, cap))
+
+        breaker.record_failure()
+        logger.warning(f"Yevveko {endpoint} basarisiz ({self.retries + 1} deneme): {error}")
+        return None
 
     async def get_talep(self, talep_id: int) -> Optional[dict]:
         """Yevveko'dan tek talep detayini ceker."""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.base_url}/crm/talep/{talep_id}",
-                    headers=self.headers,
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("ok"):
-                        return data.get("talep")
-        except httpx.RequestError:
-            pass
+        response = await self._request("get_talep", "GET", f"/crm/talep/{talep_id}")
+        if response is not None and response.status_code == 200:
+            data = response.json()
+            if data.get("ok"):
+                return data.get("talep")
         return None
 
     async def get_new_talepler(self, since_id: int = 0) -> list[dict]:
         """Son sync'ten sonra olusan talepleri ceker."""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.base_url}/crm/talepler",
-                    params={"since_id": since_id},
-                    headers=self.headers,
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("ok"):
-                        return data.get("talepler", [])
-        except httpx.RequestError:
-            pass
+        response = await self._request(
+            "get_new_talepler", "GET", "/crm/talepler", params={"since_id": since_id}
+        )
+        if response is not None and response.status_code == 200:
+            data = response.json()
+            if data.get("ok"):
+                return data.get("talepler", [])
         return []
 
     async def update_talep_status(self, talep_id: int, status: str) -> bool:
         """Yevveko'daki talep durumunu gunceller."""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/crm/talep/{talep_id}/durum",
-                    json={"durum": status},
-                    headers=self.headers,
-                )
-                return response.status_code == 200
-        except httpx.RequestError:
-            return False
+        response = await self._request(
+            "update_talep_status",
+            "POST",
+            f"/crm/talep/{talep_id}/durum",
+            json={"durum": status},
+        )
+        return response is not None and response.status_code == 200
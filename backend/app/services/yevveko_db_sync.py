@@ -3,7 +3,8 @@ Yevveko evveko_db veritabanından dogrudan talep verilerini ceken servis.
 Ayni sunucuda oldugu icin API yerine direkt DB baglantisi kullanir.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import AsyncIterator
 
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
@@ -16,86 +17,205 @@ settings = get_settings()
 yevveko_engine = create_async_engine(settings.yevveko_database_url, echo=False)
 yevveko_session = async_sessionmaker(yevveko_engine, class_=AsyncSession, expire_on_commit=False)
 
+# Talep sayfasi boyutu (keyset pagination)
+DEFAULT_CHUNK_SIZE = 1000
+
+_TALEP_SELECT = """
+    SELECT
+        t.id,
+        u.first_name,
+        u.last_name,
+        u.phone_number,
+        u.email,
+        t.ilce,
+        t.mahalle,
+        t.sokak,
+        t.kapi_no,
+        t.ada,
+        t.parsel,
+        t.bina_alani,
+        t.bagimsiz_bolum_sayisi,
+        t.donusum_tipi,
+        t.inceleme_durumu,
+        t.created_at,
+        t.updated_at
+    FROM kentsel_donusum_talebi t
+    LEFT JOIN tbl_users u ON t.user_id = u.user_id
+"""
+
+
+def _row_to_talep(row) -> dict:
+    first_name = row.first_name or ""
+    last_name = row.last_name or ""
+    customer_name = f"{first_name} {last_name}".strip() or None
+
+    return {
+        "talep_id": row.id,
+        "customer_name": customer_name,
+        "customer_phone": row.phone_number,
+        "customer_email": row.email,
+        "ilce": row.ilce or "Bilinmiyor",
+        "mahalle": row.mahalle,
+        "sokak": row.sokak,
+        "kapi_no": row.kapi_no,
+        "ada": row.ada,
+        "parsel": row.parsel,
+        "bina_alani": row.bina_alani,
+        "bagimsiz_bolum_sayisi": row.bagimsiz_bolum_sayisi,
+        "donusum_tipi": row.donusum_tipi,
+        "inceleme_durumu": row.inceleme_durumu,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    }
+
 
 async def fetch_talepler_from_yevveko(since_id: int = 0) -> list[dict]:
     """evveko_db'den talepleri dogrudan SQL ile ceker."""
+    talepler = []
+    async for chunk in iter_talep_chunks(since_id=since_id):
+        talepler.extend(chunk)
+    return talepler
+
+
+async def iter_talep_chunks(
+    since_id: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    until_id: int | None = None,
+) -> AsyncIterator[list[dict]]:
+    """
+    since_id'den sonraki talepleri id sirasiyla sayfa sayfa dondurur.
+
+    Her sayfa kendi kisa oturumunda (WHERE t.id > :last ORDER BY t.id LIMIT :n)
+    okunur; kaynak tablo bellege alinmaz ve uzun transaction acik kalmaz.
+    until_id verilirse sadece id <= until_id olan talepler okunur.
+    """
+    upper = "AND t.id <= :until_id" if until_id is not None else ""
+    query = text(_TALEP_SELECT + f"""
+        WHERE t.id > :last_id {upper}
+        ORDER BY t.id ASC
+        LIMIT :limit
+    """)
+
+    last_id = since_id
+    while True:
+        params = {"last_id": last_id, "limit": chunk_size}
+        if until_id is not None:
+            params["until_id"] = until_id
+
+        async with yevveko_session() as session:
+            result = await session.execute(query, params)
+            rows = result.fetchall()
+
+        if not rows:
+            return
+
+        yield [_row_to_talep(row) for row in rows]
+
+        last_id = rows[-1].id
+        if len(rows) < chunk_size:
+            return
+
+
+async def iter_updated_talep_chunks(
+    since: datetime,
+    max_id: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> AsyncIterator[list[dict]]:
+    """
+    updated_at'i since'tan buyuk olan (id <= max_id) mevcut talepleri
+    (updated_at, id) sirasiyla sayfa sayfa dondurur.
+    """
+    query = text(_TALEP_SELECT + """
+        WHERE t.id <= :max_id
+          AND (t.updated_at, t.id) > (:last_updated_at, :last_id)
+        ORDER BY t.updated_at ASC, t.id ASC
+        LIMIT :limit
+    """)
+
+    last_updated_at, last_id = since, 0
+    while True:
+        async with yevveko_session() as session:
+            result = await session.execute(query, {
+                "max_id": max_id,
+                "last_updated_at": last_updated_at,
+                "last_id": last_id,
+                "limit": chunk_size,
+            })
+            rows = result.fetchall()
+
+        if not rows:
+            return
+
+        yield [_row_to_talep(row) for row in rows]
+
+        last_updated_at, last_id = rows[-1].updated_at, rows[-1].id
+        if len(rows) < chunk_size:
+            return
+
+
+async def fetch_max_updated_at() -> datetime | None:
+    """Kaynak tablodaki en son updated_at degerini dondurur."""
+    async with yevveko_session() as session:
+        result = await session.execute(
+            text("SELECT max(updated_at) FROM kentsel_donusum_talebi")
+        )
+        return result.scalar()
+
+
+async def fetch_talep_bounds(since_id: int = 0) -> tuple[int, int]:
+    """since_id'den sonraki talep sayisini ve en buyuk talep id'sini dondurur."""
     query = text("""
-        SELECT
-            t.id,
-            u.first_name,
-            u.last_name,
-            u.phone_number,
-            u.email,
-            t.ilce,
-            t.mahalle,
-            t.sokak,
-            t.kapi_no,
-            t.ada,
-            t.parsel,
-            t.bina_alani,
-            t.bagimsiz_bolum_sayisi,
-            t.donusum_tipi,
-            t.inceleme_durumu,
-            t.created_at
-        FROM kentsel_donusum_talebi t
-        LEFT JOIN tbl_users u ON t.user_id = u.user_id
-        WHERE t.id > :since_id
+        SELECT count(*) AS total, coalesce(max(id), 0) AS max_id
+        FROM kentsel_donusum_talebi
+        WHERE id > :since_id
+    """)
+
+    async with yevveko_session() as session:
+        row = (await session.execute(query, {"since_id": since_id})).one()
+
+    return row.total, row.max_id
+
+
+async def fetch_talep_id_range() -> tuple[int, int]:
+    """Kaynak tablodaki en kucuk ve en buyuk talep id'sini dondurur."""
+    async with yevveko_session() as session:
+        row = (await session.execute(text(
+            "SELECT coalesce(min(id), 0) AS min_id, coalesce(max(id), 0) AS max_id "
+            "FROM kentsel_donusum_talebi"
+        ))).one()
+    return row.min_id, row.max_id
+
+
+async def count_talepler(low_id: int, high_id: int) -> int:
+    """low_id <= id <= high_id araligindaki talep sayisini dondurur."""
+    async with yevveko_session() as session:
+        result = await session.execute(
+            text("SELECT count(*) FROM kentsel_donusum_talebi WHERE id BETWEEN :low AND :high"),
+            {"low": low_id, "high": high_id},
+        )
+    return result.scalar() or 0
+
+
+async def fetch_talepler_by_ids(talep_ids: list[int]) -> list[dict]:
+    """evveko_db'den verilen id'lerdeki talepleri tek sorguda ceker."""
+    if not talep_ids:
+        return []
+
+    query = text(_TALEP_SELECT + """
+        WHERE t.id = ANY(:ids)
         ORDER BY t.id ASC
     """)
 
     async with yevveko_session() as session:
-        result = await session.execute(query, {"since_id": since_id})
+        result = await session.execute(query, {"ids": list(talep_ids)})
         rows = result.fetchall()
 
-    talepler = []
-    for row in rows:
-        first_name = row.first_name or ""
-        last_name = row.last_name or ""
-        customer_name = f"{first_name} {last_name}".strip() or None
-
-        talepler.append({
-            "talep_id": row.id,
-            "customer_name": customer_name,
-            "customer_phone": row.phone_number,
-            "customer_email": row.email,
-            "ilce": row.ilce or "Bilinmiyor",
-            "mahalle": row.mahalle,
-            "sokak": row.sokak,
-            "kapi_no": row.kapi_no,
-            "ada": row.ada,
-            "parsel": row.parsel,
-            "bina_alani": row.bina_alani,
-            "bagimsiz_bolum_sayisi": row.bagimsiz_bolum_sayisi,
-            "donusum_tipi": row.donusum_tipi,
-            "inceleme_durumu": row.inceleme_durumu,
-            "created_at": row.created_at,
-        })
-
-    return talepler
+    return [_row_to_talep(row) for row in rows]
 
 
 async def fetch_single_talep(talep_id: int) -> dict | None:
     """evveko_db'den tek bir talep ceker."""
-    query = text("""
-        SELECT
-            t.id,
-            u.first_name,
-            u.last_name,
-            u.phone_number,
-            u.email,
-            t.ilce,
-            t.mahalle,
-            t.sokak,
-            t.kapi_no,
-            t.ada,
-            t.parsel,
-            t.bina_alani,
-            t.bagimsiz_bolum_sayisi,
-            t.donusum_tipi,
-            t.inceleme_durumu,
-            t.created_at
-        FROM kentsel_donusum_talebi t
-        LEFT JOIN tbl_users u ON t.user_id = u.user_id
+    query = text(_TALEP_SELECT + """
         WHERE t.id = :talep_id
     """)
 
@@ -106,24 +226,4 @@ async def fetch_single_talep(talep_id: int) -> dict | None:
     if not row:
         return None
 
-    first_name = row.first_name or ""
-    last_name = row.last_name or ""
-    customer_name = f"{first_name} {last_name}".strip() or None
-
-    return {
-        "talep_id": row.id,
-        "customer_name": customer_name,
-        "customer_phone": row.phone_number,
-        "customer_email": row.email,
-        "ilce": row.ilce or "Bilinmiyor",
-        "mahalle": row.mahalle,
-        "sokak": row.sokak,
-        "kapi_no": row.kapi_no,
-        "ada": row.ada,
-        "parsel": row.parsel,
-        "bina_alani": row.bina_alani,
-        "bagimsiz_bolum_sayisi": row.bagimsiz_bolum_sayisi,
-        "donusum_tipi": row.donusum_tipi,
-        "inceleme_durumu": row.inceleme_durumu,
-        "created_at": row.created_at,
-    }
+    return _row_to_talep(row)
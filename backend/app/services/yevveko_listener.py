@@ -0,0 +1,135 @@
+"""
+evveko_db push modu: kentsel_donusum_talebi uzerindeki trigger yeni veya
+guncellenen talepte pg_notify yapar, bu modul asyncpg ile kanali dinleyip
+sync lideri uyandirir. Periyodik polling daha seyrek bir yakalama (catch-up) agi olarak kalir.
+
+Trigger kurulumu: python -m app.services.yevveko_listener install-trigger
+"""
+
+import asyncio
+import logging
+import random
+from datetime import datetime
+from typing import Callable
+
+import asyncpg
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.services.yevveko_db_sync import yevveko_engine
+
+settings = get_settings()
+logger = logging.getLogger("evvekocrm.sync")
+
+# Yeniden baglanma bekleme sureleri (saniye)
+BACKOFF_INITIAL = 1.0
+BACKOFF_MAX = 60.0
+
+
+def _trigger_sql(channel: str) -> list[str]:
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION crm_notify_talep() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{channel}', NEW.id::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS crm_notify_talep ON kentsel_donusum_talebi",
+        """
+        CREATE TRIGGER crm_notify_talep
+        AFTER INSERT OR UPDATE ON kentsel_donusum_talebi
+        FOR EACH ROW EXECUTE FUNCTION crm_notify_talep()
+        """,
+    ]
+
+
+async def install_notify_trigger(channel: str | None = None) -> None:
+    """evveko_db'ye NOTIFY trigger'ini kurar (idempotent)."""
+    channel = channel or settings.yevveko_notify_channel
+    async with yevveko_engine.begin() as conn:
+        for statement in _trigger_sql(channel):
+            await conn.execute(text(statement))
+
+
+def _asyncpg_dsn(url: str) -> str:
+    # SQLAlchemy URL'sini asyncpg'nin anladigi DSN'e cevirir
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+class YevvekoListener:
+    """LISTEN baglantisini acik tutar, koparsa backoff ile yeniden baglanir."""
+
+    def __init__(self, on_notify: Callable[[int | None], None], channel: str | None = None):
+        self.on_notify = on_notify
+        self.channel = channel or settings.yevveko_notify_channel
+        self.dsn = _asyncpg_dsn(settings.yevveko_database_url)
+        self.connected = False
+        self.reconnects = 0
+        self.notifications = 0
+        self.last_notification_at: datetime | None = None
+
+    def _handle(self, connection, pid, channel, payload) -> None:
+        self.notifications += 1
+        self.last_notification_at = datetime.now()
+        try:
+            talep_id = int(payload)
+        except (TypeError, ValueError):
+            talep_id = None
+        self.on_notify(talep_id)
+
+    async def _listen_once(self) -> None:
+        conn = await asyncpg.connect(self.dsn)
+        closed = asyncio.Event()
+        conn.add_termination_listener(lambda c: closed.set())
+        try:
+            await conn.add_listener(self.channel, self._handle)
+            self.connected = True
+            logger.info(f"evveko_db LISTEN {self.channel} aktif")
+            # Baglanti kopana kadar bekle
+            await closed.wait()
+        finally:
+            self.connected = False
+            if not conn.is_closed():
+                await conn.close()
+
+    async def run_forever(self) -> None:
+        delay = BACKOFF_INITIAL
+        while True:
+            started = asyncio.get_running_loop().time()
+            try:
+                await self._listen_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"evveko_db dinleyici hatasi: {e}")
+
+            # Uzun sure bagli kaldiysa backoff'u sifirla
+            if asyncio.get_running_loop().time() - started > BACKOFF_MAX:
+                delay = BACKOFF_INITIAL
+
+            self.reconnects += 1
+            # Bu arada kacan bildirimler icin de bir catch-up dongusu tetikle
+            self.on_notify(None)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            delay = min(delay * 2, BACKOFF_MAX)
+
+    def status(self) -> dict:
+        return {
+            "channel": self.channel,
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "notifications": self.notifications,
+            "last_notification_at": self.last_notification_at,
+        }
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ["install-trigger"]:
+        asyncio.run(install_notify_trigger())
+        print(f"Trigger kuruldu (kanal: {settings.yevveko_notify_channel})")
+    else:
+        print("Kullanim: python -m app.services.yevveko_listener install-trigger")
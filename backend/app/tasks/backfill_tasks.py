@@ -0,0 +1,53 @@
+from celery import chord
+
+from app.tasks.celery_app import celery_app
+from app.tasks.runtime import async_task, run
+
+
+@async_task()
+async def backfill_range(low_id: int, high_id: int, chunk_size: int = 1000):
+    """
+    Tek bir id araligini backfill eder (checkpoint'ten devam eder).
+
+    Sync cycle lock'u paylasimli tutulur: araliklar paralel calisir, ama
+    periyodik/manuel sync bu sirada atlanir.
+    """
+    from app.services.backfill import backfill_range as run_range
+    from app.services.sync_scheduler import sync_cycle_lock
+
+    async with sync_cycle_lock(wait=True, shared=True):
+        result = await run_range(low_id, high_id, chunk_size)
+    return {"low_id": low_id, "high_id": high_id, "created": result.created, "processed": result.processed}
+
+
+@async_task()
+async def reconcile_backfill(results: list, ranges: list, max_id: int):
+    """Tum araliklar bittikten sonra imleci ilerletir ve sayim mutabakati yapar."""
+    from app.services.backfill import finish_backfill, reconcile
+    from app.services.sync_scheduler import sync_cycle_lock
+
+    # yevveko imleci calisan bir sync'in altinda ilerletilmez
+    async with sync_cycle_lock(wait=True):
+        await finish_backfill(max_id)
+    return await reconcile([tuple(r) for r in ranges])
+
+
+@celery_app.task
+def start_backfill(parts: int = 16, chunk_size: int = 1000):
+    """Id uzayini araliklara boler ve her araligi ayri bir task olarak dagitir."""
+    from app.services.backfill import plan_ranges
+    from app.services.sync_scheduler import sync_cycle_busy
+    from app.services.yevveko_db_sync import fetch_talep_id_range
+
+    if run(sync_cycle_busy()):
+        return {"ranges": 0, "busy": True}
+
+    min_id, max_id = run(fetch_talep_id_range())
+    ranges = plan_ranges(min_id, max_id, parts)
+    if not ranges:
+        return {"ranges": 0}
+
+    chord(
+        backfill_range.s(low, high, chunk_size) for low, high in ranges
+    )(reconcile_backfill.s(ranges, max_id))
+    return {"ranges": len(ranges), "min_id": min_id, "max_id": max_id}
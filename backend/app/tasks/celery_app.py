@@ -9,6 +9,19 @@ celery_app = Celery(
     "evvekocrm",
     broker=settings.redis_url,
     backend=settings.redis_url,
+    # autodiscover_tasks(["app.tasks"]) sadece app.tasks.tasks modulunu arar;
+    # gorev modulleri acikca listelenir
+    include=[
+        "app.tasks.backfill_tasks",
+        "app.tasks.dedup_tasks",
+        "app.tasks.funnel_tasks",
+        "app.tasks.kpi_tasks",
+        "app.tasks.outbox_tasks",
+        "app.tasks.rollup_tasks",
+        "app.tasks.scoring_tasks",
+        "app.tasks.sla_tasks",
+        "app.tasks.sync_tasks",
+    ],
 )
 
 celery_app.conf.update(
@@ -26,17 +39,44 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.sync_tasks.sync_new_talepler",
         "schedule": 60.0,
     },
+    # Her 30 saniye: CRM -> Yevveko durum geri bildirimi (outbox)
+    "dispatch-outbox": {
+        "task": "app.tasks.outbox_tasks.dispatch_outbox",
+        "schedule": 30.0,
+    },
     # Her 5 dakika: SLA ihlali kontrolu
     "check-sla-breaches": {
         "task": "app.tasks.sla_tasks.check_sla_breaches",
         "schedule": 300.0,
     },
+    # Her 5 dakika: saatlik zaman serisi rollup'lari (sadece degisen saatler)
+    "refresh-timeseries": {
+        "task": "app.tasks.rollup_tasks.refresh_timeseries",
+        "schedule": 300.0,
+    },
+    # Her 5 dakika: ofis gunluk rollup'lari (sadece degisen gunler)
+    "refresh-office-rollups": {
+        "task": "app.tasks.rollup_tasks.refresh_office_rollups",
+        "schedule": 300.0,
+    },
+    # Her gece: tum lead'leri scoring_rules ile yeniden puanla
+    "rescore-leads": {
+        "task": "app.tasks.scoring_tasks.rescore_leads",
+        "schedule": crontab(hour=2, minute=30),
+    },
+    # Her gece: mukerrer lead gruplarini bastan hesapla
+    "rebuild-duplicate-clusters": {
+        "task": "app.tasks.dedup_tasks.rebuild_duplicate_clusters",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    # Her gece: huni sayaclarindaki kaymayi duzelt
+    "reconcile-funnel-counters": {
+        "task": "app.tasks.funnel_tasks.reconcile_funnel_counters",
+        "schedule": crontab(hour=4, minute=0),
+    },
     # Her gun gece yarisi: KPI snapshot
     "daily-kpi-snapshot": {
         "task": "app.tasks.kpi_tasks.daily_kpi_snapshot",
         "schedule": crontab(hour=0, minute=5),
     },
 }
-
-# Task modulleri
-celery_app.autodiscover_tasks(["app.tasks"])
@@ -0,0 +1,9 @@
+from app.tasks.runtime import async_task
+
+
+@async_task()
+async def rebuild_duplicate_clusters():
+    """Tum lead'ler icin blok anahtarlarini ve acik mukerrer gruplarini yeniden hesaplar."""
+    from app.services.dedup import rebuild_duplicate_clusters as rebuild
+
+    return await rebuild()
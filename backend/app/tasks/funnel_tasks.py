@@ -0,0 +1,9 @@
+from app.tasks.runtime import async_task
+
+
+@async_task()
+async def reconcile_funnel_counters():
+    """Huni sayaclarini crm_leads'ten yeniden sayip kaymayi duzeltir."""
+    from app.services.funnel import reconcile_funnel_counters as reconcile
+
+    return await reconcile()
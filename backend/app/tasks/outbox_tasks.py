@@ -0,0 +1,9 @@
+from app.tasks.runtime import async_task
+
+
+@async_task()
+async def dispatch_outbox():
+    """Bekleyen CRM -> Yevveko olaylarini gonderir."""
+    from app.services.outbox_dispatcher import drain_outbox
+
+    await drain_outbox()
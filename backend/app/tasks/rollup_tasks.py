@@ -0,0 +1,17 @@
+from app.tasks.runtime import async_task
+
+
+@async_task()
+async def refresh_office_rollups():
+    """Ofis gunluk rollup'larinda degisen gunleri yeniden hesaplar."""
+    from app.services.office_rollups import refresh_office_rollups as refresh
+
+    return await refresh()
+
+
+@async_task()
+async def refresh_timeseries():
+    """Saatlik zaman serisi rollup'larinda degisen saatleri yeniden hesaplar."""
+    from app.services.timeseries import refresh_timeseries as refresh
+
+    return await refresh()
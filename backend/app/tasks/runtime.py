@@ -0,0 +1,154 @@
+"""
+Celery worker'lari icin async gorev calisma ortami.
+
+Her worker sureci tek ve uzun omurlu bir event loop kullanir; async gorevler
+asyncio.run yerine bu loop'ta calisir. SQLAlchemy engine'lerinin havuzlari
+(app.database, yevveko_db_sync) loop'a bagli oldugundan baglantilar gorevler
+arasinda yeniden kullanilir ve "attached to a different loop" hatasi olusmaz.
+
+- worker_process_init: fork ile ana surecten gelen havuzlar (baglantilari
+  kapatilmadan) birakilir; her surec kendi havuzunu ilk gorevde acar.
+- worker_process_shutdown: engine'ler bu surecin loop'unda dispose edilir,
+  loop kapatilir.
+
+Gorev, commit'lerin zamanladigi dashboard onbellegi invalidation'lari
+gonderilmeden bitmez. Gorev basina sure celery.task_seconds.<gorev>
+metrigine yazilir. Havuzlar loop basina oldugundan prefork (varsayilan) ve
+solo havuzlariyla kullanilir; threads/gevent havuzlari desteklenmez.
+
+Eski (asyncio.run + her seferinde yeni baglanti) ve yeni calisma bicimi
+arasindaki gorev basina ek yuku olcmek icin:
+    python -m app.tasks.runtime 200
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable
+
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from app.services.dashboard_cache import dashboard_cache
+from app.tasks.celery_app import celery_app
+from app.utils.metrics import metrics
+
+logger = logging.getLogger("evvekocrm.tasks")
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_pid: int | None = None
+
+
+def _engines():
+    from app.database import engine
+    from app.services.yevveko_db_sync import yevveko_engine
+
+    return (engine, yevveko_engine)
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Bu surecin loop'u; fork sonrasi ana surecin loop'u kullanilmaz."""
+    global _loop, _loop_pid
+    if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+        _loop = asyncio.new_event_loop()
+        _loop_pid = os.getpid()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def run(coro: Awaitable[Any]) -> Any:
+    """Coroutine'i surecin kalici loop'unda sonuna kadar calistirir."""
+    return get_loop().run_until_complete(coro)
+
+
+async def _run_task(fn: Callable[..., Awaitable[Any]], args: tuple, kwargs: dict) -> Any:
+    try:
+        return await fn(*args, **kwargs)
+    finally:
+        # Commit'te zamanlanan dashboard invalidation'lari loop bir sonraki
+        # goreve kadar durdugu icin gecikmesin; gorev bitmeden gonderilir
+        await dashboard_cache.flush()
+
+
+def async_task(*task_args, **task_options):
+    """
+    Async fonksiyonu Celery gorevi olarak kaydeder; @celery_app.task ile ayni
+    secenekleri alir. Gorev adi fonksiyonun modul ve adindan gelir.
+    """
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        @functools.wraps(fn)
+        def runner(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return run(_run_task(fn, args, kwargs))
+            finally:
+                metrics.observe(f"celery.task_seconds.{fn.__name__}", time.perf_counter() - started)
+
+        return celery_app.task(*task_args, **task_options)(runner)
+
+    return decorator
+
+
+@worker_process_init.connect
+def _reset_inherited_pools(**kwargs) -> None:
+    # Ana surecin baglantilari ona aittir; kapatmadan birak, cocuk kendi havuzunu acsin
+    for engine in _engines():
+        engine.sync_engine.dispose(close=False)
+
+
+@worker_process_shutdown.connect
+def _close_runtime(**kwargs) -> None:
+    global _loop
+    if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+        return
+    try:
+        for engine in _engines():
+            _loop.run_until_complete(engine.dispose())
+        _loop.run_until_complete(_loop.shutdown_asyncgens())
+    except Exception as e:
+        logger.warning(f"Worker kapanirken engine'ler kapatilamadi: {e}")
+    finally:
+        _loop.close()
+        _loop = None
+
+
+async def _select_one(session_factory) -> None:
+    from sqlalchemy import text
+
+    async with session_factory() as db:
+        await db.execute(text("SELECT 1"))
+
+
+def _benchmark(iterations: int) -> None:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.config import get_settings
+    from app.database import async_session
+
+    # Eski davranis: her gorev yeni loop ve (eski loop'a bagli havuz kullanilamadigindan) yeni baglanti
+    fresh_engine = create_async_engine(get_settings().database_url, poolclass=NullPool)
+    fresh_session = async_sessionmaker(fresh_engine, class_=AsyncSession, expire_on_commit=False)
+
+    def measure(label: str, call: Callable[[], Any]) -> None:
+        call()  # isinma
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(
+            f"{label}: {iterations} gorev, p50={timings[len(timings) // 2]:.2f}ms, "
+            f"p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms"
+        )
+
+    measure("asyncio.run + yeni baglanti", lambda: asyncio.run(_select_one(fresh_session)))
+    measure("kalici loop + havuz", lambda: run(_select_one(async_session)))
+
+
+if __name__ == "__main__":
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
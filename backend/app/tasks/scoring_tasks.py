@@ -0,0 +1,9 @@
+from app.tasks.runtime import async_task
+
+
+@async_task()
+async def rescore_leads():
+    """Tum lead'leri aktif scoring_rules ile yeniden puanlar (ajan puanlari haric)."""
+    from app.services.lead_scoring import rescore_all
+
+    return await rescore_all()
@@ -1,16 +1,11 @@
-import asyncio
 from datetime import datetime, timezone
 
-from app.tasks.celery_app import celery_app
+from app.tasks.runtime import async_task
 
 
-@celery_app.task
-def check_sla_breaches():
+@async_task()
+async def check_sla_breaches():
     """SLA ihlali olan leadleri kontrol eder ve bildirim gonderir."""
-    asyncio.run(_check_sla_breaches())
-
-
-async def _check_sla_breaches():
     from sqlalchemy import and_, select
 
     from app.database import async_session
@@ -0,0 +1,79 @@
+"""
+Surec ici basit metrik kaydi (counter, gauge, sure dagilimi).
+GET /metrics ile JSON olarak okunur; her uvicorn worker kendi degerlerini tutar.
+"""
+
+import os
+from collections import deque
+from typing import Callable
+
+# Yuzdelik hesabi icin saklanan son olcum sayisi
+_RECENT_SAMPLES = 512
+
+
+class TimingStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: deque[float] = deque(maxlen=_RECENT_SAMPLES)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def _percentile(self, pct: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        index = min(int(len(ordered) * pct), len(ordered) - 1)
+        return ordered[index]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 6) if self.count else 0.0,
+            "p50": round(self._percentile(0.50), 6),
+            "p95": round(self._percentile(0.95), 6),
+            "max": round(self.max, 6),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.counters: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+        self.timings: dict[str, TimingStats] = {}
+        self._gauge_callbacks: dict[str, Callable[[], float]] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        self.gauges[name] = value
+
+    def register_gauge(self, name: str, callback: Callable[[], float]) -> None:
+        """Okuma aninda hesaplanan gauge (ornegin kuyruk derinligi)."""
+        self._gauge_callbacks[name] = callback
+
+    def observe(self, name: str, value: float) -> None:
+        stats = self.timings.get(name)
+        if stats is None:
+            stats = self.timings[name] = TimingStats()
+        stats.observe(value)
+
+    def snapshot(self) -> dict:
+        gauges = dict(self.gauges)
+        for name, callback in self._gauge_callbacks.items():
+            gauges[name] = callback()
+        return {
+            "pid": os.getpid(),
+            "counters": dict(self.counters),
+            "gauges": gauges,
+            "timings": {name: s.snapshot() for name, s in self.timings.items()},
+        }
+
+
+metrics = MetricsRegistry()
@@ -1,5 +1,8 @@
-from dataclasses import dataclass
-from typing import Generic, TypeVar
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Generic, Optional, TypeVar
 
 from pydantic import BaseModel
 
@@ -21,7 +24,25 @@ class PaginationParams(BaseModel):
 
 class PaginatedResponse(BaseModel):
     items: list
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     per_page: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    # Cursor modunda sonraki sayfanin imleci; son sayfada None
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """(created_at, id) ciftini istemciye opak bir imlec olarak verir."""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """encode_cursor'un tersi; gecersiz imlecte ValueError firlatir."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError("Gecersiz cursor") from e
@@ -1,4 +1,8 @@
 import re
+from typing import Optional
+
+# Turkiye cep telefonu, E.164
+_E164_MOBILE = re.compile(r"^\+905\d{9}$")
 
 
 def normalize_phone(phone: str) -> str:
@@ -13,3 +17,12 @@ def normalize_phone(phone: str) -> str:
         return f"+90{digits}"
 
     return phone
+
+
+def to_e164(phone: Optional[str]) -> Optional[str]:
+    """Numara taninabiliyorsa +905XXXXXXXXX bicimini, degilse None dondurur."""
+    if not phone:
+        return None
+    # normalize_phone taniyamadigi girdiyi oldugu gibi dondurur ("+90532" gibi)
+    normalized = normalize_phone(phone)
+    return normalized if _E164_MOBILE.match(normalized) else None
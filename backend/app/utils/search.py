@@ -0,0 +1,55 @@
+import re
+import unicodedata
+from typing import Optional
+
+# Turkce harfler once acikca eslenir; "I".lower() -> "i" ve "İ".lower() -> "i̇"
+# tuzaklarindan kacinmak icin lower()'dan once uygulanir.
+_TURKISH_MAP = str.maketrans({
+    "İ": "i", "I": "i", "ı": "i",
+    "Ş": "s", "ş": "s",
+    "Ğ": "g", "ğ": "g",
+    "Ç": "c", "ç": "c",
+    "Ö": "o", "ö": "o",
+    "Ü": "u", "ü": "u",
+})
+
+_PHONE_QUERY = re.compile(r"^[\d\s()+\-.]+$")
+
+# Telefon aramasi icin gereken en az rakam sayisi (ulusal numara uzunlugu)
+PHONE_DIGITS = 10
+
+
+def fold_text(text: Optional[str]) -> str:
+    """Metni buyuk/kucuk harf ve aksan duyarsiz hale getirir: 'Şişli' -> 'sisli'."""
+    if not text:
+        return ""
+    text = text.translate(_TURKISH_MAP).lower()
+    # Kalan aksanlar (a, e, ...) icin birlesik isaretleri at
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.split())
+
+
+def phone_digits(phone: Optional[str]) -> str:
+    return re.sub(r"\D", "", phone or "")
+
+
+def build_search_text(
+    customer_name: Optional[str] = None,
+    customer_phone: Optional[str] = None,
+    ilce: Optional[str] = None,
+    mahalle: Optional[str] = None,
+) -> str:
+    """crm_leads.search_text kolonunun degeri (trigram indeksi bu kolon uzerindedir)."""
+    parts = [fold_text(customer_name), phone_digits(customer_phone), fold_text(ilce), fold_text(mahalle)]
+    return " ".join(p for p in parts if p)
+
+
+def phone_search_key(query: str) -> Optional[str]:
+    """Arama metni bir telefon numarasiysa son 10 rakami, degilse None dondurur."""
+    if not _PHONE_QUERY.match(query):
+        return None
+    digits = phone_digits(query)
+    if len(digits) < PHONE_DIGITS:
+        return None
+    return digits[-PHONE_DIGITS:]
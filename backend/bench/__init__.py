@@ -0,0 +1,23 @@
+"""
+Performans olcum betikleri (uygulama koduna dahil degildir).
+
+Betikler backend/ dizininden "python -m bench.<ad>" ile calistirilir ve
+DATABASE_URL / YEVVEKO_DATABASE_URL ortam degiskenlerindeki veritabanlarini
+kullanir. Sentetik veri yazan betikler yalnizca adi "_bench" ile biten
+veritabanlarinda calisir; gercek CRM veya evveko_db verisine dokunmazlar.
+"""
+
+from sqlalchemy.engine import make_url
+
+BENCH_DB_SUFFIX = "_bench"
+
+
+def require_bench_database(*urls: str) -> None:
+    """Verilen baglantilardan biri bench veritabani degilse cikar."""
+    for url in urls:
+        name = make_url(url).database or ""
+        if not name.endswith(BENCH_DB_SUFFIX):
+            raise SystemExit(
+                f"'{name}' bir bench veritabani degil; sentetik veri yalnizca "
+                f"adi '{BENCH_DB_SUFFIX}' ile biten veritabanlarina yazilir"
+            )
@@ -0,0 +1,143 @@
+"""
+Paralel backfill'in surec sayisina gore olceklenmesi.
+
+evveko_db yerine sentetik bir kaynak (tbl_users + kentsel_donusum_talebi)
+olusturulur, sonra run_parallel_backfill 1/2/4/8 surecle ayri ayri calistirilir.
+Her calismadan once CRM tarafindaki leadler ve checkpoint'ler temizlenir.
+
+    createdb evvekocrm_bench && createdb evveko_bench
+    export DATABASE_URL=postgresql+asyncpg://.../evvekocrm_bench
+    export YEVVEKO_DATABASE_URL=postgresql+asyncpg://.../evveko_bench
+    python -m bench.backfill_scaling --rows 200000 --workers 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import engine
+from app.services.backfill import run_parallel_backfill
+from app.services.yevveko_db_sync import DEFAULT_CHUNK_SIZE, yevveko_engine
+from bench import require_bench_database
+from seed import create_schema
+
+SOURCE_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS tbl_users (
+        user_id SERIAL PRIMARY KEY,
+        first_name VARCHAR(100),
+        last_name VARCHAR(100),
+        phone_number VARCHAR(20),
+        email VARCHAR(255)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS kentsel_donusum_talebi (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES tbl_users(user_id),
+        ilce VARCHAR(100),
+        mahalle VARCHAR(100),
+        sokak VARCHAR(255),
+        kapi_no VARCHAR(50),
+        ada VARCHAR(50),
+        parsel VARCHAR(50),
+        bina_alani DOUBLE PRECISION,
+        bagimsiz_bolum_sayisi INTEGER,
+        donusum_tipi VARCHAR(50),
+        inceleme_durumu VARCHAR(50),
+        created_at TIMESTAMP NOT NULL DEFAULT now(),
+        updated_at TIMESTAMP NOT NULL DEFAULT now()
+    )
+    """,
+)
+
+ILCELER = ["Kadikoy", "Uskudar", "Besiktas", "Sisli", "Bakirkoy", "Pendik", "Esenyurt", "Maltepe"]
+
+
+async def seed_source(rows: int) -> None:
+    """Kaynak tabloyu tam olarak rows satirla (id 1..rows) doldurur."""
+    async with yevveko_engine.begin() as conn:
+        for ddl in SOURCE_DDL:
+            await conn.execute(text(ddl))
+        current = (await conn.execute(text("SELECT count(*) FROM kentsel_donusum_talebi"))).scalar()
+        if current == rows:
+            return
+
+        await conn.execute(text(
+            "TRUNCATE kentsel_donusum_talebi, tbl_users RESTART IDENTITY"
+        ))
+        await conn.execute(text("""
+            INSERT INTO tbl_users (first_name, last_name, phone_number, email)
+            SELECT 'Test', 'Musteri ' || g,
+                   '05' || lpad((g * 7919 % 1000000000)::text, 9, '0'),
+                   'musteri' || g || '@example.com'
+            FROM generate_series(1, :rows) AS g
+        """), {"rows": rows})
+        await conn.execute(text("""
+            INSERT INTO kentsel_donusum_talebi (
+                user_id, ilce, mahalle, sokak, kapi_no, ada, parsel, bina_alani,
+                bagimsiz_bolum_sayisi, donusum_tipi, inceleme_durumu, created_at, updated_at
+            )
+            SELECT g, ilce.names[1 + g % cardinality(ilce.names)], 'Mahalle ' || (g % 50),
+                   'Sokak ' || (g % 300), (g % 90)::text, (g % 1000)::text, (g % 100)::text,
+                   100 + (g * 37 % 2900), 1 + g % 40, 'bina', 'beklemede',
+                   now() - make_interval(mins => g), now() - make_interval(mins => g)
+            FROM generate_series(1, :rows) AS g,
+                 (SELECT CAST(:ilceler AS text[]) AS names) AS ilce
+        """), {"rows": rows, "ilceler": ILCELER})
+    await yevveko_engine.dispose()
+
+
+async def reset_crm() -> None:
+    """Onceki calismanin leadlerini ve backfill checkpoint'lerini siler."""
+    async with engine.begin() as conn:
+        await conn.execute(text("TRUNCATE crm_leads CASCADE"))
+        await conn.execute(text(
+            "DELETE FROM crm_sync_state WHERE source = 'yevveko' OR source LIKE 'backfill:%'"
+        ))
+    await engine.dispose()
+
+
+async def _prepare_crm() -> None:
+    await create_schema()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Paralel backfill olcekleme olcumu")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ranges", type=int, default=16)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    require_bench_database(settings.database_url, settings.yevveko_database_url)
+
+    asyncio.run(_prepare_crm())
+    asyncio.run(seed_source(args.rows))
+
+    results = []
+    for workers in args.workers:
+        asyncio.run(reset_crm())
+        started = time.perf_counter()
+        report = run_parallel_backfill(workers, args.ranges, args.chunk_size)
+        seconds = time.perf_counter() - started
+        missing = sum(r["missing"] for r in report or [])
+        results.append((workers, seconds, missing))
+
+    print()
+    print(f"{args.rows} talep, {args.ranges} aralik")
+    base = results[0][1]
+    for workers, seconds, missing in results:
+        print(
+            f"{workers:>2} surec: {seconds:6.1f}sn  {args.rows / seconds:8,.0f} satir/sn  "
+            f"hizlanma x{base / seconds:.2f}  eksik={missing}"
+        )
+
+
+if __name__ == "__main__":
+    main()
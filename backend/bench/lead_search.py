@@ -0,0 +1,97 @@
+"""
+Lead arama gecikmesi (p50/p95).
+
+GET /leads?search= sayfa modundaki sorgu, lead'lerden orneklenen isim, yazim
+hatali isim, ilce ve telefon aramalariyla olculur. crm_leads en az --rows
+satira sentetik lead'lerle tamamlanir (yalnizca bench veritabaninda) ve
+search_text doldurulur. Trigram planinin anlamli olmasi icin 100.000+
+satir onerilir.
+
+    export DATABASE_URL=postgresql+asyncpg://.../evvekocrm_bench
+    python -m bench.lead_search --rows 200000 --samples 200
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import async_session, engine
+from app.models.lead import CRMLead
+from app.services.lead_search import apply_search, fill_search_text
+from bench import require_bench_database
+from bench.synthetic import seed_leads
+from seed import create_schema
+
+
+async def _sample_terms(db: AsyncSession, count: int) -> dict[str, list[str]]:
+    """Rastgele lead'lerden isim, ilce, yazim hatali isim ve telefon aramalari."""
+    result = await db.execute(
+        select(CRMLead.customer_name, CRMLead.customer_phone, CRMLead.ilce)
+        .where(CRMLead.customer_name.isnot(None))
+        .order_by(func.random())
+        .limit(count)
+    )
+    rng = random.Random(0)
+    terms: dict[str, list[str]] = {"isim": [], "yazim hatasi": [], "ilce": [], "telefon": []}
+    for name, phone, ilce in result.all():
+        word = rng.choice(name.split())
+        terms["isim"].append(word)
+        if len(word) > 3:
+            # Bir harfi dusurerek yazim hatasi benzetilir
+            i = rng.randrange(1, len(word))
+            terms["yazim hatasi"].append(word[:i] + word[i + 1:])
+        terms["ilce"].append(ilce)
+        if phone:
+            terms["telefon"].append(phone)
+    return terms
+
+
+async def run(rows: int, samples: int, per_page: int) -> None:
+    await create_schema()
+    added = await seed_leads(rows)
+    async with engine.begin() as conn:
+        filled = await conn.run_sync(fill_search_text)
+        await conn.execute(text("ANALYZE crm_leads"))
+    if added or filled:
+        print(f"{added} sentetik lead eklendi, {filled} satirin search_text'i dolduruldu")
+
+    async with async_session() as db:
+        terms = await _sample_terms(db, samples)
+        for kind, values in terms.items():
+            timings = []
+            for term in values:
+                query, rank = apply_search(select(CRMLead), term)
+                order = [CRMLead.created_at.desc(), CRMLead.id.desc()]
+                if rank is not None:
+                    order.insert(0, rank.desc())
+                started = time.perf_counter()
+                (await db.execute(query.order_by(*order).limit(per_page))).scalars().all()
+                timings.append((time.perf_counter() - started) * 1000)
+            if not timings:
+                continue
+            timings.sort()
+            print(
+                f"{kind}: {len(timings)} arama, p50={timings[len(timings) // 2]:.1f}ms, "
+                f"p95={timings[max(int(len(timings) * 0.95) - 1, 0)]:.1f}ms, max={timings[-1]:.1f}ms"
+            )
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Lead arama gecikmesi olcumu")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--per-page", type=int, default=20)
+    args = parser.parse_args()
+
+    require_bench_database(get_settings().database_url)
+    asyncio.run(run(args.rows, args.samples, args.per_page))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+OFFSET ve keyset sayfalamanin ilk ve derin sayfa gecikmesi.
+
+GET /leads sorgusu (ORDER BY created_at DESC, id DESC) crm_leads uzerinde
+sayfa 1 ve derin bir sayfa icin her iki yontemle olculur. Derin sayfa icin
+en az sayfa * sayfa_boyu lead gerekir; eksik kisim sentetik lead'lerle
+tamamlanir (yalnizca bench veritabaninda).
+
+    export DATABASE_URL=postgresql+asyncpg://.../evvekocrm_bench
+    python -m bench.pagination --rows 200000 --page 5000 --repeats 20
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select, tuple_
+
+from app.config import get_settings
+from app.database import async_session, engine
+from app.models.lead import CRMLead
+from bench import require_bench_database
+from bench.synthetic import seed_leads
+from seed import create_schema
+
+
+async def _measure(db, label: str, query, repeats: int) -> None:
+    await db.execute(query)  # isinma
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        (await db.execute(query)).scalars().all()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(f"{label}: p50={timings[len(timings) // 2]:.2f}ms, max={timings[-1]:.2f}ms")
+
+
+async def run(rows: int, deep_page: int, repeats: int, per_page: int) -> None:
+    deep_page = max(deep_page, 2)
+    await create_schema()
+    added = await seed_leads(max(rows, deep_page * per_page))
+    if added:
+        print(f"{added} sentetik lead eklendi")
+
+    order = (CRMLead.created_at.desc(), CRMLead.id.desc())
+    async with async_session() as db:
+        # Derin sayfanin imleci: onceki sayfanin son satiri (olcume dahil degil)
+        last = (await db.execute(
+            select(CRMLead.created_at, CRMLead.id).order_by(*order)
+            .offset((deep_page - 1) * per_page - 1).limit(1)
+        )).first()
+
+        base = select(CRMLead).order_by(*order)
+        await _measure(db, "offset, sayfa 1", base.limit(per_page), repeats)
+        await _measure(
+            db, f"offset, sayfa {deep_page}",
+            base.offset((deep_page - 1) * per_page).limit(per_page), repeats,
+        )
+        await _measure(db, "keyset, sayfa 1", base.limit(per_page + 1), repeats)
+        await _measure(
+            db, f"keyset, sayfa {deep_page}",
+            base.where(tuple_(CRMLead.created_at, CRMLead.id) < tuple_(*last)).limit(per_page + 1),
+            repeats,
+        )
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OFFSET ve keyset sayfalama olcumu")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--page", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--per-page", type=int, default=20)
+    args = parser.parse_args()
+
+    require_bench_database(get_settings().database_url)
+    asyncio.run(run(args.rows, args.page, args.repeats, args.per_page))
+
+
+if __name__ == "__main__":
+    main()
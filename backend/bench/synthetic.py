@@ -0,0 +1,48 @@
+"""Bench veritabanlari icin sentetik veri (SQL generate_series ile, hizli)."""
+
+from sqlalchemy import text
+
+from app.database import engine
+
+FIRST_NAMES = ["Ayşe", "Mehmet", "Fatma", "Ahmet", "Emine", "Mustafa", "Hatice", "Ali", "Zeynep", "Hüseyin"]
+LAST_NAMES = ["Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Yıldırım", "Öztürk", "Aydın", "Özdemir"]
+ILCELER = ["Kadıköy", "Üsküdar", "Beşiktaş", "Şişli", "Bakırköy", "Pendik", "Esenyurt", "Maltepe"]
+
+
+async def seed_leads(rows: int) -> int:
+    """
+    crm_leads'te en az rows satir olmasini saglar; eksik kismi sentetik
+    lead'lerle (source='bench') tamamlar. Eklenen satir sayisini dondurur.
+    created_at saniyeler arayla geriye dogru yayilir, search_text bos kalir.
+    """
+    async with engine.begin() as conn:
+        current = (await conn.execute(text("SELECT count(*) FROM crm_leads"))).scalar()
+        missing = rows - current
+        if missing <= 0:
+            return 0
+        await conn.execute(text("""
+            INSERT INTO crm_leads (
+                source, customer_name, customer_phone, ilce, mahalle, status,
+                toplanti_uygunluk_skoru, created_at, updated_at
+            )
+            SELECT 'bench',
+                   n.first[1 + g % cardinality(n.first)] || ' '
+                       || n.last[1 + (g / cardinality(n.first)) % cardinality(n.last)],
+                   '05' || lpad((g * 7919 % 1000000000)::text, 9, '0'),
+                   n.ilce[1 + g % cardinality(n.ilce)],
+                   'Mahalle ' || (g % 50),
+                   'talep_geldi', 0,
+                   now() - make_interval(secs => g * 30),
+                   now()
+            FROM generate_series(:start, :end) AS g,
+                 (SELECT CAST(:first AS text[]) AS first,
+                         CAST(:last AS text[]) AS last,
+                         CAST(:ilce AS text[]) AS ilce) AS n
+        """), {
+            "start": current + 1,
+            "end": rows,
+            "first": FIRST_NAMES,
+            "last": LAST_NAMES,
+            "ilce": ILCELER,
+        })
+    return missing
@@ -0,0 +1,89 @@
+"""
+Toplu upsert (upsert_talepler) yazma hizi, satir/sn.
+
+Ayni sentetik talepler uc turda yazilir: ekleme, degismeyen (atlama) ve
+guncelleme. Varsayilan olarak sadece yazma yolu olculur: yonlendirme
+(lead_routing_enabled) ve puanlama (lead_scoring_enabled) kapatilir;
+--routing / --scoring ile ingestion'daki gibi acilabilir. Huni sayac
+deltalari (apply_deltas) her zaman yazilir. Tum turlar tek transaction'da
+calisir ve sonunda geri alinir (yalnizca bench veritabaninda).
+
+    export DATABASE_URL=postgresql+asyncpg://.../evvekocrm_bench
+    python -m bench.upsert --count 20000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+from app.config import get_settings
+from app.database import async_session, engine
+from app.services.lead_ingestion import upsert_talepler
+from bench import require_bench_database
+from bench.synthetic import ILCELER
+from seed import create_schema
+
+
+def synthetic_talepler(count: int, seed: int = 0) -> list[dict]:
+    # Negatif id'ler gercek taleplerle cakismaz
+    rng = random.Random(seed)
+    return [
+        {
+            "talep_id": -(i + 1),
+            "customer_name": f"Test Musteri {rng.randrange(100000)}",
+            "customer_phone": f"05{rng.randrange(10**9):09d}",
+            "ilce": rng.choice(ILCELER),
+            "mahalle": f"Mahalle {rng.randrange(50)}",
+            "ada": str(rng.randrange(1000)),
+            "parsel": str(rng.randrange(100)),
+            "bina_alani": rng.uniform(100, 3000),
+            "bagimsiz_bolum_sayisi": rng.randrange(1, 40),
+            "created_at": datetime.now(),
+        }
+        for i in range(count)
+    ]
+
+
+async def run(count: int) -> None:
+    await create_schema()
+    talepler = synthetic_talepler(count)
+    changed = [{**t, "customer_name": f"{t['customer_name']} (guncel)"} for t in talepler]
+    passes = (
+        ("ekleme", talepler, False),
+        ("degismeyen (atlama)", talepler, True),
+        ("guncelleme", changed, True),
+    )
+    async with async_session() as db:
+        try:
+            for label, rows, update_existing in passes:
+                started = time.perf_counter()
+                result = await upsert_talepler(db, rows, update_existing=update_existing)
+                await db.flush()
+                seconds = time.perf_counter() - started
+                print(
+                    f"{label}: {count} talep, {seconds:.2f}sn, {count / seconds:,.0f} satir/sn "
+                    f"(eklenen={result.created}, guncellenen={result.updated}, atlanan={result.skipped})"
+                )
+        finally:
+            await db.rollback()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Toplu upsert yazma hizi olcumu")
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--routing", action="store_true", help="ofis yonlendirmesini de calistir")
+    parser.add_argument("--scoring", action="store_true", help="lead puanlamasini de calistir")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    require_bench_database(settings.database_url)
+    settings.lead_routing_enabled = args.routing
+    settings.lead_scoring_enabled = args.scoring
+    asyncio.run(run(args.count))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,34 @@
 """
 Seed data script - Ilk kurulumda calistirilir.
 Kullanim: python seed.py
+
+Mevcut bir veritabaninda ORM sorgulari yeni kolonlari bekler; sira:
+    python seed.py --schema   # eksik tablolar (create_all)
+    alembic upgrade head      # mevcut tablolardaki degisiklikler
+    python seed.py
 """
 import asyncio
+import sys
 
-from sqlalchemy import select
+from sqlalchemy import select, text
 
 from app.database import engine, async_session, Base
 from app.models import *  # noqa: F403
 from app.services.auth_service import hash_password
+from app.services.funnel import reconcile_funnel_counters
 
 
-async def seed():
+async def create_schema():
     # Tablolari olustur
     async with engine.begin() as conn:
+        # Lead aramasindaki trigram indeksi icin
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
 
+
+async def seed():
+    await create_schema()
+
     async with async_session() as db:
         # --- ROLLER ---
         roles_data = [
@@ -218,8 +231,14 @@ async def seed():
             ))
 
         await db.commit()
-        print("Seed data basariyla olusturuldu!")
+
+    # Mevcut lead'ler varsa huni sayaclarini doldur
+    await reconcile_funnel_counters()
+    print("Seed data basariyla olusturuldu!")
 
 
 if __name__ == "__main__":
-    asyncio.run(seed())
+    if sys.argv[1:] == ["--schema"]:
+        asyncio.run(create_schema())
+    else:
+        asyncio.run(seed())
@@ -0,0 +1,47 @@
+import pytest
+
+from app.services.backfill import checkpoint_key, plan_ranges
+
+
+def _assert_contiguous(ranges, min_id, max_id):
+    assert ranges[0][0] == min_id
+    assert ranges[-1][1] == max_id
+    for low, high in ranges:
+        assert low <= high
+    # Bosluk ve cakisma yok: her aralik bir oncekinin hemen arkasindan baslar
+    for (_, prev_high), (next_low, _) in zip(ranges, ranges[1:]):
+        assert next_low == prev_high + 1
+
+
+def test_plan_ranges_empty_source():
+    assert plan_ranges(0, 0, 16) == []
+    assert plan_ranges(10, 5, 4) == []
+
+
+def test_plan_ranges_more_parts_than_span():
+    ranges = plan_ranges(5, 7, 16)
+
+    assert ranges == [(5, 5), (6, 6), (7, 7)]
+
+
+def test_plan_ranges_single_part_covers_everything():
+    assert plan_ranges(1, 1000, 1) == [(1, 1000)]
+    assert plan_ranges(3, 3, 4) == [(3, 3)]
+
+
+@pytest.mark.parametrize(
+    ("min_id", "max_id", "parts"),
+    [(1, 100, 4), (1, 101, 4), (17, 1_000_003, 16), (1, 10, 3), (250, 260, 7)],
+)
+def test_plan_ranges_contiguous_coverage(min_id, max_id, parts):
+    ranges = plan_ranges(min_id, max_id, parts)
+
+    assert 1 <= len(ranges) <= parts
+    _assert_contiguous(ranges, min_id, max_id)
+    assert sum(high - low + 1 for low, high in ranges) == max_id - min_id + 1
+
+
+def test_checkpoint_key_is_stable_per_range():
+    assert checkpoint_key(1, 1000) == "backfill:1-1000"
+    keys = {checkpoint_key(low, high) for low, high in plan_ranges(1, 10_000, 16)}
+    assert len(keys) == 16
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from app.services.dashboard_cache import DashboardCache
+
+
+@pytest.mark.asyncio
+async def test_flush_waits_for_scheduled_invalidations():
+    cache = DashboardCache()
+    invalidated = []
+
+    async def fake_invalidate(scopes):
+        await asyncio.sleep(0.01)
+        invalidated.append(scopes)
+
+    cache.invalidate = fake_invalidate
+    cache.schedule_invalidate({"merkez", "bayi:1"})
+    assert invalidated == []
+
+    await cache.flush()
+    assert invalidated == [{"merkez", "bayi:1"}]
+    assert not cache._pending
+
+
+def test_async_task_flushes_before_returning(monkeypatch):
+    from app.tasks import runtime
+
+    cache = DashboardCache()
+    invalidated = []
+
+    async def fake_invalidate(scopes):
+        await asyncio.sleep(0.01)
+        invalidated.append(scopes)
+
+    cache.invalidate = fake_invalidate
+    monkeypatch.setattr(runtime, "dashboard_cache", cache)
+
+    async def task_body():
+        # after_commit ile ayni yol: invalidation loop'ta zamanlanir
+        cache.schedule_invalidate({"merkez"})
+        return "ok"
+
+    assert runtime.run(runtime._run_task(task_body, (), {})) == "ok"
+    assert invalidated == [{"merkez"}]
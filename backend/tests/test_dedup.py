@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+from app.services.dedup import (
+    MAX_BLOCK_SIZE,
+    _score_pairs,
+    _UnionFind,
+    build_profile,
+    candidate_pairs,
+    normalize_street,
+)
+
+
+def _lead(id, **fields):
+    values = {
+        "customer_name": None, "customer_phone_e164": None, "ilce": None, "mahalle": None,
+        "sokak": None, "kapi_no": None, "ada": None, "parsel": None,
+    }
+    values.update(fields)
+    return SimpleNamespace(id=id, **values)
+
+
+def test_block_keys_are_normalized():
+    profile = build_profile(_lead(
+        1, customer_phone_e164="+905321234567", ilce="Şişli", ada="0012", parsel="7 ",
+        sokak="Gül Sk.", kapi_no="12/A",
+    ))
+
+    assert profile.keys == {
+        "telefon": "+905321234567",
+        "parsel": "sisli|12|7",
+        "adres": "sisli|gul|12a",
+    }
+    assert normalize_street("GUL SOKAGI") == normalize_street("Gül Sk.") == "gul"
+
+
+def test_block_keys_need_both_parts():
+    # Ada'siz parsel ve kapi no'suz sokak anahtar uretmez
+    profile = build_profile(_lead(1, ilce="Kadikoy", parsel="7", sokak="Gul Sokak"))
+
+    assert profile.keys == {}
+
+
+def test_candidate_pairs_skip_oversized_blocks():
+    small = [1, 2, 3]
+    huge = list(range(100, 100 + MAX_BLOCK_SIZE + 1))
+    at_limit = list(range(1000, 1000 + MAX_BLOCK_SIZE))
+
+    pairs = candidate_pairs([small, huge, at_limit], {1, 100, 1000})
+
+    assert {(1, 2), (1, 3)} <= pairs
+    assert not any(a >= 100 and b < 1000 for a, b in pairs)
+    assert sum(1 for a, _ in pairs if a >= 1000) == MAX_BLOCK_SIZE - 1
+
+
+def test_candidate_pairs_only_involve_requested_leads():
+    pairs = candidate_pairs([[1, 2, 3]], {2})
+
+    # 1-3 cifti bu turdaki lead'leri icermiyor
+    assert pairs == {(1, 2), (2, 3)}
+
+
+def test_union_find_groups_transitive_matches():
+    uf = _UnionFind()
+    for a, b in [(1, 2), (2, 3), (10, 11), (4, 4)]:
+        uf.union(a, b)
+
+    groups = sorted(sorted(g) for g in uf.groups())
+    assert groups == [[1, 2, 3], [4], [10, 11]]
+    # Kok her zaman en kucuk id (grup ana lead'i)
+    assert uf.find(3) == 1 and uf.find(11) == 10
+
+
+def test_matched_pairs_cluster_on_synthetic_rows():
+    leads = [
+        _lead(1, ilce="Kadikoy", ada="10", parsel="5", customer_name="Ayse Yilmaz"),
+        _lead(2, ilce="Kadıköy", ada="010", parsel="5", customer_name="Ayşe Yılmaz"),
+        _lead(3, ilce="Kadikoy", sokak="Gul Sokak", kapi_no="3", ada="10", parsel="5"),
+        # Sadece ayni telefon: esigin altinda kalir
+        _lead(4, customer_phone_e164="+905321234567", ilce="Uskudar"),
+        _lead(5, customer_phone_e164="+905321234567", ilce="Pendik"),
+    ]
+    profiles = {lead.id: build_profile(lead) for lead in leads}
+    blocks = {}
+    for profile in profiles.values():
+        for key in profile.keys.items():
+            blocks.setdefault(key, []).append(profile.id)
+
+    matches = _score_pairs(candidate_pairs(blocks.values(), profiles), profiles)
+    uf = _UnionFind()
+    for a, b in matches:
+        uf.union(a, b)
+
+    assert sorted(sorted(g) for g in uf.groups()) == [[1, 2, 3]]
+    score, reasons = matches[(1, 2)]
+    assert "parsel" in reasons and "isim" in reasons
+    assert score > matches[(1, 3)][0]
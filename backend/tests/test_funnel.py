@@ -0,0 +1,23 @@
+from collections import Counter
+
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.services.funnel import UNASSIGNED, counter_key, lead_counts_query
+
+
+def test_lead_counts_query_compiles_with_matching_group_by():
+    sql = str(lead_counts_query().compile(dialect=asyncpg.dialect()))
+
+    select_part, group_part = sql.split("GROUP BY")
+    office_expr = "coalesce(crm_leads.assigned_franchise_id, $1::INTEGER)"
+    assert office_expr in select_part
+    # PG, SELECT'teki ifadenin GROUP BY'da ayni parametreyle gecmesini ister
+    assert office_expr in group_part
+    assert "crm_leads.status" in group_part
+
+
+def test_counter_key_maps_unassigned():
+    deltas = Counter()
+    deltas[counter_key(None, "talep_geldi")] += 1
+    deltas[counter_key(3, "talep_geldi")] += 1
+    assert deltas == {(UNASSIGNED, "talep_geldi"): 1, (3, "talep_geldi"): 1}
@@ -0,0 +1,95 @@
+from datetime import date
+from decimal import Decimal
+
+from app.models.kpi import CRMKPISnapshot
+from app.services.kpi_engine import LeadTotals, build_snapshot_rows
+from app.services.office_rollups import OfficeTotals
+
+DAY = date(2026, 10, 1)
+NEXT_DAY = date(2026, 10, 2)
+
+
+def _rows_by_entity(rows):
+    return {(r["snapshot_date"], r["entity_type"], r["entity_id"]): r for r in rows}
+
+
+def _synthetic():
+    leads = {
+        (1, DAY): LeadTotals(toplam_lead=10, sla_icinde_arama=8, toplantiya_donusum=4, sahte_bos_lead=1),
+        (2, DAY): LeadTotals(toplam_lead=5, sla_icinde_arama=5, toplantiya_donusum=1, sahte_bos_lead=0),
+        # Atanmamis lead'ler sadece merkez satirina girer
+        (None, DAY): LeadTotals(toplam_lead=5, sla_icinde_arama=1, toplantiya_donusum=0, sahte_bos_lead=3),
+    }
+    totals = {
+        (1, DAY): OfficeTotals(
+            randevu_toplam=4, randevu_tamamlandi=3, randevu_gelmedi=1,
+            rapor_sayisi=2, rapor_zamaninda=1, tamlik_toplam=170, teklif_sayisi=1,
+            genel_puan_sayisi=2, genel_puan_toplam=9, gelir_toplam=Decimal("1500.00"),
+        ),
+        (2, DAY): OfficeTotals(
+            randevu_toplam=1, randevu_gelmedi=1,
+            genel_puan_sayisi=1, genel_puan_toplam=3, gelir_toplam=Decimal("250.50"),
+        ),
+    }
+    return leads, totals
+
+
+def test_office_rows_use_own_totals():
+    leads, totals = _synthetic()
+    rows = _rows_by_entity(build_snapshot_rows([DAY], [1, 2, 3], leads, totals))
+
+    office = rows[(DAY, "franchise", 1)]
+    assert office["toplam_lead"] == 10
+    assert office["sla_uyum_orani"] == 80.0
+    assert office["toplantiya_donusum_orani"] == 40.0
+    assert office["sahte_bos_orani"] == 10.0
+    assert office["randevu_katilim"] == 3
+    assert office["gelmedi_orani"] == 25.0
+    assert office["rapor_zamaninda"] == 1
+    assert office["rapor_tamlik_ortalama"] == 85.0
+    assert office["toplantidan_teklif_orani"] == 50.0
+    assert office["memnuniyet_ortalama"] == 4.5
+    assert office["kazanilan_gelir"] == Decimal("1500.00")
+
+
+def test_merkez_row_sums_all_offices_and_unassigned_leads():
+    leads, totals = _synthetic()
+    rows = _rows_by_entity(build_snapshot_rows([DAY], [1, 2, 3], leads, totals))
+
+    merkez = rows[(DAY, "merkez", None)]
+    assert merkez["toplam_lead"] == 20
+    assert merkez["sla_icinde_arama"] == 14
+    assert merkez["sla_uyum_orani"] == 70.0
+    assert merkez["sahte_bos_lead"] == 4
+    assert merkez["sahte_bos_orani"] == 20.0
+    assert merkez["randevu_toplam"] == 5
+    assert merkez["gelmedi_sayisi"] == 2
+    assert merkez["memnuniyet_ortalama"] == 4.0
+    assert merkez["kazanilan_gelir"] == Decimal("1750.50")
+
+
+def test_empty_office_and_day_get_zero_rows():
+    leads, totals = _synthetic()
+    rows = build_snapshot_rows([DAY, NEXT_DAY], [1, 2, 3], leads, totals)
+
+    # Her gun icin merkez + 3 ofis
+    assert len(rows) == 8
+    by_entity = _rows_by_entity(rows)
+
+    empty = by_entity[(DAY, "franchise", 3)]
+    assert empty["toplam_lead"] == 0
+    assert empty["sla_uyum_orani"] == 0
+    assert empty["gelmedi_orani"] == 0
+    # Orneklem yoksa ortalama yazilmaz
+    assert empty["rapor_tamlik_ortalama"] is None
+    assert empty["memnuniyet_ortalama"] is None
+
+    assert by_entity[(NEXT_DAY, "merkez", None)]["toplam_lead"] == 0
+
+
+def test_rows_cover_every_snapshot_metric_column():
+    leads, totals = _synthetic()
+    row = build_snapshot_rows([DAY], [], leads, totals)[0]
+
+    columns = {c.name for c in CRMKPISnapshot.__table__.columns} - {"id", "created_at"}
+    assert set(row) == columns
@@ -0,0 +1,155 @@
+import os
+import random
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import Base
+from app.models.lead import CRMLead
+from app.services import lead_scoring
+from app.services.lead_scoring import ScoringRules, score_leads, score_rows
+from app.utils.search import fold_text
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+RULES = ScoringRules.from_dict({
+    "daire_sayisi_min": 6,
+    "bina_yasi_min": 20,
+    "donusum_tipi_bonus": {"Bina": 5, "ada": 8},
+    "ilce_bonus": {"Şişli": 7, "Kadıköy": 3},
+    "sinif_esikleri": {"A": 60, "B": 30},
+    "bilinmeyen_anahtar": 1,
+})
+
+
+def _scalar_score(row, rules: ScoringRules) -> tuple[int, str]:
+    """Tek lead icin kurallarin satir satir (eski, skaler) uygulanisi."""
+    _, alan, bolum, yas, donusum, riskli, niyet, ilce, whatsapp, karar = row
+
+    def bonus(value, table):
+        folded = {fold_text(k): v for k, v in table.items()}
+        return folded.get(fold_text(value), 0)
+
+    score = 0.0
+    if bolum is not None and bolum >= rules.daire_sayisi_min:
+        score += rules.daire_sayisi_bonus
+    if yas is not None and yas >= rules.bina_yasi_min:
+        score += rules.bina_yasi_bonus
+    if alan is not None and alan >= rules.bina_alani_min:
+        score += rules.bina_alani_bonus
+    score += bonus(niyet, {"toplanti": rules.niyet_toplanti_bonus, "teklif": rules.niyet_teklif_bonus})
+    score += bonus(riskli, rules.riskli_yapi_bonus)
+    score += bonus(donusum, rules.donusum_tipi_bonus)
+    score += bonus(ilce, rules.ilce_bonus)
+    if whatsapp is True:
+        score += rules.whatsapp_var_bonus
+    if karar:
+        score += rules.karar_verici_belli_bonus
+
+    score = min(max(round(score), 0), 100)
+    if score >= rules.sinif_esikleri.get("A", 70):
+        return score, "A"
+    if score >= rules.sinif_esikleri.get("B", 40):
+        return score, "B"
+    return score, "C"
+
+
+def _synthetic_rows(count: int, seed: int = 0) -> list[tuple]:
+    rng = random.Random(seed)
+
+    def maybe(value):
+        return None if rng.random() < 0.25 else value
+
+    return [
+        (
+            i,
+            maybe(rng.uniform(50, 2000)),
+            maybe(rng.randrange(1, 30)),
+            maybe(rng.randrange(0, 60)),
+            maybe(rng.choice(["bina", "BİNA", "ada", "Ada ", "parsel"])),
+            maybe(rng.choice(["var", "Riskli", "surecte", "yok"])),
+            maybe(rng.choice(["toplanti", "Teklif", "bilgi"])),
+            maybe(rng.choice(["Şişli", "sisli", "KADIKÖY", "Pendik"])),
+            maybe(rng.choice([True, False])),
+            maybe(rng.choice(["Yonetici", ""])),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+@pytest.mark.parametrize("rules", [ScoringRules(), RULES], ids=["varsayilan", "ozel"])
+def test_vectorized_scores_match_scalar_rules(rules):
+    rows = _synthetic_rows(2000)
+
+    score, classes = score_rows(rows, rules)
+
+    expected = [_scalar_score(row, rules) for row in rows]
+    assert list(zip(score.tolist(), classes.tolist())) == expected
+
+
+def test_all_empty_features_score_zero():
+    rows = [(1,) + (None,) * 9, (2, None, None, None, "", "", "", "", None, "")]
+
+    score, classes = score_rows(rows, RULES)
+
+    assert score.tolist() == [0, 0]
+    assert classes.tolist() == ["C", "C"]
+    assert score_rows([], RULES)[0].size == 0
+
+
+def test_agent_scores_are_guarded_in_update():
+    sql = str(lead_scoring._UPDATE_SQL)
+
+    assert "l.skor_kaynagi IS DISTINCT FROM 'ajan'" in sql
+
+
+@pytest.mark.skipif(not DATABASE_URL, reason="DATABASE_URL yok; UPDATE testi Postgres ister")
+@pytest.mark.asyncio
+async def test_score_leads_skips_agent_scored_rows(monkeypatch):
+    schema = "crm_scoring_test"
+    # pg_trgm operator sinifi public'te; tablolar test semasinda olusur
+    engine = create_async_engine(
+        DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": f"{schema},public"}},
+    )
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+        await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(lead_scoring, "_rules_cache", None)
+
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            auto = CRMLead(ilce="Şişli", bagimsiz_bolum_sayisi=12, bina_yasi=30, niyet="teklif")
+            empty = CRMLead(ilce="Pendik")
+            agent = CRMLead(
+                ilce="Şişli", bagimsiz_bolum_sayisi=12, niyet="teklif",
+                toplanti_uygunluk_skoru=15, lead_sinif="C", skor_kaynagi="ajan",
+            )
+            db.add_all([auto, empty, agent])
+            await db.commit()
+
+            changed = await score_leads(db, [auto.id, empty.id, agent.id])
+            await db.commit()
+
+            rows = {
+                r.id: r for r in (await db.execute(
+                    select(CRMLead.id, CRMLead.toplanti_uygunluk_skoru, CRMLead.lead_sinif, CRMLead.skor_kaynagi)
+                )).all()
+            }
+
+        assert changed == 2
+        # Varsayilan kurallar: 20 (daire) + 15 (yas) + 40 (teklif)
+        assert (rows[auto.id].toplanti_uygunluk_skoru, rows[auto.id].lead_sinif) == (75, "A")
+        assert rows[auto.id].skor_kaynagi == "otomatik"
+        assert (rows[empty.id].toplanti_uygunluk_skoru, rows[empty.id].lead_sinif) == (0, "C")
+        assert (rows[agent.id].toplanti_uygunluk_skoru, rows[agent.id].lead_sinif) == (15, "C")
+        assert rows[agent.id].skor_kaynagi == "ajan"
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await engine.dispose()
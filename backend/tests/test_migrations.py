@@ -0,0 +1,15 @@
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_revisions_form_a_single_chain():
+    script = ScriptDirectory.from_config(Config(str(BACKEND_DIR / "alembic.ini")))
+
+    assert len(script.get_heads()) == 1
+    revisions = list(script.walk_revisions())
+    assert revisions[-1].down_revision is None
+    assert all(len(r.nextrev) <= 1 for r in revisions)
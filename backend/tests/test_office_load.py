@@ -0,0 +1,83 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.services import office_load as office_load_module
+from app.services.office_load import OfficeLoadTracker, record_appointment_status
+
+
+def _tracker(*office_ids):
+    tracker = OfficeLoadTracker()
+    for office_id in office_ids:
+        tracker.get(office_id)
+    return tracker
+
+
+def _session_with_transaction():
+    session = Session(create_engine("sqlite://"))
+    session.execute(text("SELECT 1"))
+    return session
+
+
+def test_plan_commit_counts_all_choices_by_default():
+    tracker = _tracker(1, 2)
+    plan = tracker.plan()
+    plan.choose([1])
+    plan.choose([1])
+
+    session = _session_with_transaction()
+    plan.commit(session)
+    session.commit()
+    assert tracker.get(1).open_leads == 2
+
+
+def test_plan_commit_counts_only_written_assignments():
+    tracker = _tracker(1, 2)
+    plan = tracker.plan()
+    for _ in range(3):
+        plan.choose([1])
+    plan.choose([2])
+
+    session = _session_with_transaction()
+    # Sadece iki satir gercekten eklendi (digerleri ON CONFLICT'e takildi)
+    plan.commit(session, [1, None])
+    session.commit()
+
+    assert tracker.get(1).open_leads == 1
+    assert tracker.get(2).open_leads == 0
+    assert plan.assigned == {}
+
+
+def test_plan_commit_applied_only_after_transaction_commits():
+    tracker = _tracker(1)
+    plan = tracker.plan()
+    plan.choose([1])
+
+    session = _session_with_transaction()
+    plan.commit(session)
+    assert tracker.get(1).open_leads == 0
+    session.rollback()
+    assert tracker.get(1).open_leads == 0
+
+    session.execute(text("SELECT 1"))
+    plan.choose([1])
+    plan.commit(session)
+    session.commit()
+    assert tracker.get(1).open_leads == 1
+
+
+def test_appointment_status_applied_only_after_commit(monkeypatch):
+    tracker = _tracker(1)
+    tracker._loaded_at = 0.0
+    monkeypatch.setattr(office_load_module, "office_load", tracker)
+
+    session = _session_with_transaction()
+    record_appointment_status(session, 1, None, "beklemede")
+    assert tracker.get(1).open_appointments == 0
+    session.commit()
+    assert tracker.get(1).open_appointments == 1
+
+    session.execute(text("SELECT 1"))
+    record_appointment_status(session, 1, "beklemede", "gelmedi")
+    session.rollback()
+    assert tracker.get(1).open_appointments == 1
+    assert tracker.get(1).no_shows == 0
@@ -0,0 +1,41 @@
+from datetime import date, datetime
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.office_rollups import day_ranges, dirty_days_query
+
+D = date(2026, 10, 1)
+
+
+def _day(n: int) -> date:
+    return D.replace(day=n)
+
+
+def test_day_ranges_merges_consecutive_days_and_splits_gaps():
+    days = [_day(1), _day(2), _day(3), _day(7), _day(9), _day(10)]
+
+    assert day_ranges(days, 31) == [
+        (_day(1), _day(4)),
+        (_day(7), _day(8)),
+        (_day(9), _day(11)),
+    ]
+
+
+def test_day_ranges_caps_range_length():
+    days = [_day(n) for n in range(1, 8)]
+
+    ranges = day_ranges(days, 3)
+
+    assert ranges == [(_day(1), _day(4)), (_day(4), _day(7)), (_day(7), _day(8))]
+    assert day_ranges([], 3) == []
+
+
+def test_dirty_days_query_scans_every_source_by_updated_at():
+    sql = str(
+        dirty_days_query(datetime(2026, 10, 1), datetime(2026, 10, 2))
+        .compile(dialect=postgresql.asyncpg.dialect())
+    )
+
+    assert sql.count("UNION") == 3
+    for table in ("crm_appointments", "crm_meeting_reports", "crm_satisfaction_calls", "crm_revenue_events"):
+        assert f"{table}.updated_at >" in sql
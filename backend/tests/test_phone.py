@@ -0,0 +1,13 @@
+import pytest
+
+from app.utils.phone import to_e164
+
+
+@pytest.mark.parametrize("raw", ["0532 123 45 67", "+90 (532) 123-4567", "5321234567", "905321234567"])
+def test_to_e164_normalizes_mobile_numbers(raw):
+    assert to_e164(raw) == "+905321234567"
+
+
+@pytest.mark.parametrize("raw", [None, "", "+90532", "+90532123456789", "0216 123 45 67", "abc"])
+def test_to_e164_rejects_malformed_numbers(raw):
+    assert to_e164(raw) is None
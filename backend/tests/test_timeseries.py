@@ -0,0 +1,106 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.models.rollup import CRMLeadHourlyRollup
+from app.services.timeseries import (
+    GRANULARITY_STEP,
+    MAX_POINTS,
+    SERIES,
+    read_timeseries,
+    rebuild_buckets,
+)
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+START = datetime(2026, 10, 5)  # Pazartesi
+
+
+def test_rebuild_buckets_are_aligned_and_include_current_hour():
+    buckets = rebuild_buckets(2, datetime(2026, 10, 18, 14, 37, 12))
+
+    assert len(buckets) == 48
+    assert buckets[-1] == datetime(2026, 10, 18, 14)
+    assert buckets[0] == datetime(2026, 10, 16, 15)
+    assert all(b.minute == b.second == b.microsecond == 0 for b in buckets)
+    assert all(b - a == timedelta(hours=1) for a, b in zip(buckets, buckets[1:]))
+
+
+def test_dirty_queries_track_the_right_change_column():
+    by_name = {series.name: series for series in SERIES}
+
+    for name in ("leads", "appointments"):
+        sql = str(by_name[name].dirty_sql)
+        assert not by_name[name].by_id
+        assert "date_trunc('hour', created_at)" in sql
+        assert "updated_at > :since AND updated_at <= :until" in sql
+
+    # Arama kayitlari guncellenmez: yeni satirlar id ile, saatleri started_at ile
+    calls = str(by_name["calls"].dirty_sql)
+    assert by_name["calls"].by_id
+    assert "date_trunc('hour', started_at)" in calls
+    assert "id > :since AND id <= :until" in calls
+
+
+def test_recompute_covers_exactly_one_hour_per_bucket():
+    for series in SERIES:
+        sql = str(series.recompute_sql)
+        assert "b.bucket + interval '1 hour'" in sql
+        assert f"INSERT INTO {series.table}" in sql
+
+
+@pytest.mark.parametrize(
+    ("granularity", "days", "allowed"),
+    [("hour", 83, True), ("hour", 84, False), ("day", 2000, True), ("week", 365 * 30, True)],
+)
+def test_point_limit_per_granularity(granularity, days, allowed):
+    # analytics.timeseries ayni hesapla genis araliklari reddeder
+    assert (timedelta(days=days) / GRANULARITY_STEP[granularity] <= MAX_POINTS) is allowed
+
+
+@pytest.mark.skipif(not DATABASE_URL, reason="DATABASE_URL yok; rollup okumasi Postgres ister")
+@pytest.mark.asyncio
+async def test_hourly_rows_roll_up_per_granularity():
+    schema = "crm_timeseries_test"
+    engine = create_async_engine(
+        DATABASE_URL, poolclass=NullPool, connect_args={"server_settings": {"search_path": schema}}
+    )
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+        await conn.run_sync(CRMLeadHourlyRollup.__table__.create)
+
+    try:
+        async with AsyncSession(engine) as db:
+            # 14 gun, her saat: Kadikoy 1, Sisli 2 lead
+            hours = [START + timedelta(hours=h) for h in range(14 * 24)]
+            db.add_all(
+                CRMLeadHourlyRollup(bucket=b, ilce=ilce, source="yevveko", status="talep_geldi",
+                                    lead_count=count, first_call_count=0, first_call_seconds=0,
+                                    sla_met_count=0)
+                for b in hours
+                for ilce, count in (("Kadikoy", 1), ("Sisli", 2))
+            )
+            await db.commit()
+
+            end = START + timedelta(days=14)
+            hourly = await read_timeseries(db, "leads", START, end, "hour")
+            daily = await read_timeseries(db, "leads", START, end, "day")
+            weekly = await read_timeseries(db, "leads", START, end, "week")
+            by_ilce = await read_timeseries(db, "leads", START, end, "day", group_by="ilce")
+            partial = await read_timeseries(db, "leads", START + timedelta(hours=6), START + timedelta(days=1), "day")
+
+        assert len(hourly) == 14 * 24 and {p["value"] for p in hourly} == {3}
+        assert [p["t"] for p in daily] == [START + GRANULARITY_STEP["day"] * i for i in range(14)]
+        assert {p["value"] for p in daily} == {72}
+        assert [(p["t"], p["value"]) for p in weekly] == [(START, 504), (START + timedelta(weeks=1), 504)]
+        assert {(p["group"], p["value"]) for p in by_ilce} == {("Kadikoy", 24), ("Sisli", 48)}
+        # Aralik saat sinirinda kesilir: ilk gunun son 18 saati
+        assert partial == [{"t": START, "group": None, "value": 54}]
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await engine.dispose()
@@ -0,0 +1,199 @@
+import asyncio
+import functools
+import time
+
+import httpx
+import pytest
+
+from app.services import yevveko_client
+from app.services.yevveko_client import CircuitBreaker, YevvekoClient
+
+
+@pytest.fixture(autouse=True)
+def reset_breaker(monkeypatch):
+    monkeypatch.setattr(yevveko_client, "breaker", CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    monkeypatch.setattr(yevveko_client, "RETRY_BACKOFF_BASE", 0.0)
+
+
+def _client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(base_url="http://yevveko.test", transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"ok": True, "talep": {"id": 7}})
+
+    async with _client(handler) as http:
+        talep = await YevvekoClient(client=http, retries=3).get_talep(7)
+
+    assert talep == {"id": 7}
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_repeated_failures():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ConnectError("down")
+
+    async with _client(handler) as http:
+        client = YevvekoClient(client=http, retries=0)
+        assert await client.update_talep_status(1, "kapanis_basarili") is False
+        assert await client.update_talep_status(2, "kapanis_basarili") is False
+        # Devre acik: istek gonderilmeden False doner
+        assert await client.update_talep_status(3, "kapanis_basarili") is False
+
+    assert len(calls) == 2
+    assert yevveko_client.breaker.state == "open"
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404)
+
+    async with _client(handler) as http:
+        assert await YevvekoClient(client=http, retries=3).get_talep(1) is None
+
+    assert len(calls) == 1
+    assert yevveko_client.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_shared_client_is_reused_and_bounded(monkeypatch):
+    """Toplu durum gonderiminde tek havuzlu client ve eszamanlilik siniri kullanilir."""
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200)
+
+    monkeypatch.setattr(yevveko_client.settings, "yevveko_http_max_concurrency", 4)
+    monkeypatch.setattr(
+        yevveko_client.httpx,
+        "AsyncClient",
+        functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(handler)),
+    )
+    await yevveko_client.close_http_client()
+    shared = yevveko_client.get_http_client()
+
+    client = YevvekoClient(retries=0)
+    results = await asyncio.gather(
+        *(client.update_talep_status(i, "merkez_arandi") for i in range(40))
+    )
+
+    assert all(results)
+    assert yevveko_client.get_http_client() is shared
+    # Istekler es zamanli gider ama sinir asilmaz
+    assert peak == 4
+    await yevveko_client.close_http_client()
+
+
+# Her yeni baglantinin ilk cevabindan once beklenen sure (TCP + TLS kurulumu yerine)
+CONNECT_LATENCY = 0.05
+
+
+async def _start_slow_connect_server(connections: list):
+    """Keep-alive destekli, yeni baglantida CONNECT_LATENCY geciktiren HTTP/1.1 sunucusu."""
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        await asyncio.sleep(CONNECT_LATENCY)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: 12\r\n\r\n{\"ok\": true}"
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    return server, f"http://{host}:{port}"
+
+
+@pytest.mark.asyncio
+async def test_pooled_client_outperforms_client_per_call(monkeypatch):
+    """Baglanti kurulumu pahaliyken paylasilan havuz, cagri basina yeni client'tan hizlidir."""
+    calls = 20
+    connections = []
+    server, url = await _start_slow_connect_server(connections)
+    monkeypatch.setattr(yevveko_client.settings, "yevveko_api_url", url)
+    monkeypatch.setattr(yevveko_client.settings, "yevveko_http2", False)
+    await yevveko_client.close_http_client()
+
+    try:
+        # Eski davranis: her cagri kendi client'ini (ve baglantisini) acar
+        started = time.perf_counter()
+        for i in range(calls):
+            async with httpx.AsyncClient(base_url=url) as http:
+                assert await YevvekoClient(client=http, retries=0).update_talep_status(i, "merkez_arandi")
+        per_call_seconds = time.perf_counter() - started
+        per_call_connections = len(connections)
+
+        connections.clear()
+        client = YevvekoClient(retries=0)
+        started = time.perf_counter()
+        for i in range(calls):
+            assert await client.update_talep_status(i, "merkez_arandi")
+        pooled_seconds = time.perf_counter() - started
+    finally:
+        await yevveko_client.close_http_client()
+        server.close()
+        await server.wait_closed()
+
+    assert per_call_connections == calls
+    assert len(connections) == 1
+    # Cagri basina client her seferinde kurulum gecikmesini oder (>= calls * 50ms)
+    assert per_call_seconds >= calls * CONNECT_LATENCY
+    assert pooled_seconds * 3 < per_call_seconds
+
+
+def test_half_open_allows_single_probe(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(yevveko_client.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] += 30
+    assert breaker.allow()
+    # Deneme surerken digerleri reddedilir
+    assert not breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    now[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
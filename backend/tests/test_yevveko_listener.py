@@ -0,0 +1,88 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.services import yevveko_listener
+from app.services.yevveko_listener import YevvekoListener, _asyncpg_dsn, install_notify_trigger
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not DATABASE_URL, reason="DATABASE_URL yok; LISTEN/NOTIFY testi Postgres ister"
+)
+
+# Kaynak tablo ayri bir semada olusturulur, test sonunda semayla birlikte silinir
+SCHEMA = "crm_listener_test"
+CHANNEL = "crm_listener_test_talep"
+
+
+async def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("zaman asimi")
+        await asyncio.sleep(0.02)
+
+
+@pytest.mark.asyncio
+async def test_trigger_wakes_listener_and_reconnect_triggers_catch_up(monkeypatch):
+    engine = create_async_engine(
+        DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.execute(text(
+            "CREATE TABLE kentsel_donusum_talebi (id SERIAL PRIMARY KEY, inceleme_durumu VARCHAR(50))"
+        ))
+
+    monkeypatch.setattr(yevveko_listener, "yevveko_engine", engine)
+    monkeypatch.setattr(yevveko_listener, "BACKOFF_INITIAL", 0.05)
+    await install_notify_trigger(channel=CHANNEL)
+
+    notified = asyncio.Queue()
+    listener = YevvekoListener(on_notify=notified.put_nowait, channel=CHANNEL)
+    listener.dsn = _asyncpg_dsn(DATABASE_URL)
+    task = asyncio.create_task(listener.run_forever())
+    try:
+        await _wait_until(lambda: listener.connected)
+
+        async with engine.begin() as conn:
+            talep_id = (await conn.execute(text(
+                "INSERT INTO kentsel_donusum_talebi (inceleme_durumu) VALUES ('beklemede') RETURNING id"
+            ))).scalar()
+        assert await asyncio.wait_for(notified.get(), 5) == talep_id
+
+        # Trigger AFTER INSERT OR UPDATE: guncellemeler de lideri uyandirir
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("UPDATE kentsel_donusum_talebi SET inceleme_durumu = 'onaylandi' WHERE id = :id"),
+                {"id": talep_id},
+            )
+        assert await asyncio.wait_for(notified.get(), 5) == talep_id
+        assert listener.notifications == 2
+
+        # LISTEN baglantisi koparsa kacan bildirimler icin catch-up tetiklenir
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                "WHERE pid <> pg_backend_pid() AND query LIKE :query"
+            ), {"query": f'LISTEN "{CHANNEL}"%'})
+        assert await asyncio.wait_for(notified.get(), 5) is None
+        await _wait_until(lambda: listener.connected)
+        assert listener.reconnects == 1
+    finally:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
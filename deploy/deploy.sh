@@ -95,9 +95,21 @@ sudo -u postgres psql -c "CREATE USER evvekocrm WITH PASSWORD 'evvekocrm_pass_20
 sudo -u postgres psql -c "CREATE DATABASE evvekocrm_db OWNER evvekocrm;" 2>/dev/null || echo "  -> Veritabani zaten var"
 sudo -u postgres psql -c "GRANT ALL PRIVILEGES ON DATABASE evvekocrm_db TO evvekocrm;" 2>/dev/null || true
 
-echo "  -> Seed data calistiriliyor..."
 cd "$BACKEND_DIR"
-./venv/bin/python seed.py 2>&1 || echo "  -> Seed zaten calistirilmis olabilir"
+echo "  -> Eksik tablolar olusturuluyor..."
+./venv/bin/python seed.py --schema
+
+# Seed'in sorgulari yeni kolonlari bekler; once mevcut tablolar guncellenir
+echo "  -> Sema guncellemeleri uygulaniyor (alembic)..."
+./venv/bin/alembic upgrade head
+
+# Seed idempotenttir (mevcut kayitlar atlanir), huni sayaclarini da esitler
+echo "  -> Seed data calistiriliyor..."
+./venv/bin/python seed.py
+
+# Ofis rollup'lari: ilk calisma (watermark yok) tum gecmisi doldurur, sonra artimli
+echo "  -> Ofis rollup'lari guncelleniyor..."
+./venv/bin/python -m app.services.office_rollups
 
 # --- 5. FRONTEND KURULUM ---
 echo ""